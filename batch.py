@@ -0,0 +1,367 @@
+"""
+Procesamiento por lotes sin interfaz gráfica (no importa Qt).
+
+Ejemplos:
+    python batch.py -p monroe -a 4793126 "docs/21-2/21-2/MONROE*.dat" -o salida.xlsx
+    python batch.py -m manifest.json -o salida.xlsx --report reporte.json
+
+El manifest es un JSON con una lista de entradas:
+    [
+        {"pattern": "entrada/COFAR*.txt", "provider": "cofarsur", "account": 2285},
+        {"pattern": "entrada/KELLER", "provider": "keller"}
+    ]
+Cada "pattern" (o "path") puede ser un archivo, un patrón glob o una carpeta
+(de la que se toman los .csv, igual que al agregar una carpeta en la interfaz).
+La cuenta de keller se lee de cuentas.json en el directorio de trabajo.
+
+Con el proveedor "auto" se reconoce el proveedor y la cuenta de cada archivo por
+su contenido (en ese caso se toman todos los archivos de las carpetas):
+    python batch.py -p auto entrada/ -o salida.xlsx
+
+Con --profile se guarda además un JSON con la duración y las filas de entrada y
+salida de cada etapa de la normalización, por archivo y sumadas por proveedor:
+    python batch.py -p auto entrada/ -o salida.xlsx --profile perfil.json
+
+Con --chunksize los archivos se procesan por bloques de esa cantidad de filas y la
+salida se escribe a medida que se generan (para archivos que no entran en memoria;
+no usa la caché ni procesa en paralelo):
+    python batch.py -p monroe -a 4793126 grande.dat -o salida.xlsx --chunksize 200000
+
+El formato de la salida se elige por la ruta (o con --format): .xlsx (con estilos),
+.csv (separador ";", coma decimal y fechas DD/MM/YYYY) o una carpeta sin extensión
+(dataset Parquet particionado por droguería y mes, para procesos de BI):
+    python batch.py -p auto entrada/ -o salida.csv
+    python batch.py -p auto entrada/ -o dataset --format dataset
+La salida también puede ser una tabla de MySQL (o SQLite, para pruebas), indicada
+con una URL; los datos que faltan en ella (ej.: la contraseña) se toman de las
+variables DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME y DB_TABLE o de un .env.
+Repetir la carga actualiza las filas en lugar de duplicarlas. Con --chunksize hace
+falta --allow-errors: las filas cargadas antes de que falle un archivo quedan en la tabla.
+    python batch.py -p auto entrada/ -o mysql://usuario@servidor/compras --table notas_pedido
+    python batch.py -p auto entrada/ -o sqlite:///notas.sqlite
+Un XLSX que supera el máximo de filas de Excel continúa en otra hoja, o con
+--split-files en otro archivo (salida (2).xlsx, ...).
+
+Con --history las líneas normalizadas se guardan además en un historial local
+(SQLite) y se informan las que ya se habían procesado en otra ejecución (archivos
+reenviados o con fechas superpuestas). Con --from-history la salida se genera
+desde el historial, sin volver a procesar los archivos (-p y -a filtran por
+droguería y cuenta):
+    python batch.py -p auto entrada/ -o salida.xlsx --history
+    python batch.py --from-history -p cofarsur -o cofarsur.csv
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from controllers.file_controller import OUTPUT_SINKS, merge_and_save, output_format_for_path
+from libs.builder.builder import StreamedFiles, process_files
+from libs.cache.cache import ResultCache, DEFAULT_CACHE_DIR
+from libs.database.database import is_database_url, redact_url
+from libs.fingerprint.fingerprint import classify_files
+from libs.history.history import HistoryStore, DEFAULT_HISTORY_PATH
+from libs.instrumentation.instrumentation import configure_logging, get_logger, set_enabled, write_profile
+from libs.spill.spill import SpillFile
+
+# Proveedor que indica reconocer cada archivo por su contenido
+AUTO_PROVIDER = "auto"
+
+logger = get_logger("batch")
+
+
+def expand_pattern(pattern, extension=".csv"):
+    """
+    Expande un archivo, patrón glob o carpeta a la lista ordenada de archivos.
+    De las carpetas se toman los archivos con la extensión indicada (todos si es None).
+    """
+    if os.path.isdir(pattern):
+        return sorted(
+            os.path.join(pattern, name) for name in os.listdir(pattern)
+            if os.path.isfile(os.path.join(pattern, name)) and (extension is None or name.endswith(extension))
+        )
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+
+def build_files_info(entries):
+    """
+    Convierte las entradas del manifest (o de la línea de comandos) en la lista
+    de archivos que recibe process_files.
+
+    Parámetros:
+        entries (list[dict]): Entradas con "pattern" o "path", "provider" y "account".
+
+    Retorna:
+        list[dict]: Lista de diccionarios con "path", "provider" y "account".
+    """
+    files_info = []
+    for entry in entries:
+        pattern = entry.get("pattern") or entry.get("path")
+        if not pattern or "provider" not in entry:
+            raise ValueError(f"❌ Entrada de manifest inválida: {entry}")
+        # En minúsculas, como en process_files: así coincide con el registro de proveedores
+        provider = str(entry["provider"]).lower()
+        auto = provider == AUTO_PROVIDER
+        paths = expand_pattern(pattern, None if auto else ".csv")
+        if not paths:
+            logger.warning(f"⚠️ El patrón '{pattern}' no coincide con ningún archivo.")
+        if auto:
+            for file_info in classify_files(paths):
+                if file_info["provider"] is None:
+                    logger.warning(f"⚠️ No se reconoció el proveedor de '{file_info['path']}', se omite.")
+                    continue
+                # La cuenta indicada en la entrada tiene prioridad sobre la del archivo
+                if entry.get("account") is not None and file_info["provider"] != "keller":
+                    file_info["account"] = entry["account"]
+                files_info.append(file_info)
+            continue
+        for path in paths:
+            files_info.append({"path": path, "provider": provider, "account": entry.get("account")})
+    return files_info
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Normaliza notas de pedido sin interfaz gráfica.")
+    parser.add_argument("patterns", nargs="*", help="Archivos, patrones glob o carpetas a procesar.")
+    parser.add_argument("-p", "--provider", help="Proveedor de los archivos indicados en la línea de comandos.")
+    parser.add_argument("-a", "--account", help="Cuenta de los archivos indicados en la línea de comandos.")
+    parser.add_argument("-m", "--manifest", help="JSON con la lista de entradas a procesar.")
+    parser.add_argument("-o", "--output", required=True,
+                        help="Salida: archivo .xlsx o .csv, carpeta para el dataset o URL de la base de datos.")
+    parser.add_argument("--format", choices=list(OUTPUT_SINKS),
+                        help="Formato de la salida (por defecto, según la extensión de --output).")
+    parser.add_argument("--split-files", action="store_true",
+                        help="Con xlsx, continuar en otro archivo (y no en otra hoja) al llegar al máximo de filas.")
+    parser.add_argument("--table", help="Tabla de destino de la salida a base de datos (por defecto: notas_pedido).")
+    parser.add_argument("--report", help="Ruta del reporte JSON (por defecto: <output>.report.json, "
+                                         "o batch.report.json con una base de datos).")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo.")
+    parser.add_argument("--no-cache", action="store_true", help="No usar la caché de resultados.")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directorio de la caché de resultados.")
+    parser.add_argument("--allow-errors", action="store_true",
+                        help="Guardar la salida aunque fallen algunos archivos.")
+    parser.add_argument("--chunksize", type=int,
+                        help="Procesar por bloques de esta cantidad de filas escribiendo la salida a medida que avanza.")
+    parser.add_argument("--history", nargs="?", const=DEFAULT_HISTORY_PATH,
+                        help=f"Guardar las líneas en este historial (SQLite) e informar las repetidas "
+                             f"(por defecto: {DEFAULT_HISTORY_PATH}).")
+    parser.add_argument("--from-history", action="store_true",
+                        help="Generar la salida desde el historial (filtrado con -p y -a) sin procesar archivos.")
+    parser.add_argument("--profile", help="Guardar en este JSON el tiempo de cada etapa de la normalización.")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Nivel de los mensajes (DEBUG muestra además cada etapa).")
+    args = parser.parse_args(argv)
+    if args.from_history:
+        if args.patterns or args.manifest:
+            parser.error("--from-history no procesa archivos: no indique patrones ni manifest.")
+        args.history = args.history or DEFAULT_HISTORY_PATH
+    elif not args.patterns and not args.manifest:
+        parser.error("Debe indicar patrones de archivos o un manifest.")
+    if args.patterns and not args.provider:
+        parser.error("Debe indicar --provider para los archivos de la línea de comandos.")
+    if not is_database_url(args.output):
+        args.output = os.path.normpath(args.output)
+    args.format = args.format or output_format_for_path(args.output)
+    if args.split_files and args.format != "xlsx":
+        parser.error("--split-files solo se puede usar con la salida xlsx.")
+    if args.table and args.format != "database":
+        parser.error("--table solo se puede usar con la salida a base de datos.")
+    # Las repeticiones de una línea se cuentan por archivo completo, no por bloque
+    if args.history and args.chunksize:
+        parser.error("--history no se puede usar con --chunksize.")
+    # Los lotes ya cargados en la base no se pueden retirar si después falla un archivo
+    if args.format == "database" and args.chunksize and not args.allow_errors:
+        parser.error("--chunksize con una base de datos requiere --allow-errors: si falla un archivo, "
+                     "las filas ya cargadas no se pueden deshacer.")
+    if not args.report:
+        args.report = "batch.report.json" if is_database_url(args.output) else f"{args.output}.report.json"
+    # Validar las carpetas antes de procesar: un error al guardar llegaría recién al final
+    for option, path in (("--output", args.output), ("--report", args.report), ("--profile", args.profile)):
+        if not path or is_database_url(path):
+            continue
+        folder = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(folder):
+            parser.error(f"La carpeta de {option} no existe: '{folder}'.")
+    return args
+
+
+def output_options(args):
+    """
+    Opciones de la salida elegida para merge_and_save y OUTPUT_SINKS.
+    """
+    if args.split_files:
+        return {"split_files": True}
+    return {"table": args.table} if args.table else {}
+
+
+def remove_output(path, existed):
+    """
+    Borra una salida incompleta. Una carpeta que ya tenía archivos no se borra (el
+    dataset no se escribe en ella).
+    """
+    if os.path.isdir(path):
+        if not existed:
+            shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+def process_to_output(files_info, args):
+    """
+    Procesa los archivos completos (en paralelo y con caché) y guarda la salida.
+
+    Retorna:
+        tuple[list[dict], bool, float]: Resultados por archivo (con "rows"), si se
+        guardó la salida y segundos empleados en guardarla.
+    """
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    history = HistoryStore(args.history) if args.history else None
+    # Cada archivo se guarda en disco apenas se procesa; la salida se escribe leyéndolo por bloques
+    with SpillFile() as spill:
+        try:
+            results = process_files(files_info, max_workers=args.workers, cache=cache, spill=spill, history=history)
+
+            errors = [result for result in results if result["error"] is not None]
+            for result in errors:
+                logger.error(f"❌ {result['path']}: {result['error']}")
+
+            saved = False
+            save_seconds = 0.0
+            if len(spill) and (not errors or args.allow_errors):
+                start = time.perf_counter()
+                saved = merge_and_save(spill, args.output, args.format, **output_options(args))
+                save_seconds = time.perf_counter() - start
+            # Las líneas quedan en el historial solo si se guardó la salida
+            if saved and history is not None:
+                history.commit()
+        finally:
+            if history is not None:
+                history.close()
+    return results, saved, save_seconds
+
+
+def stream_to_output(files_info, args):
+    """
+    Procesa los archivos por bloques y escribe cada bloque en la salida apenas se
+    genera. Si algún archivo falla (y no se indicó --allow-errors) se borra la
+    salida parcial.
+
+    Retorna:
+        tuple[list[dict], bool, float]: Resultados por archivo, si se guardó la
+        salida y segundos empleados (procesamiento y escritura juntos).
+    """
+    results = []
+    existed = os.path.isdir(args.output) and bool(os.listdir(args.output))
+    start = time.perf_counter()
+    try:
+        sink = OUTPUT_SINKS[args.format]
+        rows = sink(StreamedFiles(files_info, args.chunksize, results), args.output, **output_options(args))
+    except Exception as e:
+        logger.error(f"❌ Error al guardar el archivo: {str(e)}")
+        rows = 0
+    save_seconds = time.perf_counter() - start
+
+    errors = [result for result in results if result["error"] is not None]
+    for result in errors:
+        logger.error(f"❌ {result['path']}: {result['error']}")
+    saved = rows > 0 and (not errors or args.allow_errors)
+    if not saved:
+        remove_output(args.output, existed)
+    else:
+        logger.info(f"✅ Archivo guardado exitosamente en {args.output}")
+    return results, saved, save_seconds
+
+
+def export_history(args):
+    """
+    Guarda la salida con las líneas del historial (filtradas por --provider y
+    --account), sin procesar archivos.
+
+    Retorna:
+        int: Código de salida (0 si se guardó la salida).
+    """
+    with HistoryStore(args.history) as history:
+        lines = history.lines(drogueria=args.provider.lower() if args.provider else None, cuenta=args.account)
+        if not lines.rows:
+            logger.error(f"❌ No hay líneas en el historial '{args.history}' para la salida.")
+            return 1
+        saved = merge_and_save(lines, args.output, args.format, **output_options(args))
+    return 0 if saved else 1
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging(args.log_level)
+    # Sin perfil no hace falta registrar las etapas (salvo para mostrarlas con DEBUG)
+    set_enabled(bool(args.profile) or args.log_level == "DEBUG")
+    started_at = datetime.now()
+    if args.from_history:
+        return export_history(args)
+
+    entries = []
+    if args.manifest:
+        with open(args.manifest, "r", encoding="utf-8") as f:
+            entries.extend(json.load(f))
+    # Las cuentas de cuentas.json son numéricas: mantener el mismo tipo en la salida
+    account = int(args.account) if args.account and args.account.isdigit() else args.account
+    for pattern in args.patterns:
+        entries.append({"pattern": pattern, "provider": args.provider, "account": account})
+
+    files_info = build_files_info(entries)
+    if not files_info:
+        logger.error("❌ No se encontraron archivos para procesar.")
+        return 2
+
+    if args.chunksize:
+        results, saved, save_seconds = stream_to_output(files_info, args)
+    else:
+        results, saved, save_seconds = process_to_output(files_info, args)
+    errors = [result for result in results if result["error"] is not None]
+
+    report = {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "output": (redact_url(args.output) if is_database_url(args.output) else os.path.abspath(args.output))
+        if saved else None,
+        "total_files": len(results),
+        "failed_files": len(errors),
+        "total_rows": sum(result["rows"] for result in results if result["error"] is None),
+        "duplicate_rows": sum((result.get("history") or {}).get("duplicadas", 0) for result in results),
+        "save_seconds": round(save_seconds, 3),
+        "files": [
+            {
+                "path": result["path"],
+                "provider": result["provider"],
+                "account": result["account"],
+                "rows": result["rows"],
+                "seconds": round(result["seconds"], 3),
+                "cached": result.get("cached", False),
+                "history": result.get("history"),
+                "error": result["error"],
+            }
+            for result in results
+        ],
+    }
+    try:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    except OSError as e:
+        logger.error(f"❌ No se pudo guardar el reporte en {args.report}: {str(e)}")
+        return 1
+    logger.info(f"📄 Reporte guardado en {args.report}")
+    if args.profile:
+        write_profile(results, args.profile)
+
+    return 0 if saved and not errors else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
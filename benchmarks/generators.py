@@ -0,0 +1,205 @@
+"""
+Generadores de archivos sintéticos con el formato de cada droguería.
+
+Cada generador escribe un archivo (o una carpeta, en el caso de keller) con
+aproximadamente `rows` líneas de detalle, agrupadas en facturas con su cabecera,
+imitando los archivos de ejemplo de docs/FORMATOS, docs/21-2 y docs/KELLER.
+"""
+import os
+import random
+from datetime import date, timedelta
+
+# Cantidad de líneas que se escriben de una vez
+WRITE_BATCH = 10000
+
+DESCRIPTIONS = [
+    "BAGOVIT SHA PLASMA VEG REGEN X 350",
+    "COLGATE PASTA DENTAL TOTAL 12 ORIGINAL X",
+    "DOVE JABON LIQUIDO MANOS CUIDA Y PROTEG",
+    "GILLETTE CART MACH 3 SENSITIVE X 4",
+    "ESOMEPRA 20MG CAPSU. X7 FLOWPACK X20",
+    "TACRODERM 0.03% UNGUE.DERM. X10G",
+    "PLATSUL A CR X 350 GR",
+    "REM CHOBET 15 MG CPR X 50",
+]
+
+
+def _invoices(rows, lines_per_invoice, seed):
+    """
+    Reparte `rows` líneas de detalle en facturas y retorna, por factura,
+    (número de factura, fecha, cantidad de líneas).
+    """
+    rng = random.Random(seed)
+    start_date = date(2025, 2, 1)
+    invoice_number = 4300000
+    remaining = rows
+    while remaining > 0:
+        n_lines = min(remaining, rng.randint(1, lines_per_invoice * 2 - 1))
+        invoice_number += 1
+        yield invoice_number, start_date + timedelta(days=rng.randint(0, 27)), n_lines
+        remaining -= n_lines
+
+
+def _details(rng):
+    barcode = 7790000000000 + rng.randint(0, 9999999)
+    description = rng.choice(DESCRIPTIONS)
+    quantity = rng.randint(1, 60)
+    price = rng.randint(1000, 9000000)  # Centavos
+    iva = rng.choice((0, 21))
+    return barcode, description, quantity, price, iva
+
+
+def _write_lines(path, lines, encoding="utf-8", header=None):
+    with open(path, "w", encoding=encoding, newline="") as f:
+        if header is not None:
+            f.write(header + "\n")
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= WRITE_BATCH:
+                f.write("\n".join(batch) + "\n")
+                batch = []
+        if batch:
+            f.write("\n".join(batch) + "\n")
+
+
+def generate_cofarsur(path, rows, lines_per_invoice=40, seed=0):
+    """
+    Archivo COFAR de texto delimitado por tabulación con registros 'C' (16 campos)
+    y 'D' (17 campos).
+    """
+    rng = random.Random(seed)
+
+    def lines():
+        for number, invoice_date, n_lines in _invoices(rows, lines_per_invoice, seed):
+            invoice = f"0307A{number:08d}"
+            yield "\t".join([
+                "C", "0000002285", "F", "A", invoice, "DROGUERIA NUEVA VILLA".ljust(35), "000", " " * 6,
+                "000000006013489", "000000000000000", "0000001262834", "0000000000000", "0000000039526",
+                "000000007315849", invoice_date.strftime("%Y%m%d"), "0" * 28,
+            ])
+            for _ in range(n_lines):
+                barcode, description, quantity, price, iva = _details(rng)
+                yield "\t".join([
+                    "D", "0000002285", "F", invoice, "NM", "0     ", f"{barcode}".ljust(18), description.ljust(40)[:40],
+                    "0000", "   ", "S", "1" if iva else "0", f"{quantity:06d}", f"{price:013d}",
+                    f"{price * 2:011d}", f"{price * quantity:015d}", "0" * 44,
+                ])
+
+    _write_lines(path, lines())
+    return path
+
+
+MONROE_HEADER = [
+    "TIPO LINEA", "TIPO", "LETRA", "NUMERO FORMATEADO", "FECHA", "CAEA NRO", "CAEA VTO", "COD CLIENTE", "CUIT",
+    "RAZON SOCIAL", "RESUMEN", "TIPO PEDIDO", "CODIGO BARRA", "DESCRIPCION", "PCIO VTA PUB",
+    "BASE EXCENTA+GRAVADO", "IVA", "OTROS IMPUESTOS", "IMPORTE TOTAL", "UNIDADES", "LINEAS", "CLASIF PRODUCTO",
+    "LABORATORIO", "CONDICION IVA", "PORC IVA", "PCIO UNITARIO",
+]
+
+
+def generate_monroe(path, rows, lines_per_invoice=40, seed=0):
+    """
+    Archivo MONROE .dat delimitado por tabulación con líneas 'Cabecera' y 'Detalle'.
+    """
+    rng = random.Random(seed)
+
+    def lines():
+        for number, invoice_date, n_lines in _invoices(rows, lines_per_invoice, seed):
+            invoice = f"1114-{number:08d}"
+            yield "\t".join([
+                "Cabecera", "FC", "A", invoice, invoice_date.strftime("%d/%m/%Y"),
+                "C.A.E.A. Nro.: 35045996448201", "Fecha de Vencimiento: 15/02/2025", "4793126", "30-70882226-0",
+                "NUEVA VILLA SRL", str(n_lines), "OFERTA TRANSFER ", "", "", "", "1320032.49", "0", "9900.25",
+                "1329932.74", "67", str(n_lines), "", "", "", "", "",
+            ])
+            for _ in range(n_lines):
+                barcode, description, quantity, price, iva = _details(rng)
+                yield "\t".join([
+                    "Detalle", "FC", "A", invoice, "", "", "", "", "", "", "", "", str(barcode), description,
+                    f"{price / 50:.2f}", f"{price / 100:.2f}", "0", "0", f"{price * quantity / 100:.2f}",
+                    str(quantity), "", "Eticos", "LABORATORIO SA", "Producto Exento", str(iva), f"{price / 100:.4f}",
+                ])
+
+    _write_lines(path, lines(), header="\t".join(MONROE_HEADER))
+    return path
+
+
+SUIZO_HEADER = (
+    '"Tipo de Registro","Tipo de Comprobante","Número de Comprobante","Código comprob AFIP","Fecha comprobante",'
+    '"CUIT Cliente","Código de Cliente","Importe Neto Gravado","Importe Exento / no gravado","Importe Iva",'
+    '"Importe RG3337","Importe Ing. Bru.","Importe Impuestos Internos","Importe Total","Tipo Cód. AFIP",'
+    '"Autorizacion AFIP","Venc. Autoriz AFIP","CUIT facturador",Sucursal,"Cantidad de Unidades",'
+    '"Cantidad de Lineas","Tipo de Comprobante","Número de Comprobante","Código de Sección",Alimento,'
+    '"Código Producto",CodBarra,Alfabeta,"Descripción del Producto","Alicuota de IVA %",Cantidad,'
+    '"Precio Unitario","Precio Publico","Numero Pedido",Concepto,"Base imponible","Alicuota %",'
+    '"Importe retenido",Provincia,"Territorio impositivo"'
+)
+
+
+def generate_suizo(path, rows, lines_per_invoice=40, seed=0):
+    """
+    Archivo SUIZO .csv (latin1) con registros 'C' de cabecera, 'D' de detalle e 'I' de impuestos.
+    """
+    rng = random.Random(seed)
+
+    def lines():
+        for number, invoice_date, n_lines in _invoices(rows, lines_per_invoice, seed):
+            invoice = f"A0418{number:08d}"
+            fecha = f"{invoice_date.day}{invoice_date.strftime('%m%Y')}"  # Ej.: 4022025 o 18022025
+            common = [
+                invoice, "01", fecha, "30-70882226-0", "00107095", "000000151795.38", "000000000000.00",
+                "000000031877.03", "000000004553.86", "000000001138.47", "000000000000.00", "000000189364.74",
+                "C.A.E.A.", "35041254521287", fecha, "30-51696843-1", "11", "000060", f"{n_lines:06d}",
+            ]
+            yield ",".join(["C", "FAC"] + common)
+            for _ in range(n_lines):
+                barcode, description, quantity, price, iva = _details(rng)
+                yield ",".join(["D", "FAC"] + common + [
+                    "FAC", invoice, "NM", "N", "0008111455", str(barcode), "0000000000", description,
+                    f"{iva:.2f}", f"{quantity:06d}", f"{price / 100:013.4f}", f"{price / 50:013.4f}", "000014618443",
+                ])
+            yield ",".join(["I", "FAC"] + common + [""] * 13 + [
+                '"PERCEPCION CBA                "', "000000151795.38", "000.75", "0001138.47",
+                '"CORDOBA                       "', "P",
+            ])
+
+    _write_lines(path, lines(), encoding="latin1", header=SUIZO_HEADER)
+    return path
+
+
+KELLER_HEADER = "Fecha;CodBarra;Producto;Cantidad;Precio Público;Precio Unit.;Importe;Faltas"
+
+
+def _ar_number(value):
+    """Formatea un número al estilo argentino: 1.234,56"""
+    return f"{value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def generate_keller(folder, rows, lines_per_invoice=40, seed=0):
+    """
+    Carpeta KELLER con un .csv (utf-8-sig, separado por ';') por factura,
+    nombrado con el número de comprobante (ej.: A001808244238.csv).
+    """
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    for number, invoice_date, n_lines in _invoices(rows, lines_per_invoice, seed):
+        lines = []
+        for _ in range(n_lines):
+            barcode, description, quantity, price, _ = _details(rng)
+            unit = price / 100
+            lines.append(";".join([
+                f"{invoice_date.day}/{invoice_date.month}/{invoice_date.year}", str(barcode), description,
+                f"{quantity:05d}", _ar_number(unit * 1.5), _ar_number(unit), _ar_number(unit * quantity), "00000", "",
+            ]))
+        _write_lines(os.path.join(folder, f"A0018{number:08d}.csv"), lines, encoding="utf-8-sig", header=KELLER_HEADER)
+    return folder
+
+
+# Generador y extensión por proveedor
+GENERATORS = {
+    "cofarsur": (generate_cofarsur, ".txt"),
+    "monroe": (generate_monroe, ".dat"),
+    "suizo": (generate_suizo, ".csv"),
+    "keller": (generate_keller, ""),
+}
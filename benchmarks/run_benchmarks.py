@@ -0,0 +1,225 @@
+"""
+Benchmark de los normalizadores con datos sintéticos.
+
+Mide el tiempo de cada etapa de process_cofarsur / process_monroe / process_suizo /
+process_keller, de merge_and_save y de style_excel_file, y el pico de memoria de cada
+pipeline. Opcionalmente compara contra un baseline guardado para detectar regresiones.
+
+Ejemplos:
+    python -m benchmarks.run_benchmarks --rows 1000 100000
+    python -m benchmarks.run_benchmarks --rows 100000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --rows 100000 --baseline benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generators import GENERATORS
+from controllers.file_controller import merge_and_save, style_excel_file
+from libs.builder.progress import StageReporter, active_reporter
+from libs.normalizers.cofarsur import cofarsur
+from libs.normalizers.keller import keller
+from libs.normalizers.monroe import monroe
+from libs.normalizers.suizo import suizo
+
+# Función de cada proveedor
+PROVIDERS = {
+    "cofarsur": cofarsur.process_cofarsur,
+    "monroe": monroe.process_monroe,
+    "suizo": suizo.process_suizo,
+    "keller": keller.process_keller,
+}
+
+# Máximo de filas de una hoja de Excel (sin contar la cabecera)
+EXCEL_MAX_ROWS = 1048575
+
+
+@contextlib.contextmanager
+def timed_stages(timings):
+    """
+    Activa un reporter que acumula en `timings` la duración de cada etapa que
+    informan los normalizadores con report_stage.
+    """
+    last = {"seconds": 0.0}
+
+    def emit(event):
+        timings[event["stage"]] = timings.get(event["stage"], 0.0) + event["seconds"] - last["seconds"]
+        last["seconds"] = event["seconds"]
+
+    with active_reporter(StageReporter(0, emit)):
+        yield
+
+
+def input_paths(provider, path):
+    if provider == "keller":
+        return [os.path.join(path, name) for name in sorted(os.listdir(path))]
+    return [path]
+
+
+def run_pipeline(provider, path):
+    """
+    Ejecuta el pipeline del proveedor sobre el archivo (o carpeta) y retorna los DataFrames.
+    La salida por consola del pipeline se descarta para no medir su impresión.
+    """
+    process_function = PROVIDERS[provider]
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [process_function(file_path, provider, 1) for file_path in input_paths(provider, path)]
+
+
+def peak_memory_mb(function, *args):
+    """
+    Ejecuta la función con tracemalloc activo y retorna el pico de memoria en MB.
+    """
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            function(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def bench_provider(provider, path, repeat, memory=True):
+    best = None
+    for _ in range(repeat):
+        timings = {}
+        with timed_stages(timings):
+            start = time.perf_counter()
+            dfs = run_pipeline(provider, path)
+            total = time.perf_counter() - start
+        if best is None or total < best["total"]:
+            best = {"total": total, "stages": timings}
+
+    rows_out = sum(len(df) for df in dfs)
+    return dfs, {
+        "rows_out": rows_out,
+        "total": best["total"],
+        "rows_per_sec": rows_out / best["total"] if best["total"] else None,
+        # Pasada separada para la memoria: tracemalloc hace más lento el pipeline
+        "peak_mb": peak_memory_mb(run_pipeline, provider, path) if memory else None,
+        "stages": best["stages"],
+    }
+
+
+def bench_export(dfs, workdir, memory=True):
+    output_path = os.path.join(workdir, "salida.xlsx")
+    stages = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        merge_and_save(dfs, output_path)
+        stages["merge_and_save"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        style_excel_file(output_path)
+        stages["style_excel_file"] = time.perf_counter() - start
+    return {
+        "rows_out": sum(len(df) for df in dfs),
+        "total": sum(stages.values()),
+        "peak_mb": peak_memory_mb(merge_and_save, dfs, output_path) if memory else None,
+        "stages": stages,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compara los tiempos y la memoria con el baseline y retorna la lista de regresiones.
+    """
+    regressions = []
+    for case, result in results.items():
+        base = baseline.get(case)
+        if base is None:
+            continue
+        metrics = [("total", result["total"], base["total"])]
+        if result["peak_mb"] is not None and base.get("peak_mb"):
+            metrics.append(("peak_mb", result["peak_mb"], base["peak_mb"]))
+        metrics += [
+            (f"stage {stage}", seconds, base["stages"][stage])
+            for stage, seconds in result["stages"].items() if stage in base.get("stages", {})
+        ]
+        for name, current, previous in metrics:
+            if previous and current > previous * (1 + threshold):
+                regressions.append(f"{case} {name}: {previous:.3f} -> {current:.3f} (+{(current / previous - 1):.0%})")
+    return regressions
+
+
+def print_result(case, result):
+    peak = f"{result['peak_mb']:.1f} MB" if result["peak_mb"] is not None else "no medido"
+    print(f"\n== {case}: {result['rows_out']} filas, {result['total']:.3f}s, pico {peak}")
+    for stage, seconds in sorted(result["stages"].items(), key=lambda item: -item[1]):
+        print(f"   {stage:<28} {seconds:9.3f}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de los normalizadores con datos sintéticos.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000],
+                        help="Cantidades de líneas de detalle a generar (de 1k a 5M).")
+    parser.add_argument("--providers", nargs="+", default=list(PROVIDERS), choices=list(PROVIDERS))
+    parser.add_argument("--repeat", type=int, default=1, help="Repeticiones por caso (se toma la más rápida).")
+    parser.add_argument("--no-export", action="store_true", help="No medir merge_and_save ni style_excel_file.")
+    parser.add_argument("--no-memory", action="store_true", help="No medir el pico de memoria (más rápido).")
+    parser.add_argument("--workdir", help="Carpeta para los archivos generados (por defecto, una temporal).")
+    parser.add_argument("--output", help="Guardar los resultados en este JSON.")
+    parser.add_argument("--save-baseline", help="Guardar los resultados como baseline en este JSON.")
+    parser.add_argument("--baseline", help="Comparar contra este baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Incremento relativo a partir del cual se reporta una regresión (0.2 = 20%%).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = args.workdir or tmpdir
+        os.makedirs(workdir, exist_ok=True)
+        for rows in args.rows:
+            all_dfs = []
+            for provider in args.providers:
+                generator, extension = GENERATORS[provider]
+                path = os.path.join(workdir, f"{provider}_{rows}{extension}")
+                if not os.path.exists(path):
+                    generator(path, rows)
+                dfs, result = bench_provider(provider, path, args.repeat, not args.no_memory)
+                result["rows_in"] = rows
+                results[f"{provider}@{rows}"] = result
+                print_result(f"{provider}@{rows}", result)
+                all_dfs.extend(dfs)
+
+            total_rows = sum(len(df) for df in all_dfs)
+            if args.no_export:
+                continue
+            if total_rows > EXCEL_MAX_ROWS:
+                print(f"\n== export@{rows}: omitido ({total_rows} filas superan el límite de Excel)")
+                continue
+            results[f"export@{rows}"] = bench_export(all_dfs, workdir, not args.no_memory)
+            print_result(f"export@{rows}", results[f"export@{rows}"])
+            del all_dfs
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            print(f"\n📄 Resultados guardados en {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("\n❌ Regresiones respecto del baseline:")
+            for regression in regressions:
+                print(f"   {regression}")
+            return 1
+        print("\n✅ Sin regresiones respecto del baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
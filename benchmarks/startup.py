@@ -0,0 +1,80 @@
+"""
+Mide el tiempo de arranque de la interfaz: desde que main.py empieza a ejecutarse
+hasta que la ventana está visible, y el tiempo total del proceso (incluye el
+intérprete). Cada medición se hace en un proceso nuevo para que sea un arranque en frío
+de los módulos de Python.
+
+También verifica que pandas no se cargue antes de mostrar la ventana.
+
+Ejemplos:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --repeat 10 --output arranque.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_PATH = os.path.join(BASE_DIR, "main.py")
+
+
+def measure_once(timeout):
+    """
+    Ejecuta main.py --measure-startup y retorna su medición más el tiempo total del proceso.
+    """
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")  # Sin pantalla (servidores de CI)
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, MAIN_PATH, "--measure-startup"],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True, timeout=timeout,
+    )
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"❌ main.py terminó con código {completed.returncode}:\n{completed.stderr}")
+    # La medición es la última línea JSON de la salida
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith("{"):
+            return dict(json.loads(line), process_seconds=wall)
+    raise RuntimeError(f"❌ main.py no informó la medición de arranque:\n{completed.stdout}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el tiempo de arranque de la interfaz.")
+    parser.add_argument("--repeat", type=int, default=5, help="Cantidad de arranques a medir.")
+    parser.add_argument("--timeout", type=float, default=60, help="Segundos máximos por arranque.")
+    parser.add_argument("--output", help="Guardar los resultados en este JSON.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    runs = [measure_once(args.timeout) for _ in range(args.repeat)]
+
+    result = {
+        "runs": runs,
+        "startup_min": min(run["startup_seconds"] for run in runs),
+        "startup_median": statistics.median(run["startup_seconds"] for run in runs),
+        "process_median": statistics.median(run["process_seconds"] for run in runs),
+        "pandas_loaded": any(run["pandas_loaded"] for run in runs),
+    }
+    print(f"== arranque: ventana en {result['startup_median']:.3f}s (mínimo {result['startup_min']:.3f}s), "
+          f"proceso {result['process_median']:.3f}s, {args.repeat} arranques")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"📄 Resultados guardados en {args.output}")
+
+    if result["pandas_loaded"]:
+        print("❌ pandas se cargó antes de mostrar la ventana.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,180 +1,595 @@
+import numpy as np
 import pandas as pd
 import csv, os, sys
 import json
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+from openpyxl.utils import get_column_letter
+from libs.database.database import is_database_url, load_frames, redact_url
+from libs.dates.dates import parse_dates
+from libs.schema.schema import concat_frames
+from libs.spill.spill import iter_blocks
+from libs.sniffer.sniffer import sniff_file
+from libs.instrumentation.instrumentation import get_logger
 
-def read_file(filepath):
+logger = get_logger(__name__)
+
+
+def _sniff(filepath):
+    """
+    Detecta el encoding y el delimitador (tabulación, coma, punto y coma, barra vertical
+    o espacio) leyendo solo el comienzo del archivo.
+
+    Retorna:
+        FileFormat | None: Formato detectado, o None si no se pudo determinar el delimitador.
+    """
+    detected = sniff_file(filepath)
+    if detected.delimiter is None:
+        logger.error(f"Error: No se pudo determinar un delimitador válido en '{filepath}'.")
+        return None
+    if detected.delimiter != "\t":
+        logger.debug(f"El archivo '{filepath}' no está delimitado por tabulación, se usa '{detected.delimiter}'.")
+    return detected
+
+
+def _read_options(detected, usecols, dtype):
+    """
+    Opciones de read_csv para parsear el archivo en una sola pasada con el motor C.
+    Los tipos se indican por posición (solo los de columnas que existen en el archivo).
+    """
+    if dtype:
+        dtype = {i: t for i, t in dtype.items() if i < detected.columns}
+    return dict(delimiter=detected.delimiter, quoting=csv.QUOTE_NONE, encoding=detected.encoding,
+                on_bad_lines='skip', usecols=usecols, dtype=dtype or None, engine="c")
+
+
+def _clean_columns(df):
+    # Limpiar los nombres de columna para evitar problemas con espacios en blanco
+    df.columns = df.columns.str.replace('"', '').str.strip()
+    return df
+
+
+def read_file(filepath, usecols=None, dtype=None):
     """
     Lee archivos .dat, .txt o .csv con delimitadores como tabulación, coma, punto y coma, barra vertical o espacio.
+    El encoding y el delimitador se detectan con el comienzo del archivo (ver sniff_file).
     
     Parámetros:
         filepath (str): Ruta del archivo a procesar.
+        usecols (list[int] | None): Posiciones de las columnas a leer. Si es None se leen todas.
+        dtype (dict[int, type] | None): Tipos explícitos por posición de columna.
 
     Retorna:
         pandas.DataFrame: Contenido del archivo en un DataFrame si la lectura es exitosa.
                          En caso de error, retorna un DataFrame vacío.
     """
     try:
-        # Primero intentamos leer usando tabulación, con encoding "latin1"
-        df = pd.read_csv(filepath, delimiter="\t", quoting=csv.QUOTE_NONE, encoding="latin1", on_bad_lines='skip')
-        
-        # Si se lee como una sola columna, probablemente el delimitador es otro
-        if df.shape[1] == 1:
-            print(f"El archivo '{filepath}' no parece estar delimitado por tabulación. Detectando delimitador...")
-            with open(filepath, 'r', encoding="latin1") as f:
-                first_line = f.readline()
-            delimiters = [",", ";", "|", " "]
-            detected_delimiter = None
-            for delim in delimiters:
-                if delim in first_line:
-                    detected_delimiter = delim
-                    break
-            if not detected_delimiter:
-                print(f"Error: No se pudo determinar un delimitador válido en '{filepath}'.")
-                return pd.DataFrame()
-            # Leer con el delimitador detectado (por ejemplo, la coma)
-            df = pd.read_csv(filepath, delimiter=detected_delimiter, quoting=csv.QUOTE_NONE, encoding="latin1", on_bad_lines='skip')
-            print(f"Archivo '{filepath}' leído correctamente con delimitador detectado: '{detected_delimiter}'")
-        
-        # Limpiar los nombres de columna para evitar problemas con espacios en blanco
+        detected = _sniff(filepath)
+        if detected is None:
+            return pd.DataFrame()
+
+        # Leer el archivo una sola vez desde el disco, solo con las columnas necesarias
+        df = pd.read_csv(filepath, **_read_options(detected, usecols, dtype))
+
         if not df.empty:
-            df.columns = df.columns.str.replace('"', '').str.strip()
+            df = _clean_columns(df)
         
         return df
 
     except Exception as e:
-        print(f"Error al leer el archivo '{filepath}': {str(e)}")
+        logger.error(f"Error al leer el archivo '{filepath}': {str(e)}")
         return pd.DataFrame()
 
 
+def read_file_chunks(filepath, chunksize, usecols=None, dtype=None):
+    """
+    Igual que read_file, pero lee el archivo por bloques de `chunksize` filas
+    para no cargarlo entero en memoria.
 
+    Parámetros:
+        filepath (str): Ruta del archivo a procesar.
+        chunksize (int): Cantidad de filas por bloque.
+        usecols (list[int] | None): Posiciones de las columnas a leer. Si es None se leen todas.
+        dtype (dict[int, type] | None): Tipos explícitos por posición de columna.
+
+    Retorna:
+        Iterator[pd.DataFrame]: Bloques del archivo, con las mismas columnas que read_file.
 
-def select_columns(df, selected_columns):
+    Lanza:
+        ValueError: Si no se pudo determinar el delimitador.
     """
-    Selecciona columnas específicas de un DataFrame basado en índices.
+    detected = _sniff(filepath)
+    if detected is None:
+        raise ValueError(f"❌ No se pudo determinar un delimitador válido en '{filepath}'.")
+
+    reader = pd.read_csv(filepath, chunksize=chunksize, **_read_options(detected, usecols, dtype))
+    with reader:
+        for chunk in reader:
+            yield _clean_columns(chunk)
+
+
+# Máximo de filas de datos por hoja de Excel (sin contar la cabecera)
+EXCEL_MAX_ROWS = 1048575
+
+
+def merge_and_save(files_data, output_path, output_format=None, **options):
+    """
+    Une múltiples DataFrames y los guarda con el formato de salida indicado (por defecto,
+    el que corresponde a la extensión de output_path: ver output_format_for_path).
+    Además, valida que la cantidad de filas escritas sea igual a la suma de filas de cada DataFrame.
+
+    Los DataFrames no se concatenan en uno solo: se escriben por bloques (ver iter_blocks),
+    así que con un SpillFile la memoria queda acotada a un bloque, sin importar el total.
 
     Parámetros:
-        df (pd.DataFrame): DataFrame original.
-        selected_columns (list): Índices de las columnas a extraer.
+        files_data (Iterable[pd.DataFrame]): DataFrames a combinar, en orden: una lista, un
+            SpillFile, un HistoryLines o un generador (que se recorre una sola vez).
+        output_path (str): Ruta donde guardar el archivo (o la carpeta, para "dataset").
+        output_format (str | None): Formato de salida: "xlsx", "csv", "dataset" o "database"
+            (ver OUTPUT_SINKS).
+        **options: Opciones de la salida (ej.: split_files=True para "xlsx").
 
     Retorna:
-        pd.DataFrame: DataFrame con solo las columnas seleccionadas.
+        bool: True si el archivo se guardó correctamente y con todas las filas.
     """
     try:
-        if df.empty:
-            raise ValueError("❌ Error: El DataFrame está vacío, no se pueden seleccionar columnas.")
+        output_format = output_format or output_format_for_path(output_path)
+        if output_format not in OUTPUT_SINKS:
+            raise ValueError(f"❌ Formato de salida desconocido: '{output_format}'. Opciones: {list(OUTPUT_SINKS)}")
 
-        # Verificar si las columnas existen en el DataFrame
-        max_index = df.shape[1] - 1  # Último índice válido
-        for col in selected_columns:
-            if col > max_index:
-                raise IndexError(f"❌ Error: La columna '{col}' no existe en el DataFrame (máximo índice: {max_index}).")
+        # Calcular el total esperado de filas sumando la cantidad de filas de cada DataFrame.
+        # SpillFile (y HistoryLines) ya conocen el total: no hace falta recorrerlos
+        counted = None
+        if hasattr(files_data, "rows"):
+            total_expected_rows = files_data.rows
+        elif iter(files_data) is files_data:
+            # Un generador se recorre una sola vez: las filas se cuentan al pasar a la salida
+            counted = [0]
+            files_data = _count_rows(files_data, counted)
+        else:
+            total_expected_rows = sum(len(df) for df in files_data)
 
-        df_selected = df.iloc[:, selected_columns]
-        return df_selected
+        actual_rows = OUTPUT_SINKS[output_format](files_data, output_path, **options)
+        if counted is not None:
+            total_expected_rows = counted[0]
+        logger.debug(f"Total esperado de filas: {total_expected_rows}")
+        logger.debug(f"Total de filas escritas: {actual_rows}")
 
+        # Validar la cantidad de filas.
+        if actual_rows != total_expected_rows:
+            logger.error(f"❌ Se esperaban {total_expected_rows} filas, pero se obtuvieron {actual_rows}.")
+            return False
+
+        destination = redact_url(output_path) if output_format == "database" else output_path
+        logger.info(f"✅ Archivo guardado exitosamente en {destination}")
+        return True
     except Exception as e:
-        raise RuntimeError(f"❌ Error al seleccionar columnas: {str(e)}")
+        logger.error(f"❌ Error al guardar el archivo: {str(e)}")
+        return False
+
 
+def _count_rows(frames, counted):
+    # Deja pasar los DataFrames sumando sus filas en counted[0]
+    for df in frames:
+        if df is not None:
+            counted[0] += len(df)
+        yield df
 
 
-def add_user_columns(df, provider, account):
+def output_format_for_path(output_path):
     """
-    Añade dos columnas con datos fijos (Proveedor y Cuenta) a un DataFrame.
+    Retorna el formato de salida que corresponde a la ruta: "database" para la URL de
+    una base de datos, "csv" para .csv, "dataset" para una ruta sin extensión (una
+    carpeta) y "xlsx" para el resto.
+    """
+    if is_database_url(output_path):
+        return "database"
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    return "xlsx" if extension else "dataset"
 
-    Parámetros:
-        df (pd.DataFrame): DataFrame procesado.
-        provider (str): Nombre del proveedor.
-        account (str): Nombre de la cuenta.
 
-    Retorna:
-        pd.DataFrame: DataFrame con las nuevas columnas añadidas.
+def _output_blocks(frames):
     """
-    df["Proveedor"] = provider
-    df["Cuenta"] = account
+    Bloques de la salida (ver iter_blocks), con la columna "Fecha" como datetime.
+    Si no hay filas, un DataFrame vacío (solo las cabeceras).
+    """
+    empty = True
+    for block in iter_blocks(frames):
+        empty = False
+        yield _with_dates(block)
+    if empty:
+        yield concat_frames([])
+
+
+def _with_dates(df):
+    # Asegurarse de que la columna "Fecha" sea de tipo datetime
+    if "Fecha" in df.columns:
+        return df.assign(Fecha=parse_dates(df["Fecha"]))
     return df
 
-def merge_and_save(files_data, output_path):
+
+def _plain_values(df):
+    # Las columnas categóricas pasan al tipo de sus valores (ej.: el IVA vuelve a ser float)
+    categorical = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+    if not categorical:
+        return df
+    return df.astype({col: df[col].cat.categories.dtype for col in categorical})
+
+
+def write_xlsx(frames, output_path, split_files=False, max_rows=EXCEL_MAX_ROWS, chunk_size=10000):
     """
-    Une múltiples DataFrames y los guarda en un archivo XLSX.
-    Además, valida que la cantidad de filas concatenadas sea igual a la suma de filas de cada DataFrame.
-    
-    Parámetros:
-        files_data (list): Lista de DataFrames a combinar.
-        output_path (str): Ruta donde guardar el archivo.
+    Salida XLSX con estilos (ver write_styled_excel_chunks). Al llegar a max_rows filas
+    se continúa en otra hoja, o con split_files en otro archivo ("salida (2).xlsx", ...).
+
+    Si frames se puede recorrer dos veces (una lista o un SpillFile) el ancho de las
+    columnas se calcula con todas las filas; si es un generador, con el primer bloque.
+
+    Retorna:
+        int: Cantidad de filas escritas.
     """
+    widths = None
+    if iter(frames) is not frames:
+        # Primera pasada: el ancho de cada columna (hay que definirlo antes de escribir filas)
+        for block in iter_blocks(frames):
+            block_widths = compute_column_widths(block)
+            widths = block_widths if widths is None else [max(a, b) for a, b in zip(widths, block_widths)]
+
+    chunks = (
+        block.iloc[start:start + chunk_size]
+        for block in _output_blocks(frames)
+        for start in range(0, max(len(block), 1), chunk_size)
+    )
+    return write_styled_excel_chunks(chunks, output_path, sheet_name="Datos Normalizados", widths=widths,
+                                     max_rows=max_rows, split_files=split_files)
+
+
+# Convenciones argentinas del CSV: separador ";", coma decimal y fechas DD/MM/YYYY.
+# Con BOM para que Excel reconozca los acentos al abrirlo
+CSV_OPTIONS = dict(sep=";", decimal=",", date_format="%d/%m/%Y", index=False)
+CSV_ENCODING = "utf-8-sig"
+
+
+def write_csv(frames, output_path):
+    """
+    Salida CSV (ver CSV_OPTIONS), escrita bloque por bloque. No tiene límite de filas.
+
+    Retorna:
+        int: Cantidad de filas escritas.
+    """
+    rows = 0
+    with open(output_path, "w", encoding=CSV_ENCODING, newline="") as f:
+        for position, block in enumerate(_output_blocks(frames)):
+            _plain_values(block).to_csv(f, header=position == 0, **CSV_OPTIONS)
+            rows += len(block)
+    return rows
+
+
+# Partición del dataset: droguería y mes de la fecha. Las filas sin fecha van a la
+# partición nula (el nombre que usan pyarrow y Hive para los valores nulos)
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+
+def write_dataset(frames, output_path):
+    """
+    Salida columnar: un dataset Parquet particionado por droguería y mes, al estilo Hive
+    (<output_path>/Drogueria=keller/Mes=2025-02/part-0.parquet). Cada partición es un
+    archivo al que se agregan los bloques a medida que llegan. Las columnas de la
+    partición no se guardan dentro de los archivos: las reconstruye quien lee el
+    dataset (ej.: pyarrow.dataset.dataset(output_path, partitioning="hive")).
+
+    Retorna:
+        int: Cantidad de filas escritas.
+
+    Lanza:
+        ValueError: Si la carpeta de salida ya tiene archivos.
+    """
+    # pyarrow se importa al usarlo: la interfaz no lo necesita para abrir
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if os.path.isdir(output_path) and os.listdir(output_path):
+        raise ValueError(f"❌ La carpeta de salida '{output_path}' ya tiene archivos.")
+    schema = pa.schema([
+        ("Nro Comprobante", pa.string()),
+        ("Fecha", pa.timestamp("ns")),
+        ("Nro de Cuenta", pa.string()),
+        ("Codigo de Barras", pa.string()),
+        ("Descripcion", pa.string()),
+        ("Cantidad", pa.int32()),
+        ("IVA (%)", pa.float64()),
+        ("Precio Unitario", pa.float64()),
+    ])
+
+    writers = {}
+    rows = 0
     try:
-        # Calcular el total esperado de filas sumando la cantidad de filas de cada DataFrame.
-        total_expected_rows = sum(len(df) for df in files_data)
-        print(f"Total esperado de filas: {total_expected_rows}")
+        for block in _output_blocks(frames):
+            if block.empty:
+                continue
+            providers = block["Drogueria"].astype(str)
+            months = block["Fecha"].dt.strftime("%Y-%m").fillna(NULL_PARTITION)
+            data = _plain_values(block.drop(columns=["Drogueria"]))
+            data["Nro de Cuenta"] = data["Nro de Cuenta"].astype(str)
+            for partition, positions in data.groupby([providers, months], sort=False).indices.items():
+                writer = writers.get(partition)
+                if writer is None:
+                    folder = os.path.join(output_path, f"Drogueria={partition[0]}", f"Mes={partition[1]}")
+                    os.makedirs(folder, exist_ok=True)
+                    writer = writers[partition] = pq.ParquetWriter(os.path.join(folder, "part-0.parquet"), schema)
+                writer.write_table(pa.Table.from_pandas(data.iloc[positions], schema=schema, preserve_index=False))
+            rows += len(block)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return rows
+
+
+def write_database(frames, output_path, table=None):
+    """
+    Salida a una tabla de MySQL (o SQLite) indicada por la URL output_path (ver
+    load_frames): las filas se cargan por lotes y las que ya estaban se actualizan,
+    así que repetir la carga no las duplica.
 
-        # Concatenar los DataFrames.
-        final_df = pd.concat(files_data, ignore_index=True)
-        actual_rows = final_df.shape[0]
-        print(f"Total de filas concatenadas: {actual_rows}")
+    Las apariciones de cada línea se cuentan por archivo, como en el historial: de un
+    SpillFile, un HistoryLines o un StreamedFiles se toma el archivo de cada línea con
+    items(); en una lista o un generador, cada DataFrame es un archivo.
 
-        # Validar la cantidad de filas.
-        if actual_rows != total_expected_rows:
-            print(f"Advertencia: Se esperaban {total_expected_rows} filas, pero se obtuvieron {actual_rows}.")
+    Retorna:
+        int: Cantidad de filas cargadas.
+    """
+    items = frames.items() if hasattr(frames, "items") else enumerate(frames)
+    return load_frames(((source, _with_dates(df)) for source, df in items), output_path, table=table)
 
-        # Asegurarse de que la columna "Fecha" sea de tipo datetime
-        if "Fecha" in final_df.columns:
-            final_df["Fecha"] = pd.to_datetime(final_df["Fecha"], errors='coerce')
 
-        # Guardar el DataFrame concatenado en Excel.
-        final_df.to_excel(output_path, index=False, sheet_name="Datos Normalizados")
-        print(f"✅ Archivo guardado exitosamente en {output_path}")
-    except Exception as e:
-        print(f"❌ Error al guardar el archivo: {str(e)}")
+# Formatos de salida de merge_and_save. Cada uno es una función
+# (frames, output_path, **opciones) -> filas escritas, que recibe una lista de
+# DataFrames, un SpillFile o un generador de bloques
+OUTPUT_SINKS = {
+    "xlsx": write_xlsx,
+    "csv": write_csv,
+    "dataset": write_dataset,
+    "database": write_database,
+}
+
 
+# Números con separador de miles "." y sin coma decimal, ej.: 1.234 o 12.345.678
+AR_THOUSANDS_PATTERN = r"^[+-]?\d{1,3}(?:\.\d{3})+$"
 
 
-def load_column_template_json(mapping):
+def _parse_ar_text(text):
     """
-    Retorna el mapeo de columnas y la lista de columnas finales para el proveedor,
-    sin leer un archivo JSON, usando un objeto predefinido.
+    Convierte un array de textos a float64 con las operaciones de np.strings.
+    Los vacíos quedan como NaN; lanza ValueError si algún texto no es un número.
     """
-    
-    # La lista de columnas finales se obtiene de los valores del mapping
-    final_columns = list(mapping.values())
-    return final_columns
+    text = np.strings.strip(text.astype(str))
+    has_comma = np.strings.find(text, ",") >= 0
+
+    # Los textos con puntos y sin coma son de miles solo si agrupan de a 3 dígitos
+    argentine = has_comma
+    candidates = ~has_comma & (np.strings.find(text, ".") >= 0)
+    if candidates.any():
+        argentine = has_comma.copy()
+        argentine[candidates] = pd.Series(text[candidates].astype(object)).str.match(AR_THOUSANDS_PATTERN).to_numpy(dtype=bool)
+    if argentine.all():
+        text = np.strings.replace(np.strings.replace(text, ".", ""), ",", ".")
+    elif argentine.any():
+        text[argentine] = np.strings.replace(np.strings.replace(text[argentine], ".", ""), ",", ".")
+
+    # La conversión a float es más rápida desde StringDType que desde textos de ancho fijo
+    text = text.astype(np.dtypes.StringDType())
+    filled = np.strings.str_len(text) > 0
+    if filled.all():
+        try:
+            return text.astype("float64")
+        except ValueError:
+            pass
+    numbers = np.full(len(text), np.nan)
+    try:
+        numbers[filled] = text[filled].astype("float64")
+    except ValueError:
+        invalid = pd.to_numeric(pd.Series(text[filled].astype(object)), errors="coerce").isna().to_numpy()
+        raise ValueError(f"❌ Valor numérico inválido: '{text[filled][invalid][0]}'")
+    return numbers
 
 
-def standardize_dataframe(df, column_mapping, final_columns):
+def parse_ar_numbers(series):
     """
-    Ordena y renombra las columnas de un DataFrame basado en un template externo.
+    Convierte a float una serie con números en formato argentino ("1.234,56"),
+    números con punto decimal ("1234.56") o valores ya numéricos, sin recorrer
+    los valores en Python.
+
+    Los textos con coma decimal, o con puntos que solo agrupan miles, se leen
+    como formato argentino; el resto se convierte directamente.
 
     Parámetros:
-        df (pd.DataFrame): DataFrame con los datos procesados.
-        column_mapping (dict): Diccionario con nombres actuales como claves y nombres estándar como valores.
-        final_columns (list): Lista con el orden final de las columnas.
+        series (pd.Series): Serie a convertir.
 
     Retorna:
-        pd.DataFrame: DataFrame con las columnas renombradas y ordenadas.
+        pd.Series: Serie de tipo float64 (los vacíos quedan como NaN).
+
+    Lanza:
+        ValueError: Si algún valor no se puede interpretar como número.
     """
-    # Renombrar columnas según el diccionario de mapeo
-    df = df.rename(columns=column_mapping)
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("float64")
+
+    kind = pd.api.types.infer_dtype(series, skipna=True)
+    if kind in ("floating", "integer", "mixed-integer-float", "decimal", "empty"):
+        return pd.to_numeric(series).astype("float64")
+
+    values = series.to_numpy(dtype=object)
+    notna = pd.notna(values)
+    if kind == "string" and notna.all():
+        return pd.Series(_parse_ar_text(values), index=series.index, name=series.name)
+    if kind == "string":
+        is_text = notna
+    else:
+        # Columna mixta: los valores que ya son números se convierten directamente
+        is_text = notna & series.map(type).eq(str).to_numpy()
+    numbers = np.full(len(values), np.nan)
+    numbers[is_text] = _parse_ar_text(values[is_text])
+    is_number = notna & ~is_text
+    if is_number.any():
+        numbers[is_number] = pd.to_numeric(pd.Series(values[is_number])).to_numpy(dtype="float64")
+    return pd.Series(numbers, index=series.index, name=series.name)
+
+
+def compute_column_widths(df):
+    """
+    Calcula el ancho de cada columna a partir del DataFrame (sin leer el archivo Excel).
+    Las fechas se miden con el formato DD/MM/YYYY con el que se muestran.
 
-    # Filtrar solo las columnas definidas en el template y ordenarlas
-    df = df[final_columns]
+    Parámetros:
+        df (pd.DataFrame): DataFrame a exportar.
 
-    if "Precio Unitario" in df.columns:
-        def convert_to_float(x):
-            # Si es una cadena, eliminar el separador de miles y cambiar la coma decimal por punto
-            if isinstance(x, str):
-                x = x.replace('.', '').replace(',', '.')
-            return float(x)
-        
-        df["Precio Unitario"] = df["Precio Unitario"].apply(convert_to_float).round(2)
+    Retorna:
+        list[int]: Ancho de cada columna, en el orden del DataFrame.
+    """
+    widths = []
+    for col_name in df.columns:
+        col = df[col_name].dropna()
+        max_length = len(str(col_name))
+        if not col.empty:
+            if pd.api.types.is_datetime64_any_dtype(col):
+                max_length = max(max_length, len("DD/MM/YYYY"))
+            else:
+                max_length = max(max_length, int(col.astype(str).str.len().max()))
+        widths.append(max_length + 2)
+    return widths
+
+
+def numbered_path(path, number):
+    """
+    Retorna la ruta de la parte `number` de una salida dividida en varios archivos
+    (ej.: 'salida.xlsx' -> 'salida (2).xlsx'). La primera parte usa la ruta original.
+    """
+    if number == 1:
+        return path
+    base, extension = os.path.splitext(path)
+    return f"{base} ({number}){extension}"
 
 
-    # 🛠️ Formatear "Fecha" a dd/mm/yyyy (eliminar la hora si existe)
-    if "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"], errors='coerce')
+def write_styled_excel_chunks(chunks, output_path, sheet_name="Datos Normalizados", widths=None,
+                              max_rows=EXCEL_MAX_ROWS, split_files=False):
+    """
+    Escribe en un XLSX los DataFrames que van llegando, sin juntarlos en memoria,
+    aplicando los estilos en la misma pasada, en modo write-only (memoria constante):
+    - Fondo celeste claro y texto en negrita en las cabeceras
+    - Ancho de columna calculado desde el DataFrame
+    - Intercalado de colores en filas (blanco y celeste claro)
+    - Bordes finos verticales entre columnas
+    - Formato de código de barras como texto para evitar notación científica
+    - Formato de celda "Fecha" para que se muestre como DD/MM/YYYY
 
+    Cuando una hoja llega a max_rows filas se continúa en una hoja nueva
+    ("Datos Normalizados (2)", ...) o, con split_files, en un archivo nuevo
+    ("salida (2).xlsx", ...; ver numbered_path).
 
-    return df
+    Parámetros:
+        chunks (Iterable[pd.DataFrame]): Bloques con las mismas columnas.
+        output_path (str): Ruta del archivo XLSX.
+        sheet_name (str): Nombre de la primera hoja.
+        widths (list[int] | None): Ancho de cada columna. Si es None se calcula con el primer bloque.
+        max_rows (int): Máximo de filas de datos por hoja.
+        split_files (bool): Continuar en otro archivo (y no en otra hoja) al llegar a max_rows.
+
+    Retorna:
+        int: Cantidad de filas escritas (0 si no llegó ningún bloque; en ese caso no se crea el archivo).
+    """
+    wb = Workbook(write_only=True)
+
+    # Definir estilos
+    header_fill = PatternFill(start_color="D9EAF7", end_color="D9EAF7", fill_type="solid")  # Celeste claro
+    header_font = Font(bold=True, color="000000")  # Negrita, color negro
+    row_fill = PatternFill(start_color="F2F8FC", end_color="F2F8FC", fill_type="solid")  # Fondo alterno para filas
+    border_style = Side(border_style="thin", color="000000")  # Bordes finos
+    row_border = Border(left=border_style, right=border_style)
+    # Borde completo de las cabeceras: el que ponía to_excel (estilo de cabecera de pandas)
+    # en el archivo que después recibía style_excel_file, que no lo cambiaba
+    header_side = Side(border_style="thin")
+    header_border = Border(left=header_side, right=header_side, top=header_side, bottom=header_side)
+
+    columns = None
+    ws = None
+    templates = None
+    sheets = 0
+    files = 1
+    row_idx = 2
+    total_rows = 0
+
+    def new_sheet():
+        nonlocal wb, ws, templates, sheets, files, row_idx
+        if split_files and sheets:
+            # Guardar el archivo lleno y continuar en uno nuevo, con la hoja de siempre
+            wb.save(numbered_path(output_path, files))
+            logger.info(f"📄 Parte {files} guardada en {numbered_path(output_path, files)}")
+            wb = Workbook(write_only=True)
+            files += 1
+            sheets = 0
+        sheets += 1
+        ws = wb.create_sheet(sheet_name if sheets == 1 else f"{sheet_name} ({sheets})")
+        row_idx = 2
+
+        # Los anchos deben definirse antes de escribir filas en modo write-only
+        for col_idx, width in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+        # Celdas modelo con el estilo de cada columna para filas pares e impares
+        templates = {True: [], False: []}
+        for col_name in columns:
+            header_value = str(col_name).strip().lower()
+            for is_even in (True, False):
+                template = WriteOnlyCell(ws)
+                if is_even:  # Filas pares con fondo celeste claro
+                    template.fill = row_fill
+                template.border = row_border
+                if header_value == "codigo de barras":
+                    template.number_format = "@"  # Texto
+                elif header_value == "fecha":
+                    template.number_format = "DD/MM/YYYY"
+                templates[is_even].append(template._style)
+
+        # Cabeceras
+        header_row = []
+        for col_name in columns:
+            cell = WriteOnlyCell(ws, value=str(col_name))
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.border = header_border
+            cell.alignment = Alignment(horizontal="center", vertical="center")
+            header_row.append(cell)
+        ws.append(header_row)
+
+    # Filas de datos, convertidas bloque por bloque para acotar la memoria
+    for chunk in chunks:
+        if columns is None:
+            columns = list(chunk.columns)
+            if widths is None:
+                widths = compute_column_widths(chunk)
+            new_sheet()
+        columns_values = [chunk[col].astype(object).where(chunk[col].notna(), None).tolist() for col in chunk.columns]
+        for values in zip(*columns_values):
+            if row_idx - 1 > max_rows:
+                new_sheet()
+            styles = templates[row_idx % 2 == 0]
+            row = []
+            for value, style in zip(values, styles):
+                cell = WriteOnlyCell(ws, value=value)
+                cell._style = style
+                row.append(cell)
+            ws.append(row)
+            row_idx += 1
+            total_rows += 1
+
+    if columns is None:
+        return 0
+    wb.save(numbered_path(output_path, files))
+    if files > 1:
+        logger.info(f"📄 Parte {files} guardada en {numbered_path(output_path, files)}")
+    return total_rows
 
 
 def style_excel_file(file_path):
@@ -245,14 +660,14 @@ def style_excel_file(file_path):
 
         # Guardar los cambios en el archivo
         wb.save(file_path)
-        print(f"🎨 Estilos aplicados correctamente al archivo: {file_path}")
+        logger.info(f"🎨 Estilos aplicados correctamente al archivo: {file_path}")
 
         # 🛠️ Abrir la carpeta de destino automáticamente (asegúrate de tener implementada la función open_folder)
         folder_path = os.path.dirname(file_path)
         open_folder(folder_path)
 
     except Exception as e:
-        print(f"❌ Error al aplicar estilos al archivo Excel: {str(e)}")
+        logger.error(f"❌ Error al aplicar estilos al archivo Excel: {str(e)}")
 
 
 def open_folder(folder_path):
@@ -266,8 +681,8 @@ def open_folder(folder_path):
         if os.name == "nt":  # Windows
             os.startfile(folder_path)
         else:
-            print("⚠️ No se pudo abrir la carpeta automáticamente.")
+            logger.warning("⚠️ No se pudo abrir la carpeta automáticamente.")
     except Exception as e:
-        print(f"❌ Error al intentar abrir la carpeta: {str(e)}")
+        logger.error(f"❌ Error al intentar abrir la carpeta: {str(e)}")
 
 
@@ -1,5 +1,11 @@
 import os
 from PyQt5.QtCore import QThread
+from libs.cache.cache import ResultCache
+from libs.fingerprint.fingerprint import classify_files
+from libs.instrumentation.instrumentation import get_logger
+
+logger = get_logger(__name__)
+
 
 class FileProcessor:
     """
@@ -7,30 +13,75 @@ class FileProcessor:
 
     Funcionalidades:
         - Agregar archivos y carpetas a la cola de procesamiento.
+        - Reconocer el proveedor y la cuenta de cada archivo por su contenido.
         - Determinar el proveedor y llamar a la función adecuada.
         - Procesar archivos en segundo plano mediante QThread y un worker.
     """
 
-    def __init__(self):
-        self.files_to_process = []  # Lista de archivos en cola
-        self.processed_dataframes = []  # Lista de DataFrames procesados
+    def __init__(self, max_workers=None, queue=None):
+        # Cola de archivos: una lista, o el modelo de la tabla de la interfaz (QueueTableModel)
+        self.files_to_process = queue if queue is not None else []
+        self.max_workers = max_workers or os.cpu_count() or 1  # Procesos para el procesamiento en paralelo
+        self.cache = ResultCache()  # Caché de resultados normalizados por archivo
+        # Historial de líneas para detectar las ya procesadas (True: el historial por defecto,
+        # que se abre en el worker; así la interfaz no carga pandas al iniciar)
+        self.history_path = True
 
     def add_file(self, file_path, provider, account):
         if not os.path.exists(file_path):
-            print(f"❌ Error: El archivo '{file_path}' no existe.")
+            logger.error(f"❌ Error: El archivo '{file_path}' no existe.")
             return
         self.files_to_process.append({"path": file_path, "provider": provider, "account": account})
-        print(f"✅ Archivo añadido: {file_path} (Proveedor: {provider}, Cuenta: {account})")
+        logger.info(f"✅ Archivo añadido: {file_path} (Proveedor: {provider}, Cuenta: {account})")
 
     def add_folder(self, folder_path, provider, account):
         if not os.path.exists(folder_path):
-            print(f"❌ Error: La carpeta '{folder_path}' no existe.")
+            logger.error(f"❌ Error: La carpeta '{folder_path}' no existe.")
             return
-        for file_name in os.listdir(folder_path):
-            if file_name.endswith(".csv"):
-                full_path = os.path.join(folder_path, file_name)
-                self.files_to_process.append({"path": full_path, "provider": provider, "account": account})
-        print(f"✅ Carpeta añadida: {folder_path} (Proveedor: {provider}, Cuenta: {account})")
+        # Se agregan todos juntos: la tabla se actualiza una sola vez aunque sean miles de archivos
+        self.files_to_process.extend(
+            {"path": os.path.join(folder_path, file_name), "provider": provider, "account": account}
+            for file_name in os.listdir(folder_path) if file_name.endswith(".csv")
+        )
+        logger.info(f"✅ Carpeta añadida: {folder_path} (Proveedor: {provider}, Cuenta: {account})")
+
+    def add_detected_files(self, file_paths):
+        """
+        Agrega archivos reconociendo su proveedor y cuenta por el contenido.
+
+        Retorna:
+            list[str]: Rutas de los archivos que no se pudieron reconocer.
+        """
+        unknown = []
+        added = []
+        for file_info in classify_files(file_paths):
+            # keller toma su cuenta de cuentas.json; el resto la necesita del archivo
+            if file_info["provider"] is None or (file_info["account"] is None and file_info["provider"] != "keller"):
+                unknown.append(file_info["path"])
+                continue
+            added.append(file_info)
+            logger.info(f"✅ Archivo añadido: {file_info['path']} (Proveedor: {file_info['provider']}, Cuenta: {file_info['account']})")
+        self.files_to_process.extend(added)
+        for file_path in unknown:
+            logger.warning(f"⚠️ No se reconoció el proveedor de '{file_path}'.")
+        return unknown
+
+    def add_detected_folder(self, folder_path):
+        """
+        Agrega todos los archivos de una carpeta (de cualquier proveedor) reconociendo
+        el proveedor de cada uno.
+
+        Retorna:
+            list[str]: Rutas de los archivos que no se pudieron reconocer.
+        """
+        if not os.path.exists(folder_path):
+            logger.error(f"❌ Error: La carpeta '{folder_path}' no existe.")
+            return []
+        file_paths = [
+            os.path.join(folder_path, file_name) for file_name in sorted(os.listdir(folder_path))
+            if os.path.isfile(os.path.join(folder_path, file_name))
+        ]
+        return self.add_detected_files(file_paths)
     
     def start_processing_worker(self):
         """
@@ -39,7 +90,7 @@ class FileProcessor:
         from workers.processing_worker import ProcessingWorker  # Asegúrate de que la ruta sea correcta
         
         thread = QThread()
-        worker = ProcessingWorker(self.files_to_process)
+        worker = ProcessingWorker(self.files_to_process, self.max_workers, self.cache, self.history_path)
         worker.moveToThread(thread)
         thread.started.connect(worker.run)
         return thread, worker
@@ -1,12 +1,500 @@
 import json
 import os
 import sys
-from libs.normalizers.cofarsur.cofarsur import process_cofarsur
-from libs.normalizers.suizo.suizo import process_suizo
-from libs.normalizers.monroe.monroe import process_monroe
-from libs.normalizers.keller.keller import process_keller
+import multiprocessing
+import queue
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from libs.builder.progress import ProcessingCancelled, StageReporter, active_reporter
+from libs.instrumentation.instrumentation import collect_stages, configure_logging, get_logger, is_enabled, set_enabled
+from libs.normalizers.registry import BATCH_PROVIDERS, get_batch_function, get_process_function, get_stream_function
 
-def trigger_processing(files_info):
+# Versión de la normalización: incrementarla cuando cambie la salida de algún
+# proveedor para invalidar los resultados guardados en la caché
+NORMALIZER_VERSION = "4"
+
+# Mensaje de error de los archivos que no se procesaron por una cancelación
+CANCELLED_MESSAGE = "⛔ Procesamiento cancelado por el usuario."
+
+# Filas por bloque al procesar archivos grandes por partes
+DEFAULT_CHUNKSIZE = 200_000
+
+# Archivos que se procesan juntos en una misma tarea, para los proveedores que lo
+# admiten (keller envía una factura chica por archivo)
+BATCH_SIZE = 500
+
+logger = get_logger(__name__)
+
+
+class BatchProcessingError(ValueError):
+    """
+    Error que agrupa todos los fallos de un lote de archivos.
+
+    Atributos:
+        errors (list[tuple[str, str]]): Pares (ruta, mensaje) en el orden de entrada.
+        processed (list[pd.DataFrame] | SpillFile): DataFrames de los archivos que sí se
+            procesaron (o el archivo en disco donde se guardaron).
+    """
+
+    def __init__(self, errors, processed):
+        self.errors = errors
+        self.processed = processed
+        detail = "\n".join(f"- {path}: {message}" for path, message in errors)
+        super().__init__(f"❌ Fallaron {len(errors)} archivo(s):\n{detail}")
+
+
+def load_keller_account():
+    """
+    Lee la cuenta 'depo' de keller desde el archivo cuentas.json.
+    """
+    # Determinar la ruta base en función de si estamos empaquetados o no
+    if getattr(sys, 'frozen', False):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.abspath(".")
+    cuentas_path = os.path.join(base_path, "cuentas.json")
+    with open(cuentas_path, "r") as f:
+        config = json.load(f)
+    account = config.get("keller", {}).get("depo")
+    if account is None:
+        raise ValueError("❌ No se encontró la cuenta 'depo' para 'keller' en cuentas.json")
+    return account
+
+
+def process_single_file(path, provider, account):
+    """
+    Procesa un único archivo con la función de su proveedor.
+
+    Está definida a nivel de módulo para poder ejecutarse en un proceso del pool.
+
+    Retorna:
+        pd.DataFrame: DataFrame procesado.
+    """
+    # Buscar la función correspondiente al proveedor
+    process_function = get_process_function(provider)
+    if process_function is None:
+        raise ValueError(f"❌ Error: No hay función asignada para el proveedor '{provider}'.")
+
+    # Informar antes de procesar
+    logger.info(f"🔹 Procesando archivo '{path}' con proveedor '{provider}' y cuenta '{account}'...")
+    df_processed = process_function(path, provider, account)
+
+    if df_processed is None:
+        # Si la función de procesamiento retorna None, consideramos que hubo un error
+        raise ValueError(f"⚠️ Advertencia: El archivo '{path}' no pudo ser procesado.")
+    return df_processed
+
+
+def timed_process_single_file(path, provider, account):
+    """
+    Igual que process_single_file, pero retorna también los segundos empleados y
+    la medición de cada etapa de la normalización.
+
+    Retorna:
+        tuple[pd.DataFrame, float, list[dict]]: DataFrame procesado, duración en segundos
+        y etapas (ver collect_stages).
+    """
+    with collect_stages() as stages:
+        start = time.perf_counter()
+        df_processed = process_single_file(path, provider, account)
+        return df_processed, time.perf_counter() - start, stages
+
+
+def stream_files(files_info, chunksize=DEFAULT_CHUNKSIZE, results=None):
+    """
+    Procesa los archivos uno por uno y genera los DataFrames estandarizados por
+    bloques, sin tener nunca un archivo completo en memoria (salvo keller, que se
+    procesa entero porque cada archivo es una sola factura).
+
+    Un archivo que falla se registra en results y se continúa con el siguiente;
+    los bloques que ya se generaron de ese archivo no se pueden retirar.
+
+    Parámetros:
+        files_info (list[dict]): Lista de diccionarios con 'path', 'provider' y 'account'.
+        chunksize (int): Filas leídas por bloque.
+        results (list | None): Si se indica, se agrega un diccionario por archivo con
+            'path', 'provider', 'account', 'rows', 'seconds', 'stages' y 'error'.
+
+    Retorna:
+        Generator[pd.DataFrame]: Bloques estandarizados, en el orden de entrada.
+    """
+    keller_account = None
+    for file_info in files_info:
+        path = file_info.get("path")
+        # Normalizamos a minúsculas, como process_files (el registro distingue mayúsculas)
+        provider = (file_info.get("provider") or "").lower() or None
+        account = file_info.get("account")
+        result = {"path": path, "provider": provider, "account": account, "rows": 0, "seconds": 0.0,
+                  "stages": [], "error": None}
+        if results is not None:
+            results.append(result)
+
+        start = time.perf_counter()
+        # Las etapas se registran mientras se genera cada bloque (entre bloques el
+        # consumidor no ejecuta etapas en este hilo)
+        with collect_stages() as stages:
+            result["stages"] = stages
+            try:
+                if not path or not provider:
+                    raise ValueError("❌ Información de archivo incompleta.")
+                if provider == "keller":
+                    if keller_account is None:
+                        keller_account = load_keller_account()
+                    account = result["account"] = keller_account
+                stream_function = get_stream_function(provider)
+                if stream_function is None:
+                    chunks = [process_single_file(path, provider, account)]
+                else:
+                    logger.info(f"🔹 Procesando archivo '{path}' por bloques de {chunksize} filas...")
+                    chunks = stream_function(path, provider, account, chunksize)
+                for df_chunk in chunks:
+                    result["rows"] += len(df_chunk)
+                    result["seconds"] += time.perf_counter() - start
+                    yield df_chunk
+                    start = time.perf_counter()
+            except ProcessingCancelled:
+                raise
+            except Exception as e:
+                result["error"] = str(e)
+                logger.error(f"❌ Error al procesar el archivo '{path}': {str(e)}")
+        result["seconds"] += time.perf_counter() - start
+
+
+class StreamedFiles:
+    """
+    Bloques de stream_files (se recorren una sola vez) que además se pueden recorrer
+    como pares (índice del archivo, bloque) con items(), como un SpillFile, para las
+    salidas que necesitan saber de qué archivo es cada línea (ver write_database).
+    """
+
+    def __init__(self, files_info, chunksize=DEFAULT_CHUNKSIZE, results=None):
+        self.results = [] if results is None else results
+        self._first = len(self.results)  # Posición en results del primer archivo
+        self._blocks = stream_files(files_info, chunksize, self.results)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._blocks)
+
+    def items(self):
+        for block in self._blocks:
+            # stream_files agrega el resultado de cada archivo antes de generar sus bloques
+            yield len(self.results) - 1 - self._first, block
+
+
+def reported_process_single_file(index, path, provider, account, emit=None, cancel_event=None):
+    """
+    Igual que timed_process_single_file, pero informa el inicio y cada etapa con
+    `emit` y se detiene entre etapas si se activa `cancel_event`.
+
+    Está definida a nivel de módulo para poder ejecutarse en un proceso del pool.
+    """
+    with active_reporter(StageReporter(index, emit, cancel_event)) as reporter:
+        reporter.check_cancelled()
+        if emit is not None:
+            emit({"type": "file_started", "index": index, "path": path})
+        return timed_process_single_file(path, provider, account)
+
+
+def reported_process_batch(indexes, paths, provider, account, emit=None, cancel_event=None):
+    """
+    Procesa juntos varios archivos de un proveedor que lo admite (ver get_batch_function).
+    Informa el inicio de cada archivo, y las etapas con el índice del primero.
+
+    Está definida a nivel de módulo para poder ejecutarse en un proceso del pool.
+
+    Retorna:
+        tuple[list[tuple[pd.DataFrame | None, str | None]], float, list[dict]]: DataFrame
+        o error de cada archivo, duración total en segundos y etapas.
+    """
+    with active_reporter(StageReporter(indexes[0], emit, cancel_event)) as reporter:
+        reporter.check_cancelled()
+        if emit is not None:
+            for index, path in zip(indexes, paths):
+                emit({"type": "file_started", "index": index, "path": path})
+        with collect_stages() as stages:
+            start = time.perf_counter()
+            logger.info(f"🔹 Procesando {len(paths)} archivos juntos con proveedor '{provider}' y cuenta '{account}'...")
+            outcomes = get_batch_function(provider)(list(paths), provider, account)
+            return outcomes, time.perf_counter() - start, stages
+
+
+def reported_process_job(job, emit=None, cancel_event=None):
+    """
+    Procesa una tarea de process_files: un archivo, o un grupo de archivos del mismo
+    proveedor y cuenta (ver build_jobs). Retorna lo mismo que reported_process_batch.
+
+    Está definida a nivel de módulo para poder ejecutarse en un proceso del pool.
+    """
+    indexes, paths, provider, account = job
+    if len(indexes) > 1:
+        return reported_process_batch(indexes, paths, provider, account, emit, cancel_event)
+    df, seconds, stages = reported_process_single_file(indexes[0], paths[0], provider, account, emit, cancel_event)
+    return [(df, None)], seconds, stages
+
+
+def build_jobs(tasks):
+    """
+    Agrupa las tareas de los proveedores que procesan varios archivos juntos (por
+    proveedor y cuenta, de a BATCH_SIZE archivos); el resto queda de a un archivo.
+
+    Retorna:
+        list[tuple]: Tareas (índices, rutas, proveedor, cuenta), ordenadas por el
+        índice de su primer archivo.
+    """
+    jobs = []
+    groups = {}
+    for index, path, provider, account in tasks:
+        if provider in BATCH_PROVIDERS:
+            groups.setdefault((provider, account), []).append((index, path))
+        else:
+            jobs.append(((index,), (path,), provider, account))
+    for (provider, account), items in groups.items():
+        for start in range(0, len(items), BATCH_SIZE):
+            indexes, paths = zip(*items[start:start + BATCH_SIZE])
+            jobs.append((indexes, paths, provider, account))
+    return sorted(jobs, key=lambda job: job[0][0])
+
+
+def store_job_result(results, job, outcome):
+    """
+    Guarda en results lo que retornó reported_process_job. La duración de un grupo
+    se reparte entre sus archivos según sus filas, y las etapas quedan en el primero.
+    """
+    indexes = job[0]
+    outcomes, seconds, stages = outcome
+    rows = [len(df) if df is not None else 0 for df, _ in outcomes]
+    total_rows = sum(rows)
+    for position, (index, (df, error)) in enumerate(zip(indexes, outcomes)):
+        share = rows[position] / total_rows if total_rows else 1 / len(indexes)
+        results[index].update(df=df, error=error, seconds=seconds * share, stages=stages if position == 0 else [])
+
+
+def init_worker_process(log_level, instrumentation_enabled):
+    """
+    Configura los mensajes y la medición de etapas de cada proceso del pool igual que
+    en el proceso principal (en Windows los procesos hijos no heredan esa configuración).
+    """
+    configure_logging(log_level)
+    set_enabled(instrumentation_enabled)
+
+
+def process_tasks_in_pool(jobs, results, max_workers, emit, finish, cancelled):
+    """
+    Procesa las tareas (ver build_jobs) en un pool de procesos. Los eventos de etapa de los procesos
+    hijos llegan por una cola compartida y se reenvían con `emit`; la cancelación se
+    propaga a los hijos con un evento compartido. `finish` recibe los índices de cada
+    tarea terminada.
+    """
+    with multiprocessing.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=min(max_workers, len(jobs)), initializer=init_worker_process,
+                                initargs=(get_logger().getEffectiveLevel(), is_enabled())) as executor:
+        events = manager.Queue()
+        shared_cancel = manager.Event()
+        futures = {}
+        for job in jobs:
+            futures[executor.submit(reported_process_job, job, events.put, shared_cancel)] = job
+
+        def drain_events():
+            while True:
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    return
+                emit(event)
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            drain_events()
+            if cancelled() and not shared_cancel.is_set():
+                shared_cancel.set()
+                for future in pending:
+                    future.cancel()
+            for future in done:
+                job = futures[future]
+                try:
+                    store_job_result(results, job, future.result())
+                except (ProcessingCancelled, CancelledError):
+                    for index in job[0]:
+                        results[index]["error"] = CANCELLED_MESSAGE
+                except Exception as e:
+                    for index in job[0]:
+                        results[index]["error"] = str(e)
+                finish(job[0])
+        drain_events()
+
+
+def process_files(files_info, max_workers=1, cache=None, progress=None, cancel_event=None, spill=None, history=None):
+    """
+    Procesa todos los archivos de files_info y retorna un resultado por archivo,
+    sin detenerse ante errores.
+
+    Parámetros:
+        files_info (list[dict]): Lista de diccionarios con:
+            - "path" (str): Ruta del archivo.
+            - "provider" (str): Nombre del proveedor.
+            - "account" (int/str): Número de cuenta (excepto para keller).
+        max_workers (int): Cantidad de procesos a usar. Con 1 (por defecto) los archivos
+            se procesan en secuencia; con más de 1 se procesan en paralelo en un pool
+            de procesos.
+        cache (ResultCache | None): Caché de resultados. Los archivos sin cambios se
+            cargan desde la caché en lugar de volver a normalizarse.
+        progress (callable | None): Función que recibe un diccionario por evento:
+            - {"type": "file_started", "index", "path"}
+            - {"type": "stage", "index", "stage", "rows", "seconds"}
+            - {"type": "file_finished", "index", "path", "rows", "duplicates", "seconds", "cached", "error"}
+              ("duplicates": líneas que ya estaban en el historial)
+        cancel_event (threading.Event | None): Al activarse, no se inician más archivos y
+            los que están en curso se detienen al terminar su etapa actual.
+        spill (SpillFile | None): Si se indica, cada DataFrame se guarda en este archivo
+            apenas termina su archivo (con el índice en files_info como clave) y no se
+            conserva en memoria.
+        history (HistoryStore | None): Si se indica, las líneas de cada archivo se ingresan
+            en este historial apenas termina y se informan las que ya estaban (de otra
+            ejecución o de otro archivo). Quedan pendientes: quien llama las confirma con
+            history.commit() después de guardar la salida. Se usa solo desde el hilo que
+            llama a esta función.
+
+    Retorna:
+        list[dict]: Un diccionario por archivo, en el mismo orden que files_info, con:
+            - "path", "provider", "account": Datos del archivo.
+            - "df" (pd.DataFrame | None): DataFrame procesado (None si se guardó en spill).
+            - "rows" (int | None): Filas del DataFrame procesado.
+            - "error" (str | None): Mensaje de error si el archivo falló.
+            - "seconds" (float): Tiempo de procesamiento (o de lectura desde la caché).
+            - "cached" (bool): Si el resultado se cargó desde la caché.
+            - "history" (dict | None): Líneas "nuevas", "duplicadas" y "modificadas" frente
+              al historial (None sin historial o si no se pudo guardar).
+            - "stages" (list[dict]): Medición de cada etapa (vacía si vino de la caché).
+    """
+    tasks = []  # (índice, ruta, proveedor, cuenta)
+    results = []
+    cache_keys = {}  # índice -> clave de caché de los archivos a procesar
+    keller_account = None
+
+    def emit(event):
+        if progress is not None:
+            progress(event)
+
+    def finish(index):
+        result = results[index]
+        if result["error"] is None and result["df"] is not None:
+            result["rows"] = len(result["df"])
+            if index in cache_keys:
+                cache.put(cache_keys[index], result["df"])
+            if spill is not None:
+                # Guardar en disco apenas termina: en memoria queda solo el archivo en curso
+                spill.append(result["df"], key=index)
+                result["df"] = None
+        emit({
+            "type": "file_finished",
+            "index": index,
+            "path": result["path"],
+            "rows": result["rows"] or 0,
+            "duplicates": (result["history"] or {}).get("duplicadas", 0),
+            "seconds": result["seconds"],
+            "cached": result["cached"],
+            "error": result["error"],
+        })
+
+    def finish_all(indexes):
+        # Las líneas de todos los archivos de una tarea se guardan juntas en el historial
+        if history is not None:
+            ingested = [
+                index for index in indexes if results[index]["error"] is None and results[index]["df"] is not None
+            ]
+            counts = history.ingest_many(
+                [results[index]["df"] for index in ingested], [results[index]["path"] for index in ingested]
+            )
+            for index, history_counts in zip(ingested, counts):
+                results[index]["history"] = history_counts
+                if history_counts and history_counts["duplicadas"]:
+                    logger.warning(f"⚠️ '{results[index]['path']}': {history_counts['duplicadas']} "
+                                   f"línea(s) ya estaban en el historial.")
+        for index in indexes:
+            finish(index)
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    for index, file_info in enumerate(files_info):
+        result = {
+            "path": file_info.get("path"),
+            "provider": file_info.get("provider"),
+            "account": file_info.get("account"),
+            "df": None,
+            "rows": None,
+            "error": None,
+            "seconds": 0.0,
+            "cached": False,
+            "history": None,
+            "stages": [],
+        }
+        results.append(result)
+        try:
+            # Validar información básica
+            if "path" not in file_info or "provider" not in file_info:
+                raise ValueError(f"❌ Error: Falta información en {file_info}")
+
+            path = file_info["path"]
+            provider = file_info["provider"].lower()  # Normalizamos a minúsculas
+
+            # Para 'keller', leer la cuenta desde el archivo cuentas.json (una vez por lote)
+            if provider == "keller":
+                if keller_account is None:
+                    keller_account = load_keller_account()
+                account = keller_account
+            else:
+                # Para otros proveedores se espera que 'account' esté en file_info
+                if "account" not in file_info:
+                    raise ValueError(f"❌ Error: Falta 'account' para el proveedor '{provider}' en {file_info}")
+                account = file_info["account"]
+            result["provider"], result["account"] = provider, account
+
+            if cache is not None:
+                start = time.perf_counter()
+                key = cache.make_key(path, provider, account, NORMALIZER_VERSION)
+                cached_df = cache.get(key)
+                if cached_df is not None:
+                    logger.info(f"⚡ Archivo '{path}' cargado desde la caché.")
+                    result.update(df=cached_df, cached=True, seconds=time.perf_counter() - start)
+                    finish_all([index])
+                    continue
+                cache_keys[index] = key
+
+            tasks.append((index, path, provider, account))
+        except Exception as e:
+            result["error"] = str(e)
+            finish_all([index])
+
+    jobs = build_jobs(tasks)
+    if max_workers > 1 and len(jobs) > 1:
+        process_tasks_in_pool(jobs, results, max_workers, emit, finish_all, cancelled)
+    else:
+        for job in jobs:
+            indexes = job[0]
+            if cancelled():
+                for index in indexes:
+                    results[index]["error"] = CANCELLED_MESSAGE
+                continue
+            try:
+                store_job_result(results, job, reported_process_job(job, progress, cancel_event))
+            except ProcessingCancelled:
+                for index in indexes:
+                    results[index]["error"] = CANCELLED_MESSAGE
+            except Exception as e:
+                for index in indexes:
+                    results[index]["error"] = str(e)
+            finish_all(indexes)
+
+    return results
+
+
+def trigger_processing(files_info, max_workers=1, cache=None, progress=None, cancel_event=None, spill=None,
+                       history=None):
     """
     Recorre un array de objetos con información de archivos a procesar,
     determina el proveedor y llama a la función correspondiente.
@@ -16,62 +504,35 @@ def trigger_processing(files_info):
             - "path" (str): Ruta del archivo.
             - "provider" (str): Nombre del proveedor.
             - "account" (int/str): Número de cuenta (excepto para keller).
+        max_workers (int): Cantidad de procesos a usar (ver process_files).
+        cache (ResultCache | None): Caché de resultados (ver process_files).
+        progress (callable | None): Función que recibe los eventos de avance (ver process_files).
+        cancel_event (threading.Event | None): Evento para cancelar el procesamiento.
+        spill (SpillFile | None): Archivo en disco donde guardar los DataFrames a medida
+            que se procesan (ver process_files).
+        history (HistoryStore | None): Historial donde guardar las líneas procesadas (ver process_files).
 
     Retorna:
-        list[pd.DataFrame]: Lista de DataFrames procesados.
-    
-    Si ocurre un error en el procesamiento de un archivo, se lanza la excepción.
+        list[pd.DataFrame] | SpillFile: Lista de DataFrames procesados, en el mismo orden
+        que files_info, o spill con esos DataFrames si se indicó.
+
+    Si falla uno o más archivos, se procesan igualmente todos los demás y se lanza
+    un BatchProcessingError con todos los errores. Si se cancela, se lanza
+    ProcessingCancelled y se descartan los resultados parciales.
     """
-    # Diccionario que asocia proveedores con sus funciones
-    provider_functions = {
-        "monroe": process_monroe,
-        "cofarsur": process_cofarsur,
-        "suizo": process_suizo,
-        "keller": process_keller
-    }
+    results = process_files(files_info, max_workers, cache, progress, cancel_event, spill, history)
 
-    processed_dfs = []  # Lista para almacenar los DataFrames procesados
+    if cancel_event is not None and cancel_event.is_set():
+        raise ProcessingCancelled(CANCELLED_MESSAGE)
 
-    for file_info in files_info:
-        # Validar información básica
-        if "path" not in file_info or "provider" not in file_info:
-            raise ValueError(f"❌ Error: Falta información en {file_info}")
-
-        path = file_info["path"]
-        provider = file_info["provider"].lower()  # Normalizamos a minúsculas
-
-        # Para 'keller', leer la cuenta desde el archivo cuentas.json
-        if provider == "keller":
-            # Determinar la ruta base en función de si estamos empaquetados o no
-            if getattr(sys, 'frozen', False):
-                base_path = sys._MEIPASS
-            else:
-                base_path = os.path.abspath(".")
-            cuentas_path = os.path.join(base_path, "cuentas.json")
-            with open(cuentas_path, "r") as f:
-                config = json.load(f)
-            account = config.get("keller", {}).get("depo")
-            if account is None:
-                raise ValueError("❌ No se encontró la cuenta 'depo' para 'keller' en cuentas.json")
-        else:
-            # Para otros proveedores se espera que 'account' esté en file_info
-            if "account" not in file_info:
-                raise ValueError(f"❌ Error: Falta 'account' para el proveedor '{provider}' en {file_info}")
-            account = file_info["account"]
-
-        # Buscar la función correspondiente al proveedor
-        process_function = provider_functions.get(provider)
-        if process_function is None:
-            raise ValueError(f"❌ Error: No hay función asignada para el proveedor '{provider}'.")
-
-        # Imprimir mensaje informativo antes de procesar
-        print(f"🔹 Procesando archivo '{path}' con proveedor '{provider}' y cuenta '{account}'...")
-        df_processed = process_function(path, provider, account)
-
-        if df_processed is not None:
-            processed_dfs.append(df_processed)
-        else:
-            # Si la función de procesamiento retorna None, consideramos que hubo un error
-            raise ValueError(f"⚠️ Advertencia: El archivo '{path}' no pudo ser procesado.")
+    processed_dfs = spill if spill is not None else [result["df"] for result in results if result["error"] is None]
+    errors = [
+        (result["path"] or str(file_info), result["error"])
+        for file_info, result in zip(files_info, results)
+        if result["error"] is not None
+    ]
+
+    if errors:
+        raise BatchProcessingError(errors, processed_dfs)
 
     return processed_dfs
@@ -0,0 +1,83 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ProcessingCancelled(Exception):
+    """
+    Se lanza entre etapas cuando se solicita cancelar el procesamiento.
+    """
+
+
+class StageReporter:
+    """
+    Reporta el avance de las etapas de un archivo y verifica si se pidió cancelar.
+
+    Parámetros:
+        index (int): Posición del archivo en el lote.
+        emit (callable | None): Función que recibe cada evento (dict).
+        cancel_event (threading.Event | None): Evento que indica que se pidió cancelar.
+    """
+
+    def __init__(self, index, emit=None, cancel_event=None):
+        self.index = index
+        self.emit = emit
+        self.cancel_event = cancel_event
+        self.start = time.perf_counter()
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ProcessingCancelled("⛔ Procesamiento cancelado por el usuario.")
+
+    def stage(self, name, rows):
+        if self.emit is not None:
+            self.emit({
+                "type": "stage",
+                "index": self.index,
+                "stage": name,
+                "rows": rows,
+                "seconds": time.perf_counter() - self.start,
+            })
+        # Cancelar entre etapas, antes de empezar la siguiente
+        self.check_cancelled()
+
+
+_active = threading.local()
+
+
+@contextmanager
+def active_reporter(reporter):
+    """
+    Activa el reporter para las llamadas a report_stage del hilo actual.
+    """
+    previous = getattr(_active, "reporter", None)
+    _active.reporter = reporter
+    try:
+        yield reporter
+    finally:
+        _active.reporter = previous
+
+
+def report_stage(name, df):
+    """
+    Informa que terminó una etapa de normalización. Lo llaman los normalizadores
+    después de cada paso; si no hay un reporter activo no hace nada.
+
+    Parámetros:
+        name (str): Nombre de la etapa.
+        df (pd.DataFrame | int | None): Resultado de la etapa (se informa su cantidad de
+            filas) o directamente la cantidad de filas.
+
+    Lanza:
+        ProcessingCancelled: Si se pidió cancelar el procesamiento.
+    """
+    reporter = getattr(_active, "reporter", None)
+    if reporter is None:
+        return
+    if df is None:
+        rows = 0
+    elif isinstance(df, int):
+        rows = df
+    else:
+        rows = len(df)
+    reporter.stage(name, rows)
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from libs.instrumentation.instrumentation import get_logger
+
+logger = get_logger(__name__)
+
+# Directorio por defecto de la caché de resultados normalizados
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".normalizador_notas_pedido", "cache")
+
+# Tamaño máximo por defecto de la caché (1 GB)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """
+    Calcula el hash SHA-256 del contenido de un archivo leyéndolo por bloques.
+
+    Parámetros:
+        path (str): Ruta del archivo.
+        chunk_size (int): Tamaño de cada bloque de lectura.
+
+    Retorna:
+        str: Hash hexadecimal del contenido.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Caché en disco de los DataFrames estandarizados de cada archivo.
+
+    La clave combina el hash del contenido del archivo, su nombre (keller toma el
+    comprobante del nombre), el proveedor, la cuenta y la versión del normalizador.
+    Cada entrada se guarda como un pickle; cuando la caché supera max_bytes se
+    eliminan las entradas usadas hace más tiempo (LRU por fecha de modificación).
+    El tamaño total se calcula recorriendo el directorio una sola vez y después se
+    actualiza con cada entrada guardada: el directorio se vuelve a recorrer solo al
+    superar max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._total_bytes = None  # Tamaño actual de la caché (None: aún no calculado)
+
+    def make_key(self, path, provider, account, version):
+        """
+        Retorna la clave de caché para un archivo ya existente.
+        """
+        parts = [hash_file(path), os.path.basename(path), str(provider).lower(), str(account), str(version)]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """
+        Retorna el DataFrame guardado para la clave, o None si no existe o no se puede leer.
+        """
+        entry_path = self._entry_path(key)
+        if not os.path.exists(entry_path):
+            return None
+        try:
+            # pickle importa pandas recién al cargar la primera entrada
+            with open(entry_path, "rb") as f:
+                df = pickle.load(f)
+            os.utime(entry_path)  # Marcar como usado recientemente
+            return df
+        except Exception as e:
+            logger.warning(f"⚠️ Entrada de caché inválida '{entry_path}': {str(e)}")
+            self._remove(entry_path)
+            self._total_bytes = None
+            return None
+
+    def put(self, key, df):
+        """
+        Guarda el DataFrame para la clave y aplica el límite de tamaño.
+        """
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry_path = self._entry_path(key)
+            previous_size = os.path.getsize(entry_path) if os.path.exists(entry_path) else 0
+            # Escribir en un archivo temporal y reemplazar para no dejar entradas a medias
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, entry_path)
+            if self._total_bytes is None:
+                self.evict()  # Primer guardado: recorre el directorio y calcula el total
+            else:
+                self._total_bytes += size - previous_size
+                if self._total_bytes > self.max_bytes:
+                    self.evict()
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar en caché: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                self._remove(tmp_path)
+
+    def evict(self):
+        """
+        Elimina las entradas menos usadas hasta que la caché quede dentro de max_bytes.
+        """
+        if not os.path.isdir(self.cache_dir):
+            self._total_bytes = 0
+            return
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, entry_path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(entry_path)
+            total -= size
+        self._total_bytes = total
+
+    def clear(self):
+        """
+        Elimina todas las entradas de la caché.
+        """
+        self._total_bytes = 0
+        if not os.path.isdir(self.cache_dir):
+            return
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith((".pkl", ".tmp")):
+                self._remove(entry.path)
+
+    @staticmethod
+    def _remove(entry_path):
+        try:
+            os.remove(entry_path)
+        except OSError:
+            pass
@@ -0,0 +1,123 @@
+import re
+import numpy as np
+import pandas as pd
+from libs.instrumentation.instrumentation import get_logger
+
+logger = get_logger(__name__)
+
+# Formato estándar del número de comprobante: FC A 0307-04304132
+COMPROBANTE_PATTERN = re.compile(r"^FC [A-Z] \d{4}-\d{8}$")
+
+# Longitud mínima de un comprobante sin formato (letra + punto de venta + número)
+MIN_RAW_LENGTH = 12
+
+# Cantidad de ejemplos que se muestran al reportar comprobantes mal formados
+MAX_EXAMPLES = 5
+
+
+def _format_same_length(text, letter_position):
+    """
+    Formatea textos que tienen todos la misma longitud tratándolos como una matriz
+    de caracteres (una fila por valor), sin recorrer los valores en Python.
+    """
+    length = int(np.strings.str_len(text[0]))
+    chars = text.astype(f"<U{length}").view("<U1").reshape(len(text), length)
+
+    out = np.full((len(text), length + 5), " ", dtype="<U1")
+    out[:, 0], out[:, 1] = "F", "C"
+    out[:, 3] = chars[:, letter_position]  # Letra
+    out[:, 5:9] = np.delete(chars[:, :5], letter_position, axis=1)  # Punto de venta
+    out[:, 9] = "-"
+    out[:, 10:] = chars[:, 5:]  # Número
+    return out.view(f"<U{length + 5}").ravel()
+
+
+def format_comprobantes(series, letter_position=0, mask=None, validate=False):
+    """
+    Convierte números de comprobante sin formato al formato 'FC A 0307-04304132'.
+
+    Formatos de entrada:
+        - letter_position=0: letra al inicio, ej.: 'A04180000001' (suizo, keller).
+        - letter_position=4: letra después del punto de venta, ej.: '0307A04304132' (cofarsur).
+
+    Los valores con menos de 12 caracteres (o vacíos) quedan igual.
+
+    Parámetros:
+        series (pd.Series): Comprobantes sin formato.
+        letter_position (int): Posición de la letra (0 o 4).
+        mask (array-like[bool] | None): Filas a formatear (por defecto, todas).
+        validate (bool): Si es True, reporta los comprobantes que no quedaron con el formato estándar.
+
+    Retorna:
+        pd.Series: Serie con los comprobantes formateados.
+    """
+    values = series.to_numpy(dtype=object, copy=True)
+    selected = pd.notna(values)
+    if mask is not None:
+        selected &= np.asarray(mask, dtype=bool)
+
+    if selected.any():
+        # Cada comprobante se repite en todas las líneas de la factura: formatear los distintos
+        codes, uniques = pd.factorize(values[selected])
+        uniques = np.asarray(uniques, dtype=object)
+        text = np.strings.strip(uniques.astype(str))
+        lengths = np.strings.str_len(text)
+        formatted = uniques.copy()
+        # Se formatea por grupos de igual longitud (normalmente uno solo)
+        for length in np.unique(lengths[lengths >= MIN_RAW_LENGTH]):
+            rows = lengths == length
+            formatted[rows] = _format_same_length(text[rows], letter_position)
+        values[selected] = formatted.take(codes)
+        if validate:
+            check_comprobantes(pd.Series(formatted))
+
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def join_comprobantes(letras, numeros, separator=" "):
+    """
+    Arma el comprobante a partir de la letra y el número ya formateado
+    (ej.: 'A' y '1114-08061587' -> 'FC A 1114-08061587').
+
+    Parámetros:
+        letras (pd.Series): Letras de los comprobantes.
+        numeros (pd.Series): Números con formato 0000-00000000.
+        separator (str): Separador entre las partes (por defecto " ").
+
+    Retorna:
+        pd.Series: Serie con los comprobantes.
+    """
+    return "FC" + separator + letras.astype(str) + separator + numeros.astype(str)
+
+
+def find_malformed_comprobantes(series):
+    """
+    Retorna los comprobantes distintos que no cumplen el formato estándar.
+    Se valida cada valor único una sola vez (los comprobantes se repiten por línea).
+    """
+    uniques = pd.unique(series.dropna())
+    return [value for value in uniques if not COMPROBANTE_PATTERN.match(str(value))]
+
+
+def check_comprobantes(series, strict=False):
+    """
+    Valida todos los comprobantes de la serie y reporta juntos los mal formados.
+
+    Parámetros:
+        series (pd.Series): Comprobantes formateados.
+        strict (bool): Si es True, lanza un error en lugar de advertir.
+
+    Retorna:
+        list: Comprobantes mal formados (distintos).
+
+    Lanza:
+        ValueError: Si strict es True y hay comprobantes mal formados.
+    """
+    malformed = find_malformed_comprobantes(series)
+    if malformed:
+        examples = ", ".join(repr(value) for value in malformed[:MAX_EXAMPLES])
+        message = f"{len(malformed)} comprobante(s) con formato inválido, ej.: {examples}"
+        if strict:
+            raise ValueError(f"❌ {message}")
+        logger.warning(f"⚠️ Advertencia: {message}")
+    return malformed
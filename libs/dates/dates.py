@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+# Formato de fecha de los archivos de las droguerías (día primero)
+DATE_FORMAT = "%d/%m/%Y"
+
+NAT = np.datetime64("NaT", "ns")
+
+
+def parse_dates(values, format=None, dayfirst=True, errors="coerce", prepare=None):
+    """
+    Convierte una columna de fechas a datetime64 parseando solo los valores distintos.
+
+    Las fechas se repiten mucho (una por factura, copiada en todas sus líneas), así que
+    se parsea cada valor único una sola vez y el resultado se reparte con take.
+    Si la columna ya es datetime64 se retorna sin cambios.
+
+    Parámetros:
+        values (pd.Series | array-like): Fechas a convertir.
+        format (str | None): Formato explícito (ej.: '%d/%m/%Y'). Si es None, pandas
+            lo infiere respetando dayfirst.
+        dayfirst (bool): Interpretar el día primero cuando no hay formato explícito.
+        errors (str): 'coerce' (inválidas quedan en NaT) o 'raise'.
+        prepare (callable | None): Función que recibe los valores distintos (pd.Series)
+            y los retorna listos para parsear con el formato.
+
+    Retorna:
+        pd.Series: Serie de tipo datetime64[ns] con el mismo índice.
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    codes, uniques = pd.factorize(series)
+    if prepare is not None:
+        uniques = prepare(pd.Series(uniques))
+    if format is None:
+        parsed = pd.to_datetime(uniques, dayfirst=dayfirst, errors=errors)
+    else:
+        parsed = pd.to_datetime(uniques, format=format, errors=errors)
+
+    # El último elemento (NaT) es el que toman los vacíos (código -1)
+    table = np.append(np.asarray(parsed, dtype="datetime64[ns]"), NAT)
+    return pd.Series(table.take(codes), index=series.index, name=series.name)
@@ -0,0 +1,195 @@
+import csv
+import os
+import re
+from libs.instrumentation.instrumentation import get_logger
+from libs.normalizers.keller.controllers.header import sniff_header
+
+logger = get_logger(__name__)
+
+# Bytes que se leen del comienzo de cada archivo para reconocerlo
+SAMPLE_BYTES = 4096
+
+# Cantidad de campos de cada tipo de registro COFAR (C: cabecera, D: detalle, I: impuestos)
+COFARSUR_FIELDS = {"C": 16, "D": 17, "I": 4}
+
+MONROE_HEADER = "TIPO LINEA"
+SUIZO_HEADER = '"Tipo de Registro"'
+KELLER_HEADER = ("Fecha", "CodBarra", "Producto")
+
+# Proveedores cuyos archivos tienen una línea de cabecera con los nombres de las columnas
+HEADER_PROVIDERS = {"monroe", "suizo", "keller"}
+
+# Los archivos de keller se nombran con el comprobante (letra, punto de venta y
+# número), ej.: A001808244238.csv
+KELLER_FILENAME = re.compile(r"^[A-Z]\d{12}\.csv$", re.IGNORECASE)
+
+
+def read_sample(path, sample_bytes=SAMPLE_BYTES):
+    """
+    Lee los primeros bytes del archivo y los retorna como líneas completas.
+
+    Se decodifica en latin1 (nunca falla) y se descarta la última línea si quedó
+    cortada por el límite de bytes.
+
+    Retorna:
+        list[str]: Líneas del comienzo del archivo, sin saltos de línea.
+    """
+    with open(path, "rb") as f:
+        sample = f.read(sample_bytes + 1)
+    truncated = len(sample) > sample_bytes
+    sample = sample[:sample_bytes]
+    if sample.startswith(b"\xef\xbb\xbf"):  # BOM utf-8
+        sample = sample[3:]
+    lines = sample.decode("latin1").splitlines()
+    if truncated and lines:
+        lines.pop()
+    return lines
+
+
+def _to_account(value):
+    value = value.strip()
+    return int(value) if value.isdigit() else None
+
+
+def _detect_cofarsur(lines):
+    fields = lines[0].split("\t")
+    if COFARSUR_FIELDS.get(fields[0]) != len(fields):
+        return None
+    return {"provider": "cofarsur", "account": _to_account(fields[1])}
+
+
+def _detect_monroe(lines):
+    if not lines[0].startswith(MONROE_HEADER):
+        return None
+    delimiter = "\t" if "\t" in lines[0] else ";"
+    header = lines[0].split(delimiter)
+    account = None
+    if "COD CLIENTE" in header:
+        position = header.index("COD CLIENTE")
+        for line in lines[1:]:
+            fields = line.split(delimiter)
+            if fields[0] == "Cabecera" and len(fields) > position:
+                account = _to_account(fields[position])
+                break
+    return {"provider": "monroe", "account": account}
+
+
+def _detect_suizo(lines):
+    if not lines[0].startswith(SUIZO_HEADER):
+        return None
+    account = None
+    # "Código de Cliente" es la columna 6 de los registros
+    for fields in csv.reader(lines[1:]):
+        if len(fields) > 6:
+            account = _to_account(fields[6])
+            break
+    return {"provider": "suizo", "account": account}
+
+
+def _detect_keller(lines, path):
+    # La cabecera se interpreta igual que al leer el archivo (",", tabulación o ";",
+    # con un separador inicial opcional)
+    header = sniff_header(lines[0].encode("latin1"))
+    is_keller_header = header is not None and tuple(header[:len(KELLER_HEADER)]) == KELLER_HEADER
+    if not is_keller_header and not KELLER_FILENAME.match(os.path.basename(path)):
+        return None
+    # La cuenta de keller se lee de cuentas.json al procesar
+    return {"provider": "keller", "account": None}
+
+
+def detect_provider(path, sample_bytes=SAMPLE_BYTES):
+    """
+    Reconoce el proveedor de un archivo leyendo solo sus primeros bytes.
+
+    Firmas:
+        - cofarsur: registros 'C'/'D' separados por tabulación (16/17 campos).
+        - monroe: cabecera que comienza con 'TIPO LINEA'.
+        - suizo: cabecera que comienza con "Tipo de Registro".
+        - keller: cabecera 'Fecha;CodBarra;Producto...' (con los separadores que acepta
+          su lector) o nombre como A001808244238.csv.
+
+    Parámetros:
+        path (str): Ruta del archivo.
+        sample_bytes (int): Cantidad de bytes a leer.
+
+    Retorna:
+        dict | None: {"provider", "account"} (la cuenta se toma del contenido cuando
+        el formato la incluye, si no es None), o None si no se reconoce el archivo.
+    """
+    try:
+        lines = read_sample(path, sample_bytes)
+    except OSError as e:
+        logger.error(f"❌ No se pudo leer '{path}': {str(e)}")
+        return None
+    if not lines:
+        return None
+    return (
+        _detect_cofarsur(lines)
+        or _detect_monroe(lines)
+        or _detect_suizo(lines)
+        or _detect_keller(lines, path)
+    )
+
+
+def classify_files(paths, sample_bytes=SAMPLE_BYTES):
+    """
+    Reconoce el proveedor de cada archivo.
+
+    Retorna:
+        list[dict]: Un diccionario por archivo, en el mismo orden, con "path",
+        "provider" y "account" (provider es None si no se reconoció).
+    """
+    files_info = []
+    for path in paths:
+        detected = detect_provider(path, sample_bytes) or {"provider": None, "account": None}
+        files_info.append({"path": path, **detected})
+    return files_info
+
+
+def count_records(path, provider=None, chunk_size=1024 * 1024):
+    """
+    Cuenta las líneas de datos del archivo leyéndolo por bloques, sin parsearlo.
+    Si el proveedor usa una línea de cabecera, no se la cuenta.
+
+    Parámetros:
+        path (str): Ruta del archivo.
+        provider (str | None): Proveedor del archivo.
+        chunk_size (int): Tamaño de cada bloque de lectura.
+
+    Retorna:
+        int: Cantidad de líneas de datos.
+    """
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    if last != b"\n":
+        lines += 1  # Última línea sin salto de línea
+    if provider in HEADER_PROVIDERS and lines:
+        lines -= 1
+    return lines
+
+
+def inspect_file(path, provider=None):
+    """
+    Reúne los datos de un archivo de la cola que no hace falta procesarlo para conocer.
+
+    Parámetros:
+        path (str): Ruta del archivo.
+        provider (str | None): Proveedor indicado al agregarlo (se usa si no se reconoce otro).
+
+    Retorna:
+        dict: {"size": bytes, "detected": proveedor reconocido o None, "records": líneas de datos}.
+        Si el archivo no se puede leer, size y records son None.
+    """
+    detected = detect_provider(path)
+    detected = detected["provider"] if detected else None
+    try:
+        size = os.path.getsize(path)
+        records = count_records(path, detected or provider)
+    except OSError as e:
+        logger.error(f"❌ No se pudo leer '{path}': {str(e)}")
+        size = records = None
+    return {"size": size, "detected": detected, "records": records}
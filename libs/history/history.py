@@ -0,0 +1,445 @@
+import os
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from libs.instrumentation.instrumentation import get_logger
+from libs.schema.schema import OUTPUT_SCHEMA, concat_frames, conform_column
+
+logger = get_logger(__name__)
+
+# Base de datos por defecto del historial de líneas normalizadas
+DEFAULT_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".normalizador_notas_pedido", "historial.sqlite")
+
+# Columnas que identifican una línea de factura (más su número de aparición dentro
+# del archivo, para distinguir líneas repetidas de una misma factura)
+KEY_COLUMNS = ["Drogueria", "Nro de Cuenta", "Nro Comprobante", "Codigo de Barras"]
+
+# Columnas del resto de la línea: si cambian, la línea se actualiza
+CONTENT_COLUMNS = ["Fecha", "Descripcion", "Cantidad", "IVA (%)", "Precio Unitario"]
+
+# Columna de la tabla para cada columna de la salida estándar
+TABLE_COLUMNS = {
+    "Drogueria": "drogueria",
+    "Nro de Cuenta": "cuenta",
+    "Nro Comprobante": "comprobante",
+    "Codigo de Barras": "codigo_barras",
+    "Fecha": "fecha",
+    "Descripcion": "descripcion",
+    "Cantidad": "cantidad",
+    "IVA (%)": "iva",
+    "Precio Unitario": "precio",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lineas (
+    id INTEGER PRIMARY KEY,
+    clave INTEGER NOT NULL UNIQUE,
+    contenido INTEGER NOT NULL,
+    drogueria TEXT NOT NULL,
+    cuenta TEXT NOT NULL,
+    comprobante TEXT NOT NULL,
+    codigo_barras TEXT,
+    aparicion INTEGER NOT NULL,
+    fecha TEXT,
+    descripcion TEXT,
+    cantidad INTEGER,
+    iva REAL,
+    precio REAL,
+    archivo TEXT,
+    ingresada TEXT NOT NULL,
+    actualizada TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lineas_factura ON lineas (drogueria, cuenta, comprobante, codigo_barras);
+"""
+
+# Estado de cada línea frente al historial
+NEW, DUPLICATE, CHANGED = "nueva", "duplicada", "modificada"
+
+
+def _text(values):
+    # Valores como texto (los nulos quedan vacíos); en las categóricas se convierten
+    # solo las categorías
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = np.append(values.cat.categories.astype(str).to_numpy(dtype=object), "")
+        return pd.Series(categories[values.cat.codes.to_numpy()], index=values.index)
+    return values.astype(str).where(values.notna(), "")
+
+
+def _values(values):
+    # Valores de Python para SQLite (los nulos quedan como None)
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _account(value):
+    # Las cuentas numéricas vuelven a ser int, como en la salida de los normalizadores
+    return int(value) if value.isdigit() and str(int(value)) == value else value
+
+
+def _key_text(df):
+    # Columnas de la clave como texto (el hash no depende del tipo de cada columna)
+    return pd.DataFrame({col: _text(df[col]) for col in KEY_COLUMNS})
+
+
+def line_hashes(df, groups=None):
+    """
+    Calcula los hashes de 64 bits de cada línea de una salida estándar.
+
+    La clave combina KEY_COLUMNS con el número de aparición de la línea entre las de
+    igual clave del mismo DataFrame (normalmente, un archivo): si una droguería reenvía
+    el archivo, sus líneas repiten la clave aunque la factura tenga líneas iguales.
+    El contenido combina CONTENT_COLUMNS. Los valores se pasan a texto antes de
+    calcular el hash, así la cuenta 2285 y '2285' dan lo mismo.
+
+    Parámetros:
+        df (pd.DataFrame): Salida estándar.
+        groups (np.ndarray | None): Archivo de cada línea, si df junta varios (las
+            apariciones se cuentan por archivo).
+
+    Retorna:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Clave, contenido (int64) y número
+        de aparición de cada línea.
+    """
+    keys = _key_text(df)
+    by = KEY_COLUMNS if groups is None else [np.asarray(groups)] + [keys[col] for col in KEY_COLUMNS]
+    occurrence = keys.groupby(by, sort=False).cumcount().to_numpy()
+    keys["aparicion"] = occurrence
+    contents = pd.DataFrame({col: _text(df[col]) for col in CONTENT_COLUMNS})
+    key_hash = pd.util.hash_pandas_object(keys, index=False).to_numpy().view("int64")
+    content_hash = pd.util.hash_pandas_object(contents, index=False).to_numpy().view("int64")
+    return key_hash, content_hash, occurrence
+
+
+class LineKeys:
+    """
+    Claves de línea (las mismas de line_hashes) para un flujo de bloques: el número de
+    aparición de cada clave se cuenta por archivo, como en line_hashes, aunque un
+    archivo llegue dividido en varios bloques consecutivos. Así, cargar otra vez un
+    archivo (solo o con otros) da las mismas claves.
+
+    Ejemplo:
+        keys = LineKeys()
+        for groups, block in blocks:
+            key_hash, occurrence = keys(block, groups)
+    """
+
+    def __init__(self):
+        self.group = None  # Archivo de la última línea recibida
+        self.seen = pd.Series(dtype="int64")  # Apariciones de cada clave (sin el número) en ese archivo
+
+    def __call__(self, df, groups=None):
+        """
+        Parámetros:
+            df (pd.DataFrame): Bloque con la salida estándar.
+            groups (np.ndarray | None): Archivo de cada línea (números que no se repiten
+                entre archivos; el del comienzo del bloque puede seguir del anterior).
+                Con None, todas las líneas son de un mismo archivo.
+
+        Retorna:
+            tuple[np.ndarray, np.ndarray]: Clave (int64) y número de aparición de cada línea.
+        """
+        groups = np.zeros(len(df), dtype="int64") if groups is None else np.asarray(groups)
+        keys = _key_text(df)
+        base = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+        occurrence = pd.Series(base).groupby([groups, base], sort=False).cumcount().to_numpy()
+        if len(df):
+            # Las líneas del archivo que viene del bloque anterior siguen su cuenta
+            continued = groups == self.group
+            if continued.any():
+                occurrence[continued] += self.seen.reindex(base[continued], fill_value=0).to_numpy()
+            last = groups[-1]
+            counts = pd.Series(base[groups == last]).value_counts()
+            self.seen = self.seen.add(counts, fill_value=0).astype("int64") if last == self.group else counts
+            self.group = last
+        keys["aparicion"] = occurrence
+        return pd.util.hash_pandas_object(keys, index=False).to_numpy().view("int64"), occurrence
+
+
+def table_values(df):
+    """
+    Valores de cada columna de la tabla (ver TABLE_COLUMNS) como listas de Python para
+    la base de datos: textos, fechas YYYY-MM-DD y None en los nulos.
+
+    Retorna:
+        dict[str, list]: Valores por nombre de columna de la tabla.
+    """
+    return {
+        "drogueria": _text(df["Drogueria"]).tolist(),
+        "cuenta": _text(df["Nro de Cuenta"]).tolist(),
+        "comprobante": _text(df["Nro Comprobante"]).tolist(),
+        "codigo_barras": _values(df["Codigo de Barras"]),
+        "fecha": _values(df["Fecha"].dt.strftime("%Y-%m-%d")),
+        "descripcion": _values(df["Descripcion"]),
+        "cantidad": _values(df["Cantidad"].astype("Int64")),
+        "iva": _values(df["IVA (%)"].astype("float64")),
+        "precio": _values(df["Precio Unitario"]),
+    }
+
+
+def _where(drogueria=None, cuenta=None, desde=None, hasta=None):
+    # Condición WHERE (y sus parámetros) para los filtros de iter_lines
+    filters = []
+    params = []
+    for column, value, operator in (("drogueria", drogueria, "="), ("cuenta", cuenta, "="),
+                                    ("fecha", desde, ">="), ("fecha", hasta, "<=")):
+        if value is not None:
+            filters.append(f"{column} {operator} ?")
+            params.append(str(value))
+    return (f"WHERE {' AND '.join(filters)}" if filters else ""), params
+
+
+class HistoryStore:
+    """
+    Historial local (SQLite) de todas las líneas normalizadas, para detectar las que
+    ya se procesaron en otra ejecución (archivos reenviados o con fechas superpuestas).
+
+    Cada línea se identifica por el hash de su clave (droguería, cuenta, comprobante,
+    código de barras y número de aparición; ver line_hashes), único en la tabla. La
+    tabla tiene además un índice por droguería, cuenta, comprobante y código de barras
+    para las consultas. Al ingresar un DataFrame se buscan todas sus claves de una vez
+    y se insertan o actualizan juntas las líneas nuevas o modificadas.
+
+    Las líneas ingresadas quedan pendientes (en una transacción) hasta commit(): así
+    se confirman solo si la salida se guardó. rollback() o close() las descartan, y
+    el historial queda como estaba. Mientras tanto se comparan con las siguientes
+    líneas ingresadas, como si ya estuvieran guardadas.
+
+    La conexión se usa de a un hilo por vez (por ejemplo, el worker que procesa los
+    archivos y después el hilo principal, que confirma al guardar la salida).
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # WAL: confirmar cada archivo no espera a escribir en el disco toda la base
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Cierra la conexión. Las líneas pendientes (sin commit) se descartan.
+        """
+        self.connection.close()
+
+    def commit(self):
+        """
+        Confirma las líneas ingresadas desde el último commit (o rollback).
+        """
+        self.connection.commit()
+
+    def rollback(self):
+        """
+        Descarta las líneas ingresadas desde el último commit.
+        """
+        self.connection.rollback()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM lineas").fetchone()[0]
+
+    def _stored_contents(self, key_hash):
+        """
+        Retorna el hash de contenido guardado para cada clave (None si no existe).
+        """
+        self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS claves (posicion INTEGER PRIMARY KEY, clave INTEGER)")
+        self.connection.execute("DELETE FROM temp.claves")
+        self.connection.executemany("INSERT INTO temp.claves VALUES (?, ?)", enumerate(key_hash.tolist()))
+        stored = np.full(len(key_hash), None, dtype=object)
+        query = "SELECT c.posicion, l.contenido FROM temp.claves c JOIN lineas l ON l.clave = c.clave"
+        for position, content in self.connection.execute(query):
+            stored[position] = content
+        self.connection.execute("DELETE FROM temp.claves")
+        return stored
+
+    def find_duplicates(self, df):
+        """
+        Compara las líneas de una salida estándar con el historial, sin modificarlo.
+
+        Retorna:
+            pd.Series: Estado de cada línea (con el índice de df): "nueva", "duplicada"
+            (igual a una ya guardada) o "modificada" (misma clave, otro contenido).
+        """
+        key_hash, content_hash, _ = line_hashes(df)
+        return pd.Series(self._status(key_hash, content_hash), index=df.index, name="historial")
+
+    def _status(self, key_hash, content_hash):
+        stored = self._stored_contents(key_hash)
+        exists = np.array([content is not None for content in stored], dtype=bool)
+        status = np.full(len(key_hash), NEW, dtype=object)
+        if exists.any():
+            same = exists.copy()
+            same[exists] = stored[exists].astype("int64") == content_hash[exists]
+            status[same] = DUPLICATE
+            status[exists & ~same] = CHANGED
+        # Una clave que se repite entre las líneas recibidas juntas (de archivos distintos)
+        # se compara con su aparición anterior, como si se hubieran ingresado de a una
+        repeated = pd.Series(key_hash).duplicated().to_numpy()
+        if repeated.any():
+            same = pd.DataFrame({"clave": key_hash, "contenido": content_hash}).duplicated().to_numpy()
+            status[repeated] = np.where(same[repeated], DUPLICATE, CHANGED)
+        return status
+
+    def ingest(self, df, source=None):
+        """
+        Guarda las líneas de una salida estándar (normalmente, las de un archivo): inserta
+        las nuevas, actualiza las modificadas y omite las duplicadas. Quedan pendientes
+        hasta commit().
+
+        Parámetros:
+            df (pd.DataFrame): Salida estándar.
+            source (str | None): Archivo de origen (se guarda con cada línea).
+
+        Retorna:
+            dict | None: Cantidad de líneas "nuevas", "duplicadas" y "modificadas", o None
+            si no se pudo guardar (se informa como advertencia, sin interrumpir el proceso).
+        """
+        return self.ingest_many([df], [source])[0]
+
+    def ingest_many(self, frames, sources):
+        """
+        Igual que ingest, pero con varios archivos a la vez: se buscan y se guardan sus
+        líneas juntas (para muchos archivos chicos, como las facturas de keller, es
+        mucho más rápido que ingresarlos de a uno).
+
+        Parámetros:
+            frames (list[pd.DataFrame]): Salida estándar de cada archivo.
+            sources (list[str | None]): Archivo de origen de cada DataFrame.
+
+        Retorna:
+            list[dict | None]: Las cantidades de ingest para cada DataFrame.
+        """
+        counts = [{"nuevas": 0, "duplicadas": 0, "modificadas": 0} for _ in frames]
+        filled = [i for i, df in enumerate(frames) if df is not None and not df.empty]
+        if not filled:
+            return counts
+        try:
+            df = concat_frames([frames[i] for i in filled])
+            groups = np.repeat(np.arange(len(filled)), [len(frames[i]) for i in filled])
+            key_hash, content_hash, occurrence = line_hashes(df, groups if len(filled) > 1 else None)
+            status = self._status(key_hash, content_hash)
+            for name, value in (("nuevas", NEW), ("duplicadas", DUPLICATE), ("modificadas", CHANGED)):
+                totals = np.bincount(groups[status == value], minlength=len(filled))
+                for position, i in enumerate(filled):
+                    counts[i][name] = int(totals[position])
+            rows = np.flatnonzero(status != DUPLICATE)
+            if len(rows):
+                source_names = np.array([sources[i] for i in filled], dtype=object)[groups[rows]]
+                # Punto de guardado: si falla, se deshacen solo estas líneas y no las pendientes
+                # (dentro de la transacción: fuera de ella, RELEASE las confirmaría)
+                if not self.connection.in_transaction:
+                    self.connection.execute("BEGIN")
+                self.connection.execute("SAVEPOINT ingesta")
+                try:
+                    self._upsert(df.iloc[rows], key_hash[rows], content_hash[rows], occurrence[rows], source_names)
+                except sqlite3.Error:
+                    self.connection.execute("ROLLBACK TO ingesta")
+                    raise
+                finally:
+                    self.connection.execute("RELEASE ingesta")
+            return counts
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ No se pudo guardar en el historial '{self.path}': {str(e)}")
+            return [None for _ in frames]
+
+    def _upsert(self, df, key_hash, content_hash, occurrence, sources):
+        now = datetime.now().isoformat(timespec="seconds")
+        values = table_values(df)
+        columns = [key_hash.tolist(), content_hash.tolist(), occurrence.tolist()]
+        columns += [values[name] for name in TABLE_COLUMNS.values()]
+        columns.append(sources.tolist())
+        self.connection.executemany(
+            """
+            INSERT INTO lineas (clave, contenido, aparicion, drogueria, cuenta, comprobante, codigo_barras,
+                                fecha, descripcion, cantidad, iva, precio, archivo, ingresada, actualizada)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (clave) DO UPDATE SET
+                contenido = excluded.contenido, fecha = excluded.fecha, descripcion = excluded.descripcion,
+                cantidad = excluded.cantidad, iva = excluded.iva, precio = excluded.precio,
+                archivo = excluded.archivo, actualizada = excluded.actualizada
+            """,
+            (row + (now, now) for row in zip(*columns)),
+        )
+
+    def iter_lines(self, drogueria=None, cuenta=None, desde=None, hasta=None, chunksize=100_000):
+        """
+        Recorre las líneas guardadas (en el orden en que se ingresaron) como DataFrames
+        con la salida estándar, por ejemplo para exportarlas con OUTPUT_SINKS sin volver
+        a procesar los archivos.
+
+        Parámetros:
+            drogueria (str | None): Solo las líneas de esta droguería.
+            cuenta (int | str | None): Solo las líneas de esta cuenta.
+            desde (str | None): Fecha mínima, YYYY-MM-DD.
+            hasta (str | None): Fecha máxima, YYYY-MM-DD.
+            chunksize (int): Filas por DataFrame.
+
+        Retorna:
+            Generator[pd.DataFrame]: Bloques con las columnas y los tipos de OUTPUT_SCHEMA.
+        """
+        where, params = _where(drogueria, cuenta, desde, hasta)
+        names = [TABLE_COLUMNS[col] for col in OUTPUT_SCHEMA]
+        cursor = self.connection.execute(f"SELECT {', '.join(names)} FROM lineas {where} ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                return
+            df = pd.DataFrame.from_records(rows, columns=list(OUTPUT_SCHEMA))
+            df["Fecha"] = pd.to_datetime(df["Fecha"], format="%Y-%m-%d")
+            df["Nro de Cuenta"] = df["Nro de Cuenta"].map(_account)
+            yield pd.DataFrame({col: conform_column(col, df[col], len(df)) for col in OUTPUT_SCHEMA})
+
+    def read_lines(self, **filters):
+        """
+        Igual que iter_lines, pero retorna todas las líneas en un solo DataFrame.
+        """
+        return concat_frames(list(self.iter_lines(**filters)))
+
+    def count_lines(self, drogueria=None, cuenta=None, desde=None, hasta=None):
+        """
+        Cantidad de líneas guardadas con los filtros de iter_lines.
+        """
+        where, params = _where(drogueria, cuenta, desde, hasta)
+        return self.connection.execute(f"SELECT COUNT(*) FROM lineas {where}", params).fetchone()[0]
+
+    def lines(self, **filters):
+        """
+        Retorna las líneas con los filtros de iter_lines como HistoryLines, que se puede
+        pasar a merge_and_save en lugar de los DataFrames procesados.
+        """
+        return HistoryLines(self, filters)
+
+
+class HistoryLines:
+    """
+    Líneas del historial que se pueden recorrer más de una vez (cada recorrido vuelve
+    a consultar la base), como un SpillFile: rows tiene el total de filas.
+    """
+
+    def __init__(self, history, filters):
+        self.history = history
+        self.filters = filters
+        self.rows = history.count_lines(**filters)
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        return self.history.iter_lines(**self.filters)
+
+    def items(self):
+        """
+        Recorre los DataFrames como pares (archivo, DataFrame), como SpillFile.items().
+        Todas las líneas cuentan como un solo archivo: las claves son únicas en el
+        historial y sus apariciones se ingresaron en orden, así que al contarlas de
+        nuevo se obtienen las guardadas.
+        """
+        for df in self:
+            yield None, df
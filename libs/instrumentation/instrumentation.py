@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from libs.builder.progress import report_stage
+
+# Nombre del logger raíz de la aplicación (los módulos usan loggers hijos)
+LOGGER_NAME = "normalizador"
+
+# Variables de entorno: nivel de los mensajes y medición de etapas ("0" la desactiva)
+LOG_LEVEL_ENV = "NORMALIZADOR_LOG_LEVEL"
+INSTRUMENTATION_ENV = "NORMALIZADOR_INSTRUMENTATION"
+
+_enabled = os.environ.get(INSTRUMENTATION_ENV, "1") != "0"
+_active = threading.local()  # Lista donde se registran las etapas del archivo en curso
+
+logger = logging.getLogger(f"{LOGGER_NAME}.stages")
+
+
+def get_logger(name=None):
+    """
+    Retorna el logger de la aplicación, o uno hijo para el módulo indicado.
+    """
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+def configure_logging(level=None):
+    """
+    Muestra los mensajes de la aplicación en la consola (solo el texto, como antes
+    con print). Se puede llamar más de una vez: no duplica el handler.
+
+    Parámetros:
+        level (int | str | None): Nivel mínimo. Si es None se toma de NORMALIZADOR_LOG_LEVEL
+            (por defecto INFO; DEBUG muestra además la duración de cada etapa).
+    """
+    root = get_logger()
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_ENV, "INFO").upper()
+    root.setLevel(level)
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        root.addHandler(handler)
+        root.propagate = False
+
+
+def set_enabled(enabled):
+    """
+    Activa o desactiva la medición de etapas (el avance y la cancelación siguen funcionando).
+    """
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled():
+    return _enabled
+
+
+class StageTimer:
+    """
+    Medición de una etapa: filas de entrada, filas de salida y duración.
+    Quien ejecuta la etapa completa rows_out antes de salir del bloque with.
+    """
+
+    __slots__ = ("name", "rows_in", "rows_out", "seconds")
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.seconds = None
+
+    def as_dict(self):
+        return {"stage": self.name, "rows_in": self.rows_in, "rows_out": self.rows_out, "seconds": self.seconds}
+
+
+@contextmanager
+def collect_stages():
+    """
+    Registra en una lista las etapas que se ejecuten en el hilo actual dentro del bloque
+    (normalmente, las de un archivo).
+
+    Retorna:
+        list[dict]: Lista (que se completa al ejecutar las etapas) con "stage", "rows_in",
+        "rows_out" y "seconds" de cada una.
+    """
+    previous = getattr(_active, "stages", None)
+    stages = []
+    _active.stages = stages
+    try:
+        yield stages
+    finally:
+        _active.stages = previous
+
+
+@contextmanager
+def timed_stage(name, rows_in=None):
+    """
+    Mide una etapa de normalización. Al terminar la registra (si la medición está
+    activa), la muestra en el log con nivel DEBUG e informa el avance con report_stage,
+    que además detiene el procesamiento si se pidió cancelar.
+
+    Ejemplo:
+        with timed_stage("Filtrado", rows_in=len(df)) as stage:
+            df = ...
+            stage.rows_out = len(df)
+    """
+    timer = StageTimer(name, rows_in)
+    start = time.perf_counter()
+    yield timer
+    timer.seconds = time.perf_counter() - start
+    if _enabled:
+        stages = getattr(_active, "stages", None)
+        if stages is not None:
+            stages.append(timer.as_dict())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"⏱️ {name}: {timer.rows_in} -> {timer.rows_out} filas en {timer.seconds:.3f}s")
+    report_stage(name, timer.rows_out)
+
+
+def build_profile(results):
+    """
+    Arma el perfil de tiempos de una ejecución a partir de los resultados por archivo
+    (de process_files o stream_files).
+
+    Retorna:
+        dict: {"files": [...], "stages": {proveedor: {etapa: totales}}} con la duración,
+        las filas y las etapas de cada archivo, y los totales por proveedor y etapa.
+    """
+    files = []
+    totals = {}
+    for result in results:
+        stages = result.get("stages") or []
+        files.append({
+            "path": result.get("path"),
+            "provider": result.get("provider"),
+            "seconds": round(result.get("seconds") or 0.0, 6),
+            "cached": result.get("cached", False),
+            "error": result.get("error"),
+            "stages": [dict(stage, seconds=round(stage["seconds"], 6)) for stage in stages],
+        })
+        by_stage = totals.setdefault(result.get("provider"), {})
+        for stage in stages:
+            total = by_stage.setdefault(stage["stage"], {"calls": 0, "seconds": 0.0, "rows_in": 0, "rows_out": 0})
+            total["calls"] += 1
+            total["seconds"] += stage["seconds"]
+            total["rows_in"] += stage["rows_in"] or 0
+            total["rows_out"] += stage["rows_out"] or 0
+    for by_stage in totals.values():
+        for total in by_stage.values():
+            total["seconds"] = round(total["seconds"], 6)
+    return {"files": files, "stages": totals}
+
+
+def write_profile(results, path):
+    """
+    Guarda el perfil de tiempos de la ejecución (ver build_profile) en un JSON.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(build_profile(results), f, ensure_ascii=False, indent=2, default=str)
+    get_logger().info(f"⏱️ Perfil de tiempos guardado en {path}")
@@ -1,241 +1,187 @@
+import numpy as np
 import pandas as pd
 import os, csv
-from io import StringIO
+from libs.comprobante.comprobante import format_comprobantes
+from libs.dates.dates import parse_dates
+from libs.sniffer.sniffer import sniff_file
+from libs.instrumentation.instrumentation import get_logger
 
-def read_file(filepath):
+logger = get_logger(__name__)
+
+
+# Los registros 'D' (detalle) tienen 17 campos; los 'C' e 'I' tienen menos
+EXPECTED_COLUMNS = 17
+COLUMN_NAMES = [f'col{i+1}' for i in range(EXPECTED_COLUMNS)]
+
+
+def _read_options(filepath, dtype, usecols=None):
+    """
+    Detecta el formato con el comienzo del archivo y arma las opciones de read_csv.
+    Al indicar los nombres de las 17 columnas, las filas más cortas se completan con
+    vacíos (no hace falta completar la primera línea).
+
+    Lanza:
+        ValueError: Si no se pudo determinar el delimitador.
+    """
+    detected = sniff_file(filepath, default_encoding="utf-8")
+    if detected.delimiter is None:
+        raise ValueError(f"❌ No se pudo determinar un delimitador válido en '{filepath}'.")
+    return dict(delimiter=detected.delimiter,
+                quoting=csv.QUOTE_NONE,
+                encoding=detected.encoding,
+                on_bad_lines='skip',
+                header=None,
+                names=COLUMN_NAMES,
+                usecols=[COLUMN_NAMES[i] for i in usecols] if usecols is not None else None,
+                dtype={COLUMN_NAMES[i]: t for i, t in dtype.items()} if dtype else None,
+                engine="c")
+
+
+def _select(df, usecols):
+    # Dejar vacías las columnas no pedidas para mantener las posiciones
+    if usecols is None:
+        return df
+    return df[[COLUMN_NAMES[i] for i in usecols]].reindex(columns=COLUMN_NAMES)
+
+
+def read_file(filepath, usecols=None, dtype=None):
     """
     Lee archivos .dat, .txt o .csv con delimitadores como tabulación, coma, punto y coma, barra vertical o espacio.
+    El archivo se parsea una sola vez desde el disco (ver sniff_file).
+
+    Si se indica usecols, solo se parsean esas columnas; las demás se devuelven vacías
+    para conservar las posiciones que usa el resto del pipeline.
     
     Parámetros:
         filepath (str): Ruta del archivo a procesar.
+        usecols (list[int] | None): Posiciones de las columnas a leer. Si es None se leen todas.
+        dtype (dict[int, type] | None): Tipos explícitos por posición de columna.
 
     Retorna:
         pandas.DataFrame: Contenido del archivo en un DataFrame si la lectura es exitosa.
         pandas.DataFrame: DataFrame vacío en caso de error.
     """
     try:
-        # Leer todas las líneas del archivo
-        with open(filepath, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        # Detectar delimitador usando la primera línea (incluyendo "\t")
-        first_line = lines[0].strip()
-        delimiters = ["\t", ",", ";", "|", " "]
-        detected_delimiter = None
-        for delim in delimiters:
-            if delim in first_line:
-                detected_delimiter = delim
-                break
-
-        if not detected_delimiter:
-            print(f"Error: No se pudo determinar un delimitador válido en '{filepath}'.")
-            return pd.DataFrame()
-
-        # Definir el número de columnas esperado (en este ejemplo, 17)
-        expected_columns = 17
-        col_names = [f'col{i+1}' for i in range(expected_columns)]
-
-        # Revisar la cantidad de campos en la primera línea
-        fields = first_line.split(detected_delimiter)
-        if len(fields) < expected_columns:
-            missing = expected_columns - len(fields)
-            # Agregar al final de la primera línea la cantidad de delimitadores necesarios
-            new_first_line = first_line + (detected_delimiter * missing)
-            lines[0] = new_first_line + "\n"
-            print(f"Se agregaron {missing} delimitadores en la primera fila para alcanzar {expected_columns} columnas.")
-
-        # Reunir el contenido modificado
-        new_content = ''.join(lines)
-
-        # Leer el contenido corregido con pandas
-        df = pd.read_csv(StringIO(new_content),
-                         delimiter=detected_delimiter,
-                         quoting=csv.QUOTE_NONE,
-                         encoding="utf-8",
-                         on_bad_lines='skip',
-                         header=None,
-                         names=col_names)
-
-        return df
-
+        return _select(pd.read_csv(filepath, **_read_options(filepath, dtype, usecols)), usecols)
     except Exception as e:
-        print(f"Error al leer el archivo '{filepath}': {e}")
+        logger.error(f"Error al leer el archivo '{filepath}': {e}")
         return pd.DataFrame()
 
 
-def format_fourth_column(df):
+def read_file_chunks(filepath, chunksize, usecols=None, dtype=None):
     """
-    Modifica la cuarta columna del DataFrame en las filas donde la primera columna sea 'D'.
-    El formato de la cuarta columna se transforma de '0307A04304132' a 'FC A 0307-04304132'.
-
-    Parámetros:
-        df (pd.DataFrame): DataFrame sin headers.
+    Igual que read_file, pero lee el archivo por bloques de `chunksize` filas.
 
     Retorna:
-        pd.DataFrame: DataFrame con la cuarta columna modificada donde corresponda.
+        Iterator[pd.DataFrame]: Bloques del archivo, con las mismas columnas que read_file.
+
+    Lanza:
+        ValueError: Si no se pudo determinar el delimitador.
     """
-    def transform_value(value):
-        """Convierte '0307A04304132' en 'FC A 0307-04304132'."""
-        value = str(value).strip()
-        if len(value) >= 12:
-            tipo_factura = value[4]  # Extraer la letra (tipo de factura)
-            parte1 = value[:4]  # Primer segmento numérico
-            parte2 = value[5:]  # Segundo segmento numérico (después de la letra)
-            return f"FC {tipo_factura} {parte1}-{parte2}"
-        return value  # Si no cumple la condición, deja el valor igual
-
-    # Aplicar transformación solo en las filas donde la primera columna sea 'D'
-    df.iloc[:, 3] = df.apply(lambda row: transform_value(row.iloc[3]) if row.iloc[0] == "D" else row.iloc[3], axis=1)
+    # usecols no se pasa a read_csv: falla en los bloques cuyas filas tienen menos
+    # campos que las columnas pedidas (por ejemplo, un bloque solo de registros 'I')
+    reader = pd.read_csv(filepath, chunksize=chunksize, **_read_options(filepath, dtype))
+    with reader:
+        for chunk in reader:
+            yield _select(chunk, usecols)
 
-    return df
 
-def adjust_price_and_iva(df):
+def format_comprobante_column(comprobantes):
     """
-    Modifica las columnas 12 y 14 en las filas donde la primera columna sea 'D':
-    - Si la columna 12 (índice 11) es 1:
-        * Se cambia a 21 (IVA del 21%).
-        * La columna 14 (índice 13) se ajusta dividiéndola por 1.21 y redondeándola a 2 decimales.
-    - Si la columna 12 es 0, no se hacen modificaciones en cuanto a IVA.
-    - Finalmente, la columna 14 (índice 13) se divide por 100.
-    
+    Transforma los números de factura de los detalles de '0307A04304132' a
+    'FC A 0307-04304132' y valida el resultado.
+
     Parámetros:
-        df (pd.DataFrame): DataFrame sin headers.
+        comprobantes (pd.Series): Cuarta columna de los registros 'D'.
 
     Retorna:
-        pd.DataFrame: DataFrame con las columnas modificadas donde corresponda.
+        pd.Series: Comprobantes formateados.
     """
-    def adjust_values(row):
-        if row.iloc[0] == "D":
-            if row.iloc[11] == 1:  # La columna 12 es el índice 11
-                row.iloc[11] = 21  # Cambiar indicador de IVA a 21%
-                row.iloc[13] = round(row.iloc[13] / 1.21, 2)  # Ajustar precio sin IVA
-            # Al final, dividir la columna 14 (índice 13) por 100
-            row.iloc[13] = row.iloc[13] / 100
-        return row
-
-    df = df.apply(adjust_values, axis=1)
-    return df
+    return format_comprobantes(comprobantes, letter_position=4, validate=True)
 
 
-
-def format_and_propagate_date(df):
+def iva_percentage(iva):
     """
-    - En las filas donde la primera columna sea 'C', toma la fecha de la columna 15 (índice 14),
-      la convierte de 'YYYYMMDD' a 'DD/MM/YYYY'.
-    - Propaga esta fecha formateada a todas las filas donde la primera columna sea 'D'.
-    - Corrige la estructura de las filas si tienen una cantidad desigual de columnas.
+    Convierte el indicador de IVA de los detalles en porcentaje: 1 pasa a 21 (IVA del 21%)
+    y 0 queda igual. Conserva el dtype de la columna.
 
     Parámetros:
-        df (pd.DataFrame): DataFrame sin headers.
+        iva (pd.Series): Columna 12 (índice 11) de los registros 'D'.
 
     Retorna:
-        pd.DataFrame: DataFrame con la nueva columna de fecha formateada (será la columna 18).
+        pd.Series: Porcentaje de IVA.
     """
-    
-    def transform_date(value):
-        """Convierte '20250207' (o '20250207.0') en '07/02/2025'."""
-        try:
-            value_int = int(float(value))
-            value_str = str(value_int).zfill(8)
-            año, mes, dia = value_str[:4], value_str[4:6], value_str[6:]
-            return f"{dia}/{mes}/{año}"
-        except Exception as e:
-            return ""
-
-    # Paso 1: Asegurarse de que todas las filas tengan la misma cantidad de columnas
-    max_cols = df.shape[1]
-    df = df.copy()
-    df.reset_index(drop=True, inplace=True)
-    
-    # Normalizar cada fila (rellena con cadenas vacías si la fila tiene menos columnas)
-    df = df.apply(lambda row: row.tolist() + [""] * (max_cols - len(row)), axis=1)
-    df = pd.DataFrame(df.tolist())
-    
-    # Paso 2: Asignar nombres genéricos a las columnas
-    headers = [f"col_{i}" for i in range(df.shape[1])]
-    df.columns = headers
-
-    # Verificar que la columna con la fecha (col_14) existe
-    if "col_14" not in df.columns:
-        raise KeyError("❌ Error: La columna con la fecha (col_14) no está presente en el DataFrame.")
-
-    # Paso 3: Crear la columna "Fecha Formateada" (será la columna 18)
-    df["Fecha Formateada"] = ""
-
-    # Variable para guardar la última fecha formateada encontrada en filas tipo 'C'
-    last_date = ""
-
-    # Depuración: Mostrar las primeras filas antes de procesar las fechas
-    print("📊 DataFrame antes de procesar fechas:")
-    print(df.head(10))
-
-    for index, row in df.iterrows():
-        if pd.isna(row["col_0"]):
-            continue  # Saltar filas vacías
-        if str(row["col_0"]).strip() == "C":
-            # Tomar la fecha de la columna 15 (índice 14)
-            fecha_valor = str(row["col_14"]).strip()
-            last_date = transform_date(fecha_valor)
-            df.at[index, "Fecha Formateada"] = last_date
-        elif str(row["col_0"]).strip() == "D" and last_date:
-            # Propagar la última fecha encontrada en filas tipo 'C'
-            df.at[index, "Fecha Formateada"] = last_date
-
-    df["Fecha Formateada"] = pd.to_datetime(df["Fecha Formateada"], format="%d/%m/%Y", errors="coerce")
-
-    # Depuración: Mostrar resultados parciales
-    print("📆 DataFrame después de procesar fechas:")
-    print(df[["col_0", "col_14", "Fecha Formateada"]].head(10))
-
-    return df
-
+    return iva.mask(iva == 1, 21)
 
 
-def exclude_rows_with_values(df, column_index, values_to_exclude):
+def cost_without_iva(costo, iva):
     """
-    Conserva solo las filas en las que la columna especificada contiene los valores indicados.
+    Calcula el precio de costo de los detalles a partir de la columna 14 (índice 13):
+    - Si el indicador de IVA es 1, se divide por 1.21 y se redondea a 2 decimales.
+    - Finalmente, se divide por 100.
+
+    El cálculo se hace por columnas con máscaras booleanas (sin recorrer filas).
 
     Parámetros:
-        df (pd.DataFrame): DataFrame sin headers.
-        column_index (int): Índice de la columna donde se buscarán los valores permitidos.
-        values_to_exclude (list): Lista de valores que se desean conservar en la columna.
+        costo (pd.Series): Columna 14 (índice 13) de los registros 'D'.
+        iva (pd.Series): Indicador de IVA original (columna 12, índice 11).
 
     Retorna:
-        pd.DataFrame: DataFrame con solo las filas que contienen los valores especificados en la columna.
+        pd.Series: Precio de costo sin IVA.
     """
-    if column_index >= df.shape[1]:
-        raise ValueError(f"❌ El índice de columna '{column_index}' está fuera del rango del DataFrame ({df.shape[1]} columnas).")
-
-    # Conservar solo las filas donde la columna contenga alguno de los valores permitidos
-    df_filtered = df[df.iloc[:, column_index].isin(values_to_exclude)].reset_index(drop=True)
-    
-    return df_filtered
-
+    costo = costo.mask(iva == 1, (costo / 1.21).round(2))
+    return costo / 100
 
 
-
-def assign_headers(df, headers):
+def format_and_propagate_date(df, state=None):
     """
-    Asigna nombres de columnas a un DataFrame sin headers, asegurando alineación correcta.
+    - En las filas donde la primera columna sea 'C', toma la fecha de la columna 15 (índice 14),
+      la convierte de 'YYYYMMDD' a fecha.
+    - Propaga esta fecha a todas las filas 'D' que siguen a esa cabecera.
+    - Si la cabecera no tiene una fecha válida, sus detalles quedan sin fecha (NaT).
+    - Al procesar por bloques, las filas 'D' anteriores a la primera cabecera toman la
+      fecha de la última cabecera del bloque anterior (state["fecha"]), y state se
+      actualiza con la última cabecera de este bloque.
+
+    Solo se parsean las fechas de las filas 'C'; la propagación se resuelve indexando
+    por el número de cabecera de cada fila, sin recorrer el DataFrame fila por fila.
 
     Parámetros:
-        df (pd.DataFrame): DataFrame sin nombres de columnas.
-        headers (list): Lista de nombres de columnas en el orden correcto.
+        df (pd.DataFrame): DataFrame sin headers.
+        state (dict | None): Estado que se arrastra entre bloques (None: archivo completo).
 
     Retorna:
-        pd.DataFrame: DataFrame con los headers asignados.
+        pd.DataFrame: El mismo DataFrame con la columna 'Fecha Formateada' agregada al final.
     """
-    if df.empty:
-        raise ValueError("❌ El DataFrame está vacío y no se pueden asignar headers.")
-
-    if len(headers) != df.shape[1]:
-        raise ValueError(f"❌ El número de headers ({len(headers)}) no coincide con las columnas del DataFrame ({df.shape[1]}).")
-
-    # Reiniciar índices en caso de desplazamiento
-    df = df.reset_index(drop=True)
-
-    # Reasignar nombres de columna correctamente
-    df.columns = headers
+    # Verificar que la columna con la fecha (índice 14) existe
+    if df.shape[1] <= 14:
+        raise KeyError("❌ Error: La columna con la fecha (índice 14) no está presente en el DataFrame.")
+
+    tipo = df.iloc[:, 0].astype(str).str.strip()
+    es_cabecera = (tipo == "C").to_numpy()
+    es_detalle = (tipo == "D").to_numpy()
+
+    # Convertir '20250207' (o '20250207.0') de las cabeceras a fecha; las inválidas quedan en NaT
+    valores = pd.to_numeric(df.iloc[es_cabecera, 14], errors="coerce")
+    validos = valores[np.isfinite(valores)]
+    fechas_cabecera = parse_dates(
+        validos.astype("int64"), format="%Y%m%d", prepare=lambda fechas: fechas.astype(str).str.zfill(8)
+    )
+    fechas_cabecera = fechas_cabecera.reindex(valores.index).to_numpy(dtype="datetime64[ns]")
+
+    # Tabla de fechas por cabecera: la posición 0 corresponde a filas previas a la primera 'C'
+    fecha_inicial = state.get("fecha") if state is not None else None
+    inicial = np.datetime64("NaT", "ns") if pd.isna(fecha_inicial) else np.datetime64(fecha_inicial, "ns")
+    tabla = np.concatenate([[inicial], fechas_cabecera])
+    nro_cabecera = np.cumsum(es_cabecera)
+    fechas = tabla[nro_cabecera]
+
+    # Solo las filas 'C' y 'D' llevan fecha
+    fechas[~(es_cabecera | es_detalle)] = np.datetime64("NaT", "ns")
+    df["Fecha Formateada"] = fechas
+
+    # Arrastrar la fecha de la última cabecera al bloque siguiente
+    if state is not None and len(fechas_cabecera):
+        state["fecha"] = fechas_cabecera[-1]
 
     return df
-
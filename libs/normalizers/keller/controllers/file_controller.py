@@ -1,6 +1,16 @@
+import numpy as np
 import pandas as pd
-import os, csv
-from io import StringIO
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from libs.comprobante.comprobante import format_comprobantes
+from libs.dates.dates import parse_dates, DATE_FORMAT
+from libs.normalizers.keller.controllers.header import POSSIBLE_SEPS, header_columns
+from libs.sniffer.sniffer import sniff_bytes, sniff_file
+from libs.instrumentation.instrumentation import get_logger
+
+logger = get_logger(__name__)
+
 
 def format_column(value):
     """
@@ -12,20 +22,92 @@ def format_column(value):
     Retorna:
         str: Valor formateado 'FC A 0018-0225101'.
     """
-    value = str(value).strip()
-    if len(value) >= 12:
-        letra = value[0]   # Primera letra
-        parte1 = value[1:5]  # Primer segmento numérico
-        parte2 = value[5:]   # Segundo segmento numérico
-        return f"FC {letra} {parte1}-{parte2}"
-    return value  # Si no cumple la condición, deja el valor igual
+    return format_comprobantes(pd.Series([value]), letter_position=0, validate=True).iloc[0]
+
+
+# Cabeceras que deben tener los archivos de keller
+EXPECTED_HEADERS = ["Fecha", "CodBarra", "Producto", "Cantidad", "Precio Público", "Precio Unit.", "Importe", "Faltas"]
+
+# Hilos para leer del disco las facturas de una carpeta
+READ_THREADS = 4
+
+
+# Opciones de read_csv para los datos (sin la cabecera). Los importes vienen en
+# formato argentino (1.234,56): se convierten al leer
+DATA_OPTIONS = dict(engine='c', on_bad_lines='skip', header=None, skip_blank_lines=True, decimal=",", thousands=".")
+
+
+def _barcode_dtype(header_parts, offset=0):
+    # El código de barras se lee como texto (sin pasar por float ni perder ceros)
+    if "CodBarra" not in header_parts:
+        return None
+    return {header_parts.index("CodBarra") + offset: str}
+
+
+def _check_headers(header_parts):
+    missing = [col for col in EXPECTED_HEADERS if col not in header_parts]
+    if missing:
+        raise ValueError(f"❌ Error: Faltan las siguientes columnas: {missing}. Columnas detectadas: {header_parts}")
+
+
+def read_invoice(file_path):
+    """
+    Lee un archivo de factura de keller y valida sus cabeceras, sin convertir las
+    fechas ni agregar el comprobante. Se reconstruye el DataFrame si existe un
+    separador extra al inicio de la cabecera.
+
+    Parámetros:
+        file_path (str): Ruta del archivo CSV.
+
+    Retorna:
+        pd.DataFrame: Contenido del archivo con las columnas de la cabecera.
+
+    Lanza:
+        ValueError: Si el archivo no existe, no tiene las cabeceras esperadas o está vacío.
+    """
+    if not os.path.isfile(file_path):
+        raise ValueError(f"❌ El path proporcionado no es un archivo válido: {file_path}")
+
+    # Detectar el encoding y el separador con el comienzo del archivo
+    detected = sniff_file(file_path, delimiters=POSSIBLE_SEPS, default_encoding="utf-8")
+    if detected.delimiter is None:
+        raise ValueError("❌ No se pudo detectar el separador en la cabecera.")
+    header_parts = header_columns(detected)
+
+    # Leer los datos (sin la cabecera) una sola vez desde el disco
+    candidate_df = pd.read_csv(file_path, sep=detected.delimiter, encoding=detected.encoding, skiprows=1,
+                               dtype=_barcode_dtype(header_parts), **DATA_OPTIONS)
+
+    # Si se leyeron más columnas que las cabecera, revisar si las columnas extra están vacías
+    if candidate_df.shape[1] > len(header_parts):
+        extra_cols = candidate_df.columns[len(header_parts):]
+        if candidate_df[extra_cols].isnull().all().all():
+            candidate_df = candidate_df.iloc[:, :len(header_parts)]
+        else:
+            raise ValueError("Mismatch entre la cabecera y las columnas de datos")
+    elif candidate_df.shape[1] < len(header_parts):
+        raise ValueError("El número de columnas de datos es menor que el número de encabezados detectados.")
+
+    df = candidate_df
+    df.columns = header_parts
+    _check_headers(header_parts)
+
+    if df.empty:
+        raise ValueError("❌ El DataFrame está vacío tras leer el archivo.")
+    return df
+
+
+def comprobante_from_path(file_path):
+    """
+    Retorna el comprobante sin formato a partir del nombre del archivo (ej.: 'A00180225101').
+    """
+    return os.path.splitext(os.path.basename(file_path))[0]
 
 
 def process_file(file_path):
     """
     Procesa un archivo CSV, extrayendo el "número comprobante" basado en el nombre del archivo,
-    y añadiendo la columna "numero comprobante" al DataFrame. Se valida que el archivo contenga
-    las cabeceras esperadas y se reconstruye el DataFrame si existe un separador extra al inicio.
+    y añadiendo la columna "numero comprobante" al DataFrame (ver read_invoice).
 
     Cabeceras esperadas:
         Fecha, CodBarra, Producto, Cantidad, Precio Público, Precio Unit., Importe, Faltas
@@ -37,90 +119,162 @@ def process_file(file_path):
         pd.DataFrame: DataFrame del archivo CSV con la columna "numero comprobante".
                       En caso de error, retorna un DataFrame vacío.
     """
-    expected_headers = ["Fecha", "CodBarra", "Producto", "Cantidad", "Precio Público", "Precio Unit.", "Importe", "Faltas"]
-    possible_seps = [",", "\t", ";"]
-    encoding_used = "utf-8-sig"
-    
-    if not os.path.isfile(file_path):
-        raise ValueError(f"❌ El path proporcionado no es un archivo válido: {file_path}")
-    
     try:
-        # Leer el contenido completo del archivo como texto
-        with open(file_path, encoding=encoding_used) as f:
-            content = f.read()
-        
-        # Separar las líneas
-        lines = content.splitlines()
-        if not lines:
-            raise ValueError("El archivo está vacío.")
-        
-        # Detectar la cabecera
-        header_line = lines[0].lstrip('\ufeff').strip()
-        detected_sep = None
-        for sep in possible_seps:
-            parts = header_line.split(sep)
-            if len(parts) > 1:
-                detected_sep = sep
-                break
-        
-        if detected_sep is None:
-            raise ValueError("❌ No se pudo detectar el separador en la cabecera.")
-        
-        # Obtener las partes del header y descartar un elemento vacío inicial si existe
-        header_parts = [h.strip() for h in header_line.split(detected_sep)]
-        if header_parts[0] == "":
-            header_parts = header_parts[1:]
-        
-        # Reconstruir el DataFrame usando el contenido restante
-        data = "\n".join(lines[1:])
-        candidate_df = pd.read_csv(StringIO(data), sep=detected_sep, engine='python', on_bad_lines='skip', header=None)
-        
-        # Si se leyeron más columnas que las cabecera, revisar si las columnas extra están vacías
-        if candidate_df.shape[1] > len(header_parts):
-            extra_cols = candidate_df.columns[len(header_parts):]
-            if candidate_df[extra_cols].isnull().all().all():
-                candidate_df = candidate_df.iloc[:, :len(header_parts)]
-            else:
-                raise ValueError("Mismatch entre la cabecera y las columnas de datos")
-        elif candidate_df.shape[1] < len(header_parts):
-            raise ValueError("El número de columnas de datos es menor que el número de encabezados detectados.")
-        
-        df = candidate_df.copy()
-        df.columns = header_parts
-        
-        missing = [col for col in expected_headers if col not in df.columns]
-        if missing:
-            raise ValueError(f"❌ Error: Faltan las siguientes columnas: {missing}. Columnas detectadas: {list(df.columns)}")
-        
-        if df.empty:
-            raise ValueError("❌ El DataFrame está vacío tras leer el archivo.")
-        
-        # Extraer el número comprobante a partir del nombre del archivo
-        file_name = os.path.basename(file_path)
-        comprobante_raw = os.path.splitext(file_name)[0]  # Elimina la extensión .csv
-        comprobante_formateado = format_column(comprobante_raw)  # Función auxiliar que debes definir
-        
-        # Añadir la columna "numero comprobante" al DataFrame
-        df["numero comprobante"] = comprobante_formateado
-        
+        df = read_invoice(file_path)
+
+        # Las fechas vienen como d/m/yyyy (día primero)
+        df["Fecha"] = parse_dates(df["Fecha"], format=DATE_FORMAT)
+
+        # Añadir la columna "numero comprobante" a partir del nombre del archivo
+        df["numero comprobante"] = format_column(comprobante_from_path(file_path))
+
         return df
 
     except Exception as e:
-        print(f"Error al procesar el archivo '{file_path}': {str(e)}")
+        logger.error(f"Error al procesar el archivo '{file_path}': {str(e)}")
         return pd.DataFrame()
-    
 
-def add_iva_column(df, column_name="IVA", default_value=0):
+
+def _read_bytes(file_path):
+    try:
+        with open(file_path, "rb") as f:
+            return f.read(), None
+    except OSError as e:
+        return None, str(e)
+
+
+def _parse_group(contents, positions, detected):
+    """
+    Parsea juntos los datos de varios archivos con la misma cabecera. Cada línea se
+    marca con la posición de su archivo (primera columna, "archivo").
+
+    Retorna:
+        tuple[pd.DataFrame, dict[int, str]]: Filas de los archivos cuyas líneas se
+        pudieron asignar sin ambigüedad, y los archivos que hay que leer por separado
+        (posición -> motivo).
+    """
+    delimiter = detected.delimiter.encode("ascii")  # Los separadores posibles son ASCII
+    header_parts = header_columns(detected)
+    parts = []
+    expected_rows = {}
+    for position in positions:
+        data = contents[position].split(b"\n", 1)[1] if b"\n" in contents[position] else b""
+        lines = [line for line in data.split(b"\n") if line.strip()]
+        expected_rows[position] = len(lines)
+        if lines:
+            tag = str(position).encode() + delimiter
+            parts.append(tag + (b"\n" + tag).join(lines) + b"\n")
+
+    retry = {}
+    if not parts:
+        return pd.DataFrame(columns=["archivo"] + EXPECTED_HEADERS), retry
+    df = pd.read_csv(BytesIO(b"".join(parts)), sep=detected.delimiter, encoding=detected.encoding,
+                     dtype=_barcode_dtype(header_parts, offset=1), **DATA_OPTIONS)
+    df = df.rename(columns={0: "archivo"})
+
+    # Los archivos con líneas descartadas (más campos que el primero del grupo) se leen
+    # por separado, igual que si vinieran solos
+    counts = df["archivo"].value_counts()
+    for position, rows in expected_rows.items():
+        if counts.get(position, 0) != rows:
+            retry[position] = "cantidad de filas distinta"
+
+    data_columns = df.shape[1] - 1
+    if data_columns > len(header_parts):
+        extra = df.iloc[:, 1 + len(header_parts):]
+        for position in df.loc[extra.notna().any(axis=1).to_numpy(), "archivo"].unique():
+            retry[int(position)] = "columnas extra con datos"
+        df = df.iloc[:, :1 + len(header_parts)]
+    elif data_columns < len(header_parts):
+        retry.update((position, "menos columnas que la cabecera") for position in expected_rows)
+        return pd.DataFrame(columns=["archivo"] + EXPECTED_HEADERS), retry
+
+    df.columns = ["archivo"] + header_parts
+    if retry:
+        df = df[~df["archivo"].isin(list(retry))]
+    return df[["archivo"] + EXPECTED_HEADERS], retry
+
+
+def read_invoices(file_paths, max_workers=READ_THREADS):
     """
-    Añade una nueva columna con un valor por defecto a un DataFrame.
+    Lee juntas varias facturas de keller (por ejemplo, las de una carpeta) y las
+    combina en un solo DataFrame. Los archivos se leen del disco en un pool de hilos,
+    y los que tienen la misma cabecera se parsean en una sola llamada a read_csv;
+    las fechas y los comprobantes se convierten una sola vez para todas las filas.
 
     Parámetros:
-        df (pd.DataFrame): DataFrame al que se añadirá la columna.
-        column_name (str): Nombre de la nueva columna (por defecto "IVA").
-        default_value (int/float): Valor por defecto para todas las filas (por defecto 0).
+        file_paths (list[str]): Rutas de los archivos.
+        max_workers (int): Hilos de lectura.
 
     Retorna:
-        pd.DataFrame: DataFrame con la nueva columna añadida.
+        tuple[pd.DataFrame | None, list[int], list[str | None]]: DataFrame combinado (None
+        si no se pudo leer ningún archivo), con las filas en el orden de los archivos y la
+        columna "numero comprobante", y por cada archivo, en el mismo orden, su cantidad
+        de filas y su error (None si se leyó bien).
     """
-    df[column_name] = default_value
-    return df
+    errors = [None] * len(file_paths)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(file_paths)))) as executor:
+        contents = list(executor.map(_read_bytes, file_paths))
+
+    # Agrupar los archivos por formato y cabecera
+    groups = {}
+    for position, (content, error) in enumerate(contents):
+        if error is not None:
+            errors[position] = error
+            continue
+        detected = sniff_bytes(content, delimiters=POSSIBLE_SEPS, default_encoding="utf-8")
+        if detected is None or detected.delimiter is None:
+            errors[position] = "❌ No se pudo detectar el separador en la cabecera." if detected else "El archivo está vacío."
+            continue
+        key = (detected.encoding, detected.delimiter, detected.first_line)
+        groups.setdefault(key, (detected, []))[1].append(position)
+
+    frames = []
+    retry = {}
+    for detected, positions in groups.values():
+        try:
+            _check_headers(header_columns(detected))
+        except ValueError as e:
+            for position in positions:
+                errors[position] = str(e)
+            continue
+        df, group_retry = _parse_group([content for content, _ in contents], positions, detected)
+        frames.append(df)
+        retry.update(group_retry)
+
+    # Archivos que no se pudieron leer junto con los demás: se leen de a uno
+    for position in retry:
+        try:
+            df = read_invoice(file_paths[position])[EXPECTED_HEADERS]
+        except Exception as e:
+            errors[position] = str(e)
+            continue
+        frames.append(df.assign(archivo=position)[["archivo"] + EXPECTED_HEADERS])
+
+    frames = [df for df in frames if not df.empty]
+    combined = pd.concat(frames, ignore_index=True) if frames else None
+    lengths = np.zeros(len(file_paths), dtype="int64")
+    if combined is not None:
+        if len(frames) > 1 or retry:
+            combined = combined.sort_values("archivo", kind="stable", ignore_index=True)
+        files = combined.pop("archivo").to_numpy(dtype="int64")
+        lengths = np.bincount(files, minlength=len(file_paths))
+
+    # Los archivos sin filas de datos fallan igual que al leerlos de a uno
+    for position, length in enumerate(lengths):
+        if errors[position] is None and length == 0:
+            errors[position] = "❌ El DataFrame está vacío tras leer el archivo."
+    for position, error in enumerate(errors):
+        if error is not None:
+            logger.error(f"Error al procesar el archivo '{file_paths[position]}': {error}")
+    if combined is None or combined.empty:
+        return None, lengths.tolist(), errors
+
+    combined["Fecha"] = parse_dates(combined["Fecha"], format=DATE_FORMAT)
+
+    # Un comprobante por archivo, repetido en todas sus filas
+    comprobantes = format_comprobantes(
+        pd.Series([comprobante_from_path(path) for path in file_paths]), letter_position=0, validate=True
+    )
+    combined["numero comprobante"] = comprobantes.to_numpy()[files]
+    return combined, lengths.tolist(), errors
@@ -0,0 +1,31 @@
+from libs.sniffer.sniffer import sniff_bytes
+
+# Separadores que aceptan los archivos de keller, en orden de preferencia
+POSSIBLE_SEPS = [",", "\t", ";"]
+
+
+def header_columns(detected):
+    """
+    Columnas de la cabecera de un archivo de keller (ver sniff_file), sin espacios
+    alrededor y sin el elemento vacío inicial que deja un separador al comienzo.
+    """
+    parts = [h.strip() for h in detected.first_line.strip().split(detected.delimiter)]
+    if parts[0] == "":
+        parts = parts[1:]
+    return parts
+
+
+def sniff_header(prefix):
+    """
+    Reconoce el separador en el comienzo de un archivo de keller (bytes) y retorna las
+    columnas de su cabecera, con las mismas reglas que al leerlo (ver read_invoice).
+    No usa pandas: el reconocimiento de archivos lo llama sin cargarlo.
+
+    Retorna:
+        list[str] | None: Columnas de la cabecera, o None si está vacío o la primera
+        línea no tiene ninguno de POSSIBLE_SEPS.
+    """
+    detected = sniff_bytes(prefix, delimiters=POSSIBLE_SEPS, default_encoding="utf-8")
+    if detected is None or detected.delimiter is None:
+        return None
+    return header_columns(detected)
@@ -1,41 +1,75 @@
-from controllers.file_controller import select_columns, add_user_columns, load_column_template_json, standardize_dataframe
-from libs.normalizers.keller.controllers.file_controller import  process_file, add_iva_column
-
-
-columns = [0,1,2,3,5,8]
-
-mapping = {
-    "numero comprobante": "Nro Comprobante",
-    "Fecha": "Fecha",
-    "Proveedor": "Drogueria",
-    "Cuenta": "Nro de Cuenta",
-    "CodBarra": "Codigo de Barras",
-    "Producto": "Descripcion",
-    "Cantidad": "Cantidad",
-    "IVA": "IVA (%)",
-    "Precio Unit.": "Precio Unitario"
+from libs.builder.progress import ProcessingCancelled
+from libs.normalizers.keller.controllers.file_controller import process_file, read_invoices
+from libs.instrumentation.instrumentation import timed_stage
+from libs.pipeline.pipeline import compile_spec, constant, PROVIDER, ACCOUNT
+
+# Cada archivo es una factura: el comprobante se toma del nombre del archivo
+spec = {
+    "name": "keller",
+    "read": process_file,
+    "columns": {
+        "Nro Comprobante": "numero comprobante",
+        "Fecha": "Fecha",
+        "Drogueria": PROVIDER,
+        "Nro de Cuenta": ACCOUNT,
+        "Codigo de Barras": "CodBarra",
+        "Descripcion": "Producto",
+        "Cantidad": "Cantidad",
+        # Los archivos de keller no informan el IVA
+        "IVA (%)": constant(0),
+        "Precio Unitario": "Precio Unit.",
+    },
 }
 
+pipeline = compile_spec(spec)
+
+
 def process_keller(fd, provider, account):
+    return pipeline.run(fd, provider, account)
+
+
+def process_keller_batch(paths, provider, account):
+    """
+    Procesa juntas varias facturas de keller: se leen todas (en un pool de hilos) y
+    se normalizan una sola vez sobre el DataFrame combinado, que luego se separa por archivo.
+
+    Si la normalización conjunta falla, cada archivo se procesa por separado para
+    saber cuáles son los que fallan.
 
-    # leemos y procesamos la carpeta:
-    fd_processed = process_file(fd)
-    print(fd_processed)
+    Parámetros:
+        paths (list[str]): Rutas de los archivos.
+        provider (str): Proveedor.
+        account (int/str): Cuenta.
 
-    # seleccionamos las columnas
-    df_col_selected = select_columns(fd_processed, columns)
-    print(df_col_selected)
+    Retorna:
+        list[tuple[pd.DataFrame | None, str | None]]: Por cada archivo, en el mismo orden,
+        su DataFrame estandarizado o el mensaje de error.
+    """
+    with timed_stage("Lectura") as stage:
+        combined, lengths, errors = read_invoices(paths)
+        stage.rows_out = sum(lengths)
+    outcomes = [(None, f"❌ Error en process_keller: {error}") if error is not None else None for error in errors]
+    if combined is None:
+        return outcomes
 
-    # Añadimos la columna porc IVA
-    df_iva_added = add_iva_column(df_col_selected)
-    print(df_iva_added)
+    try:
+        df_standard = pipeline.normalize(combined, provider, account)
+    except ProcessingCancelled:
+        raise
+    except Exception:
+        return [outcome or _process_single(path, provider, account) for path, outcome in zip(paths, outcomes)]
 
-    # añadimos las columnas de proveedor y cuenta
-    df_prov_added = add_user_columns(df_iva_added, provider, account)
-    print(df_prov_added)
+    # Separar las filas de cada archivo (la normalización de keller no descarta filas)
+    start = 0
+    for position, length in enumerate(lengths):
+        if outcomes[position] is None:
+            outcomes[position] = (df_standard.iloc[start:start + length].reset_index(drop=True), None)
+            start += length
+    return outcomes
 
-    # Leer template y estandarizar
-    final_columns = load_column_template_json(mapping)
-    df_standard = standardize_dataframe(df_prov_added, mapping, final_columns)
 
-    return df_standard
\ No newline at end of file
+def _process_single(path, provider, account):
+    try:
+        return process_keller(path, provider, account), None
+    except Exception as e:
+        return None, str(e)
@@ -1,37 +1,41 @@
 import pandas as pd
-    
-def combine_columns(df, letra_col, numero_col, new_col_name="NUMERO FACTURA", separator=" "):
+from libs.comprobante.comprobante import join_comprobantes, check_comprobantes
+from libs.dates.dates import parse_dates, DATE_FORMAT
+from libs.instrumentation.instrumentation import get_logger
+
+logger = get_logger(__name__)
+
+
+def build_comprobantes(letras, numeros, separator=" "):
     """
-    Une la columna de letra y número formateado, agregando 'FC ' al inicio y formateando el número.
+    Une la letra y el número formateado agregando 'FC ' al inicio
+    (ej.: 'A' y '1114-08061587' -> 'FC A 1114-08061587') y valida el resultado.
 
     Parámetros:
-        df (pd.DataFrame): DataFrame con las columnas a combinar.
-        letra_col (str): Nombre de la columna que contiene la letra de la factura.
-        numero_col (str): Nombre de la columna que contiene el número formateado.
-        new_col_name (str): Nombre de la nueva columna combinada. (Por defecto 'NUMERO FACTURA')
+        letras (pd.Series): Letras de las facturas.
+        numeros (pd.Series): Números con formato 0001-00000001.
         separator (str): Separador entre los valores (por defecto " ").
 
     Retorna:
-        pd.DataFrame: DataFrame con la nueva columna añadida.
+        pd.Series: Comprobantes combinados.
     """
-    if letra_col not in df.columns or numero_col not in df.columns:
-        raise ValueError(f"❌ Las columnas '{letra_col}' y/o '{numero_col}' no existen en el DataFrame.")
-
-    df = df.copy()
+    comprobantes = join_comprobantes(letras, numeros, separator)
+    check_comprobantes(comprobantes)
+    return comprobantes
 
-    # Formateamos el número de factura para que tenga el formato esperado 0001-00000001
-    df[new_col_name] = "FC" + separator + df[letra_col].astype(str) + separator + df[numero_col].astype(str)
 
-    return df
-
-
-def fill_dates_from_header(df):
+def fill_dates_from_header(df, state=None):
     """
     Rellena la columna 'FECHA' de los detalles con la fecha de su respectiva cabecera,
     asegurando que cada factura (NUMERO FORMATEADO) mantenga su propia fecha.
 
     Parámetros:
         df (pd.DataFrame): DataFrame con los datos.
+        state (dict | None): Estado que se arrastra entre bloques (None: archivo completo).
+            Las líneas de una factura son consecutivas, así que solo la última factura
+            de un bloque puede seguir en el siguiente: state["factura"] guarda su número
+            y su fecha, para los detalles cuya cabecera quedó en el bloque anterior, y
+            se actualiza con la última línea de este bloque.
 
     Retorna:
         pd.DataFrame: DataFrame con las fechas correctamente asignadas a los detalles.
@@ -44,33 +48,28 @@ def fill_dates_from_header(df):
     if missing_columns:
         raise ValueError(f"Faltan las siguientes columnas requeridas: {missing_columns}")
 
-    # Convertir la columna FECHA a formato datetime para validar fechas
-    df["FECHA"] = pd.to_datetime(df["FECHA"], errors="coerce", dayfirst=True)
+    # Convertir la columna FECHA (dd/mm/yyyy) a datetime para validar fechas, parseando cada fecha distinta una vez
+    df["FECHA"] = parse_dates(df["FECHA"], format=DATE_FORMAT)
 
     # Detectar cabeceras sin fecha
     missing_dates = df[(df["TIPO LINEA"] == "Cabecera") & df["FECHA"].isna()]
     if not missing_dates.empty:
-        print("⚠️ Advertencia: Hay cabeceras sin fecha. No se propagará la fecha en estos casos.")
-        print(missing_dates)
+        examples = ", ".join(missing_dates["NUMERO FORMATEADO"].astype(str).head(5))
+        logger.warning(
+            f"⚠️ Advertencia: Hay {len(missing_dates)} cabecera(s) sin fecha (ej.: {examples}). "
+            "No se propagará la fecha en estos casos."
+        )
 
     # Aplicar el llenado de fechas desde la cabecera hacia los detalles por grupo de "NUMERO FORMATEADO"
     df["FECHA"] = df.groupby("NUMERO FORMATEADO")["FECHA"].ffill()
 
-    return df
-
-def exclude_rows_with_value(df, column_name, value_to_exclude):
-    """
-    Excluye las filas en las que una columna específica tiene un valor determinado.
-
-    Parámetros:
-        df (pd.DataFrame): DataFrame que contiene los datos.
-        column_name (str): Nombre de la columna en la que se buscará el valor.
-        value_to_exclude (str): Valor que se desea excluir.
-
-    Retorna:
-        pd.DataFrame: DataFrame sin las filas que contenían el valor especificado.
-    """
-    if column_name not in df.columns:
-        raise ValueError(f"❌ La columna '{column_name}' no existe en el DataFrame.")
+    if state is not None and not df.empty:
+        # Detalles de la factura cuya cabecera vino en el bloque anterior
+        number, date = state.get("factura", (None, None))
+        if number is not None and not pd.isna(date):
+            pending = df["FECHA"].isna() & (df["NUMERO FORMATEADO"] == number)
+            df.loc[pending, "FECHA"] = date
+        # Arrastrar la última factura del bloque (y su fecha) al bloque siguiente
+        state["factura"] = (df["NUMERO FORMATEADO"].iloc[-1], df["FECHA"].iloc[-1])
 
-    return df[df[column_name] != value_to_exclude].reset_index(drop=True)
+    return df
@@ -0,0 +1,78 @@
+# Registro de normalizadores. Cada proveedor se importa recién la primera vez que se
+# usa: los módulos importan pandas y tardan en cargarse, y así la interfaz puede
+# abrirse sin ellos. Los imports están escritos dentro de funciones (y no como
+# nombres de módulo en texto) para que PyInstaller los incluya en el ejecutable.
+
+
+def _load_monroe():
+    from libs.normalizers.monroe import monroe
+    return monroe.process_monroe, monroe.stream_monroe, None
+
+
+def _load_cofarsur():
+    from libs.normalizers.cofarsur import cofarsur
+    return cofarsur.process_cofarsur, cofarsur.stream_cofarsur, None
+
+
+def _load_suizo():
+    from libs.normalizers.suizo import suizo
+    return suizo.process_suizo, suizo.stream_suizo, None
+
+
+def _load_keller():
+    from libs.normalizers.keller import keller
+    # Cada archivo es una factura: no se procesa por bloques, pero sí varias juntas
+    return keller.process_keller, None, keller.process_keller_batch
+
+
+# Proveedor -> función que importa su módulo y retorna
+# (procesar archivo, procesar por bloques, procesar varios archivos juntos)
+NORMALIZERS = {
+    "monroe": _load_monroe,
+    "cofarsur": _load_cofarsur,
+    "suizo": _load_suizo,
+    "keller": _load_keller,
+}
+
+
+# Proveedores que procesan varios archivos juntos (se puede consultar sin importarlos)
+BATCH_PROVIDERS = {"keller"}
+
+
+def get_process_function(provider):
+    """
+    Retorna la función que procesa un archivo completo del proveedor, importando
+    su módulo si hace falta, o None si el proveedor no existe.
+    """
+    loader = NORMALIZERS.get(provider)
+    return loader()[0] if loader else None
+
+
+def get_stream_function(provider):
+    """
+    Retorna la función que procesa un archivo del proveedor por bloques, o None si
+    el proveedor no existe o no admite el procesamiento por bloques.
+    """
+    loader = NORMALIZERS.get(provider)
+    return loader()[1] if loader else None
+
+
+def get_batch_function(provider):
+    """
+    Retorna la función que procesa juntos varios archivos del proveedor, o None si
+    el proveedor no existe o sus archivos se procesan de a uno.
+    """
+    loader = NORMALIZERS.get(provider)
+    return loader()[2] if loader else None
+
+
+def preload(providers=None):
+    """
+    Importa de antemano los módulos de los proveedores (y con ellos pandas y openpyxl),
+    por ejemplo en un hilo de fondo después de mostrar la ventana.
+
+    Parámetros:
+        providers (list[str] | None): Proveedores a cargar (por defecto, todos).
+    """
+    for provider in providers or NORMALIZERS:
+        NORMALIZERS[provider]()
@@ -0,0 +1,256 @@
+import numpy as np
+import pandas as pd
+from controllers.file_controller import parse_ar_numbers
+from libs.builder.progress import ProcessingCancelled
+from libs.dates.dates import parse_dates
+from libs.instrumentation.instrumentation import timed_stage
+from libs.schema.schema import OUTPUT_SCHEMA, conform_column
+
+# Columnas de la salida estándar, en orden (sus tipos están en OUTPUT_SCHEMA)
+STANDARD_COLUMNS = list(OUTPUT_SCHEMA)
+
+# Conversiones que se aplican a las columnas estándar antes de armar la salida
+STANDARD_CONVERSIONS = {
+    "Precio Unitario": lambda values: parse_ar_numbers(values).round(2),
+    "Fecha": parse_dates,
+}
+
+# Valores que no vienen del archivo sino de la cola de procesamiento
+PROVIDER = {"field": "provider"}
+ACCOUNT = {"field": "account"}
+
+
+def derived(function, *inputs):
+    """
+    Declara una columna calculada: function recibe las columnas indicadas en inputs
+    (nombres o posiciones), ya filtradas, y retorna la columna resultante.
+    """
+    return {"function": function, "inputs": list(inputs)}
+
+
+def constant(value):
+    """
+    Declara una columna con el mismo valor en todas las filas.
+    """
+    return {"value": value}
+
+
+def _compile_source(name, source):
+    if isinstance(source, (str, int)):
+        return ("column", source)
+    if isinstance(source, dict) and "function" in source:
+        if not callable(source["function"]) or not source["inputs"]:
+            raise ValueError(f"❌ La columna derivada '{name}' necesita una función y al menos una columna de entrada.")
+        return ("derived", source)
+    if isinstance(source, dict) and "value" in source:
+        return ("value", source["value"])
+    if isinstance(source, dict) and source.get("field") in ("provider", "account"):
+        return ("field", source["field"])
+    raise ValueError(f"❌ Origen inválido para la columna '{name}': {source!r}")
+
+
+class Pipeline:
+    """
+    Plan de normalización compilado a partir de la especificación de un proveedor
+    (ver compile_spec).
+
+    El plan lee solo las columnas necesarias, aplica los pasos que necesitan todas
+    las filas (propagar datos de las cabeceras), y luego filtra y proyecta en un
+    solo paso: de cada columna de entrada se copian únicamente las filas que quedan.
+    Las columnas derivadas se calculan una vez sobre esas filas y la salida se arma
+    directamente con los nombres, el orden y los tipos estándar (OUTPUT_SCHEMA), sin
+    renombrar ni reordenar.
+    """
+
+    def __init__(self, name, read, read_chunks, usecols, dtype, prepare, row_filter, sources):
+        self.name = name
+        self.read = read
+        self.read_chunks = read_chunks
+        self.usecols = usecols
+        self.dtype = dtype
+        self.prepare = prepare
+        self.row_filter = row_filter
+        self.sources = sources
+
+        # Columnas de entrada que hay que copiar después de filtrar (sin repetir)
+        self.inputs = []
+        for kind, payload in sources.values():
+            references = [payload] if kind == "column" else payload["inputs"] if kind == "derived" else []
+            for reference in references:
+                if reference not in self.inputs:
+                    self.inputs.append(reference)
+
+    def _read(self, path):
+        return self.read(path, usecols=self.usecols, dtype=self.dtype) if self.usecols is not None else self.read(path)
+
+    def run(self, path, provider, account):
+        """
+        Procesa el archivo completo y retorna el DataFrame estandarizado.
+
+        Lanza:
+            ValueError: Si el archivo no se pudo leer o no quedaron filas de detalle.
+        """
+        try:
+            with timed_stage("Lectura") as stage:
+                df_readed = self._read(path)
+                if df_readed is None or df_readed.empty:
+                    raise ValueError("❌ El archivo leído está vacío o no se pudo procesar.")
+                stage.rows_out = len(df_readed)
+
+            return self.normalize(df_readed, provider, account)
+        except ProcessingCancelled:
+            raise
+        except Exception as e:
+            raise ValueError(f"❌ Error en process_{self.name}: {str(e)}")
+
+    def stream(self, path, provider, account, chunksize):
+        """
+        Procesa el archivo por bloques de `chunksize` filas y genera un DataFrame
+        estandarizado por bloque. El estado de las cabeceras se arrastra entre bloques.
+        """
+        if self.read_chunks is None:
+            raise ValueError(f"❌ El proveedor '{self.name}' no admite el procesamiento por bloques.")
+        state = {}
+        try:
+            chunks = self.read_chunks(path, chunksize, usecols=self.usecols, dtype=self.dtype)
+            while True:
+                with timed_stage("Lectura") as stage:
+                    df_readed = next(chunks, None)
+                    stage.rows_out = len(df_readed) if df_readed is not None else 0
+                if df_readed is None:
+                    break
+                df_standard = self.normalize(df_readed, provider, account, state)
+                if not df_standard.empty:
+                    yield df_standard
+        except ProcessingCancelled:
+            raise
+        except Exception as e:
+            raise ValueError(f"❌ Error en process_{self.name}: {str(e)}")
+
+    def normalize(self, df, provider, account, state=None):
+        """
+        Aplica el plan a un DataFrame ya leído (el archivo completo o un bloque).
+
+        Parámetros:
+            df (pd.DataFrame): Datos leídos.
+            provider (str): Proveedor.
+            account (int/str): Cuenta.
+            state (dict | None): Al procesar por bloques, estado que los pasos de
+                preparación arrastran entre bloques. Los bloques sin filas de detalle
+                retornan un DataFrame vacío en lugar de un error.
+
+        Retorna:
+            pd.DataFrame: DataFrame con las columnas estándar.
+        """
+        if self.prepare:
+            with timed_stage("Cabeceras", len(df)) as stage:
+                for step in self.prepare:
+                    df = step(df, state)
+                stage.rows_out = len(df)
+
+        with timed_stage("Filtrado", len(df)) as stage:
+            # Filas que quedan después del filtro (None: todas)
+            rows = None
+            if self.row_filter is not None:
+                column, values, keep = self.row_filter
+                matches = df.iloc[:, self._position(df, column)].isin(values).to_numpy()
+                rows = np.flatnonzero(matches if keep else ~matches)
+                if len(rows) == 0 and state is None:
+                    raise ValueError("❌ No quedaron filas de detalle después de filtrar el archivo.")
+
+            # Filtrar y proyectar: se copia cada columna de entrada una sola vez
+            inputs = {}
+            for reference in self.inputs:
+                column = df.iloc[:, self._position(df, reference)]
+                inputs[reference] = column.take(rows) if rows is not None else column
+            stage.rows_out = len(rows) if rows is not None else len(df)
+        if stage.rows_out == 0:
+            return pd.DataFrame(columns=STANDARD_COLUMNS)
+
+        columns = {}
+        for name, (kind, payload) in self.sources.items():
+            if kind == "column":
+                columns[name] = inputs[payload]
+            elif kind == "value":
+                columns[name] = payload
+            elif kind == "field":
+                columns[name] = provider if payload == "provider" else account
+            if kind == "derived" or (name in STANDARD_CONVERSIONS and isinstance(columns[name], pd.Series)):
+                # Columnas calculadas: se mide cada una por separado
+                with timed_stage(f"Columna {name}", stage.rows_out) as column_stage:
+                    if kind == "derived":
+                        columns[name] = payload["function"](*(inputs[reference] for reference in payload["inputs"]))
+                    if name in STANDARD_CONVERSIONS and isinstance(columns[name], pd.Series):
+                        columns[name] = STANDARD_CONVERSIONS[name](columns[name])
+                    column_stage.rows_out = len(columns[name])
+
+        with timed_stage("Estandarización", stage.rows_out) as stage:
+            # Cada columna con el tipo compacto del esquema de salida
+            columns = {name: conform_column(name, values, stage.rows_in) for name, values in columns.items()}
+            df_standard = pd.DataFrame(columns, copy=False)
+            df_standard.index = pd.RangeIndex(len(df_standard))
+            stage.rows_out = len(df_standard)
+        return df_standard
+
+    @staticmethod
+    def _position(df, reference):
+        if isinstance(reference, int):
+            if reference >= df.shape[1]:
+                raise IndexError(f"❌ La columna {reference} no existe en el DataFrame (máximo índice: {df.shape[1] - 1}).")
+            return reference
+        if reference not in df.columns:
+            raise ValueError(f"❌ La columna '{reference}' no existe en el DataFrame.")
+        return df.columns.get_loc(reference)
+
+
+def compile_spec(spec):
+    """
+    Compila la especificación declarativa de un proveedor en un Pipeline.
+
+    Claves de la especificación:
+        - "name" (str): Nombre del proveedor.
+        - "read" (callable): Lector del archivo completo, read(path, usecols=..., dtype=...)
+          (o read(path) si no se indica "usecols").
+        - "read_chunks" (callable, opcional): Lector por bloques, read_chunks(path, chunksize, usecols=..., dtype=...).
+        - "usecols" (list[int], opcional) y "dtype" (dict[int, type], opcional): Columnas a leer y sus tipos.
+        - "prepare" (list[callable], opcional): Pasos sobre todas las filas antes de filtrar,
+          step(df, state) -> df (state es None al procesar el archivo completo).
+        - "filter" (dict, opcional): {"column": nombre o posición, "include": [...]} o {"column", "exclude": [...]}.
+        - "columns" (dict): Origen de cada columna estándar: nombre o posición de la columna
+          leída, derived(...), constant(...), PROVIDER o ACCOUNT.
+
+    Retorna:
+        Pipeline: Plan listo para procesar archivos.
+
+    Lanza:
+        ValueError: Si falta alguna clave o columna estándar, o un origen es inválido.
+    """
+    for key in ("name", "read", "columns"):
+        if key not in spec:
+            raise ValueError(f"❌ Falta la clave '{key}' en la especificación del proveedor.")
+
+    columns = spec["columns"]
+    missing = [name for name in STANDARD_COLUMNS if name not in columns]
+    unknown = [name for name in columns if name not in STANDARD_COLUMNS]
+    if missing or unknown:
+        raise ValueError(f"❌ Columnas inválidas en la especificación de '{spec['name']}': faltan {missing}, sobran {unknown}.")
+    sources = {name: _compile_source(name, columns[name]) for name in STANDARD_COLUMNS}
+
+    row_filter = None
+    if "filter" in spec:
+        rule = spec["filter"]
+        if ("include" in rule) == ("exclude" in rule):
+            raise ValueError(f"❌ El filtro de '{spec['name']}' debe indicar 'include' o 'exclude'.")
+        keep = "include" in rule
+        row_filter = (rule["column"], list(rule["include"] if keep else rule["exclude"]), keep)
+
+    return Pipeline(
+        name=spec["name"],
+        read=spec["read"],
+        read_chunks=spec.get("read_chunks"),
+        usecols=spec.get("usecols"),
+        dtype=spec.get("dtype"),
+        prepare=list(spec.get("prepare", [])),
+        row_filter=row_filter,
+        sources=sources,
+    )
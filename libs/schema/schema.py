@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+# Tipo de cada columna de la salida estándar, en orden. Las columnas que repiten
+# pocos valores (proveedor, cuenta, IVA y comprobante) son categóricas; los códigos
+# de barras son texto (sin pasar por float); las cantidades son enteros con nulos.
+OUTPUT_SCHEMA = {
+    "Nro Comprobante": "category",
+    "Fecha": "datetime64[ns]",
+    "Drogueria": "category",
+    "Nro de Cuenta": "category",
+    "Codigo de Barras": "string",
+    "Descripcion": "object",
+    "Cantidad": "Int32",
+    "IVA (%)": "category",
+    "Precio Unitario": "float64",
+}
+
+# Rango de los enteros de 32 bits
+INT32_MIN, INT32_MAX = np.iinfo("int32").min, np.iinfo("int32").max
+
+
+def barcodes_to_string(values):
+    """
+    Convierte los códigos de barras a texto, sin espacios alrededor. Los vacíos quedan nulos.
+    Si vienen como números (por ejemplo 7791909410450.0) se escriben sin decimales.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        values = values.astype("Int64")
+    values = values.astype("string").str.strip()
+    return values.mask(values == "")
+
+
+def quantities_to_int32(values):
+    """
+    Convierte las cantidades a enteros de 32 bits con nulos (Int32).
+
+    Lanza:
+        ValueError: Si alguna cantidad tiene decimales o no entra en 32 bits.
+    """
+    numbers = pd.to_numeric(values, errors="raise")
+    if pd.api.types.is_integer_dtype(numbers):
+        valid = numbers.dropna()
+    else:
+        valid = numbers.dropna()
+        fractional = valid[valid != np.floor(valid)]
+        if not fractional.empty:
+            raise ValueError(f"❌ Hay cantidades con decimales, ej.: {fractional.iloc[0]}")
+    if not valid.empty and (valid.min() < INT32_MIN or valid.max() > INT32_MAX):
+        raise ValueError("❌ Hay cantidades fuera del rango permitido.")
+    return numbers.astype("Int32")
+
+
+def conform_column(name, values, length):
+    """
+    Convierte una columna de la salida estándar al tipo de OUTPUT_SCHEMA.
+
+    Parámetros:
+        name (str): Nombre de la columna.
+        values (pd.Series | escalar): Valores (un escalar se repite en todas las filas).
+        length (int): Cantidad de filas.
+
+    Retorna:
+        pd.Series | pd.Categorical | np.ndarray: Columna con el tipo del esquema.
+    """
+    dtype = OUTPUT_SCHEMA[name]
+    if not isinstance(values, pd.Series):
+        if dtype == "category":
+            # Un solo valor: códigos en cero, sin armar un arreglo de objetos
+            if name == "IVA (%)":
+                values = float(values)
+            return pd.Categorical.from_codes(np.zeros(length, dtype="int8"), categories=[values])
+        values = pd.Series([values] * length)
+
+    if name == "Codigo de Barras":
+        return barcodes_to_string(values)
+    if name == "Cantidad":
+        return quantities_to_int32(values)
+    if name == "IVA (%)":
+        return pd.to_numeric(values).astype("float64").astype("category")
+    return values.astype(dtype, copy=False)
+
+
+def concat_frames(frames):
+    """
+    Concatena DataFrames con la salida estándar conservando las columnas categóricas:
+    antes de unirlos se iguala el conjunto de categorías de cada columna (pd.concat
+    convierte a objetos las categóricas con categorías distintas).
+
+    Parámetros:
+        frames (list[pd.DataFrame]): DataFrames a unir.
+
+    Retorna:
+        pd.DataFrame: DataFrame combinado, con un índice nuevo.
+    """
+    frames = [df for df in frames if df is not None]
+    if not frames:
+        return pd.DataFrame(columns=list(OUTPUT_SCHEMA))
+
+    categorical = [
+        column for column in frames[0].columns
+        if all(column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype) for df in frames)
+    ]
+    if categorical and len(frames) > 1:
+        aligned = []
+        categories = {
+            column: frames[0][column].cat.categories.append([df[column].cat.categories for df in frames[1:]]).unique()
+            for column in categorical
+        }
+        for df in frames:
+            df = df.copy(deep=False)
+            for column in categorical:
+                df[column] = df[column].cat.set_categories(categories[column])
+            aligned.append(df)
+        frames = aligned
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,130 @@
+import codecs
+
+# Bytes que se leen del comienzo del archivo para reconocer su formato
+SNIFF_BYTES = 64 * 1024
+
+# Delimitadores que se prueban sobre la primera línea, en orden de preferencia
+DELIMITERS = ["\t", ",", ";", "|", " "]
+
+UTF8_BOM = codecs.BOM_UTF8
+
+# Bloques con los que se valida el resto del archivo cuando el comienzo es UTF-8
+VALIDATE_BYTES = 1024 * 1024
+
+
+class FileFormat:
+    """
+    Formato de un archivo de texto reconocido por sniff_file.
+
+    Atributos:
+        encoding (str): "utf-8-sig" (con BOM), "utf-8" o el encoding por defecto del lector.
+        delimiter (str | None): Delimitador detectado, o None si la primera línea no tiene ninguno.
+        columns (int): Cantidad de campos de la primera línea.
+        first_line (str): Primera línea del archivo, decodificada y sin salto de línea.
+    """
+
+    __slots__ = ("encoding", "delimiter", "columns", "first_line")
+
+    def __init__(self, encoding, delimiter, columns, first_line):
+        self.encoding = encoding
+        self.delimiter = delimiter
+        self.columns = columns
+        self.first_line = first_line
+
+    def __repr__(self):
+        return f"FileFormat(encoding={self.encoding!r}, delimiter={self.delimiter!r}, columns={self.columns})"
+
+
+def _read_prefix(path, sample_bytes):
+    """
+    Lee el comienzo del archivo, ampliando la lectura hasta tener la primera línea completa.
+    """
+    with open(path, "rb") as f:
+        prefix = f.read(sample_bytes)
+        while b"\n" not in prefix:
+            more = f.read(sample_bytes)
+            if not more:
+                break
+            prefix += more
+    return prefix
+
+
+def _detect_encoding(prefix, default_encoding):
+    if prefix.startswith(UTF8_BOM):
+        return "utf-8-sig"
+    if prefix.isascii():
+        # Sin caracteres especiales no hay forma de distinguirlos: se respeta el del lector
+        return default_encoding
+    try:
+        # El decodificador incremental no falla por un carácter cortado al final del prefijo
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin1"
+
+
+def _is_utf8(path):
+    """
+    Comprueba que el archivo entero sea UTF-8 válido, por bloques y sin guardarlo en memoria.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(path, "rb") as f:
+            while block := f.read(VALIDATE_BYTES):
+                decoder.decode(block)
+        decoder.decode(b"", final=True)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def sniff_bytes(prefix, delimiters=DELIMITERS, default_encoding="latin1"):
+    """
+    Igual que sniff_file, pero sobre el comienzo del archivo ya leído (bytes).
+
+    Retorna:
+        FileFormat | None: Formato detectado, o None si el contenido está vacío.
+    """
+    if not prefix.strip():
+        return None
+
+    encoding = _detect_encoding(prefix, default_encoding)
+    if encoding == "utf-8-sig":
+        prefix = prefix[len(UTF8_BOM):]
+    first_line = prefix.split(b"\n", 1)[0].decode(encoding, errors="replace").rstrip("\r")
+
+    stripped = first_line.strip()
+    delimiter = next((delim for delim in delimiters if delim in stripped), None)
+    columns = len(first_line.split(delimiter)) if delimiter is not None else 1
+    return FileFormat(encoding, delimiter, columns, first_line)
+
+
+def sniff_file(path, delimiters=DELIMITERS, default_encoding="latin1", sample_bytes=SNIFF_BYTES):
+    """
+    Reconoce el encoding, el delimitador y la cantidad de columnas de un archivo
+    leyendo solo su comienzo, para que luego se lo parsee una sola vez desde el disco.
+
+    Parámetros:
+        path (str): Ruta del archivo.
+        delimiters (list[str]): Delimitadores a probar; se elige el primero que aparece
+            en la primera línea.
+        default_encoding (str): Encoding a usar si el comienzo del archivo es solo ASCII.
+        sample_bytes (int): Cantidad de bytes a leer.
+
+    Si el comienzo se tomó como UTF-8 pero no abarca todo el archivo, se valida el
+    resto: un carácter latin1 más adelante haría fallar la lectura, así que en ese
+    caso se usa latin1 (el encoding con el que se leían estos archivos).
+
+    Retorna:
+        FileFormat: Formato detectado.
+
+    Lanza:
+        ValueError: Si el archivo está vacío.
+    """
+    prefix = _read_prefix(path, sample_bytes)
+    detected = sniff_bytes(prefix, delimiters, default_encoding)
+    if detected is None:
+        raise ValueError(f"❌ El archivo '{path}' está vacío.")
+    if detected.encoding == "utf-8" and len(prefix) >= sample_bytes and not _is_utf8(path):
+        detected.encoding = "latin1"
+    return detected
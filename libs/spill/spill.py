@@ -0,0 +1,226 @@
+import os
+import pickle
+import tempfile
+import weakref
+from collections import Counter
+import numpy as np
+from libs.instrumentation.instrumentation import get_logger
+from libs.schema.schema import concat_frames
+
+logger = get_logger(__name__)
+
+# Filas que se juntan en memoria antes de escribirlas al disco como un bloque
+# (las facturas de keller son de pocas filas: guardarlas de a una es lento)
+BUFFER_ROWS = 100_000
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _remove_dir(path):
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
+
+
+def iter_blocks(frames, rows=BUFFER_ROWS):
+    """
+    Junta los DataFrames chicos consecutivos en bloques de al menos `rows` filas (los
+    grandes pasan sin copiarse). Los DataFrames vacíos se descartan.
+
+    Parámetros:
+        frames (Iterable[pd.DataFrame]): DataFrames con las mismas columnas.
+        rows (int): Filas mínimas de cada bloque (salvo el último).
+
+    Retorna:
+        Generator[pd.DataFrame]: Bloques, en el mismo orden.
+    """
+    pending = []
+    pending_rows = 0
+    for df in frames:
+        if df is None or df.empty:
+            continue
+        if len(df) >= rows and not pending:
+            yield df
+            continue
+        pending.append(df)
+        pending_rows += len(df)
+        if pending_rows >= rows:
+            yield concat_frames(pending)
+            pending = []
+            pending_rows = 0
+    if pending:
+        yield concat_frames(pending)
+
+
+class SpillFile:
+    """
+    Archivo temporal en disco donde se van guardando los DataFrames procesados, para
+    no tenerlos todos en memoria hasta exportarlos.
+
+    Los DataFrames se juntan en memoria hasta BUFFER_ROWS filas y se escriben como un
+    bloque (un pickle por bloque: conserva las columnas y sus tipos tal cual, incluidas
+    las categóricas y las columnas de objetos con tipos mezclados, como las cuentas
+    numéricas y de texto, que Arrow/Parquet no aceptan). Al recorrerlo se entregan en
+    el orden de sus claves (por ejemplo, el índice de cada archivo en la cola), aunque
+    se hayan agregado en otro orden. El archivo se borra con close(), al salir del bloque with o cuando
+    el objeto deja de usarse.
+
+    Como un pickle ejecuta código al leerlo, el archivo no se crea suelto en la carpeta
+    temporal (compartida con otros usuarios): se crea dentro de una carpeta propia
+    (tempfile.mkdtemp, permisos 0700) y con permisos 0600, así que solo el mismo usuario
+    puede escribir los bloques que después se leen. La carpeta se borra junto con el
+    archivo.
+
+    Ejemplo:
+        with SpillFile() as spill:
+            spill.append(df, key=index)
+            ...
+            for df in spill:
+                ...
+    """
+
+    def __init__(self, directory=None, buffer_rows=BUFFER_ROWS):
+        # mkdtemp crea la carpeta con permisos 0700 (ver la nota de la clase)
+        self.directory = tempfile.mkdtemp(prefix="normalizador_", dir=directory)
+        self.path = os.path.join(self.directory, "bloques.spill")
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+        except OSError:
+            _remove_dir(self.directory)
+            raise
+        self._file = os.fdopen(fd, "w+b")
+        self._finalizer = weakref.finalize(self, SpillFile._cleanup, self._file, self.path, self.directory)
+        self.buffer_rows = buffer_rows
+        self.files = 0  # DataFrames agregados (incluidos los vacíos)
+        self.rows = 0
+        self._buffer = []  # (clave, orden de llegada, DataFrame) aún no escritos
+        self._buffer_rows = 0
+        self._offsets = []  # Posición de cada bloque en el archivo
+        self._entries = []  # (clave, orden de llegada, bloque, fila inicial, fila final)
+
+    @staticmethod
+    def _cleanup(file, path, directory):
+        file.close()
+        _remove(path)
+        _remove_dir(directory)
+
+    def __len__(self):
+        return self.files
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, df, key=None):
+        """
+        Agrega un DataFrame. Se escribe al disco cuando el buffer llega a buffer_rows filas.
+
+        Parámetros:
+            df (pd.DataFrame): DataFrame a guardar.
+            key (int | None): Clave para ordenarlo al recorrer el archivo (por defecto,
+                el orden de llegada).
+        """
+        order = self.files
+        self.files += 1
+        if df is None or df.empty:
+            return
+        self.rows += len(df)
+        # Un DataFrame grande se escribe solo, sin copiarlo para juntarlo con el buffer
+        if self._buffer and self._buffer_rows + len(df) > self.buffer_rows:
+            self.flush()
+        self._buffer.append((order if key is None else key, order, df))
+        self._buffer_rows += len(df)
+        if self._buffer_rows >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Escribe al disco los DataFrames que están en el buffer como un solo bloque.
+        """
+        if not self._buffer:
+            return
+        self._buffer.sort(key=lambda item: item[:2])
+        frames = [df for _, _, df in self._buffer]
+        block = concat_frames(frames) if len(frames) > 1 else frames[0]
+        number = len(self._offsets)
+        self._file.seek(0, os.SEEK_END)
+        self._offsets.append(self._file.tell())
+        pickle.dump(block, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        start = 0
+        for key, order, df in self._buffer:
+            self._entries.append((key, order, number, start, start + len(df)))
+            start += len(df)
+        self._buffer = []
+        self._buffer_rows = 0
+        logger.debug(f"Bloque {number} guardado en '{self.path}': {len(block)} filas.")
+
+    def _load(self, number):
+        self._file.seek(self._offsets[number])
+        return pickle.load(self._file)
+
+    def _runs(self):
+        """
+        Tramos [bloque, fila inicial, fila final, claves] en el orden de las claves,
+        uniendo las filas consecutivas de un mismo bloque. claves tiene (clave, filas)
+        de cada DataFrame del tramo.
+        """
+        runs = []
+        for key, _, number, start, stop in sorted(self._entries, key=lambda entry: entry[:2]):
+            if runs and runs[-1][0] == number and runs[-1][2] == start:
+                runs[-1][2] = stop
+                runs[-1][3].append((key, stop - start))
+            else:
+                runs.append([number, start, stop, [(key, stop - start)]])
+        return runs
+
+    def _iter_runs(self):
+        # Cada bloque se lee una sola vez y se libera al entregar su último tramo
+        self.flush()
+        runs = self._runs()
+        pending = Counter(number for number, _, _, _ in runs)
+        loaded = {}
+        for number, start, stop, keys in runs:
+            if number not in loaded:
+                loaded[number] = self._load(number)
+            block = loaded[number]
+            pending[number] -= 1
+            if not pending[number]:
+                del loaded[number]
+            yield keys, block.iloc[start:stop]
+
+    def __iter__(self):
+        """
+        Recorre los DataFrames en el orden de sus claves. Las filas consecutivas de un
+        mismo bloque se entregan juntas, así que puede haber menos DataFrames que los
+        agregados.
+
+        Cada bloque se lee del disco una sola vez: si el pool terminó los archivos en
+        otro orden y las claves saltan entre bloques, el bloque queda en memoria hasta
+        entregar su último tramo (normalmente uno o dos bloques a la vez).
+        """
+        for _, df in self._iter_runs():
+            yield df
+
+    def items(self):
+        """
+        Igual que __iter__, pero con pares (claves, DataFrame): claves es un array con
+        la clave de cada fila, para las salidas que necesitan saber de qué archivo es
+        cada línea (ver write_database).
+        """
+        for keys, df in self._iter_runs():
+            yield np.repeat([key for key, _ in keys], [rows for _, rows in keys]), df
+
+    def close(self):
+        """
+        Cierra y borra el archivo temporal y su carpeta.
+        """
+        self._buffer = []
+        self._finalizer()
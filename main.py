@@ -1,5 +1,12 @@
+import json
+import multiprocessing
 import sys
 import os
+import threading
+import time
+
+# Momento de inicio, para medir cuánto tarda en aparecer la ventana
+STARTUP_START = time.perf_counter()
 
 # Obtener la ruta absoluta del directorio base del proyecto
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -18,16 +25,56 @@ if UI_DIR not in sys.path:
 if CONTROLLERS_DIR not in sys.path:
     sys.path.append(CONTROLLERS_DIR)
 
-print("PYTHON PATH:", sys.path)  # Debug para verificar rutas
-
-# Importar la UI después de agregar las rutas
+# Importar la UI después de agregar las rutas (solo carga Qt: pandas se carga después)
 from ui.main_window import MainWindow
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QApplication
+from libs.instrumentation.instrumentation import configure_logging, get_logger
+
+# Argumento para medir el arranque: muestra la ventana, informa el tiempo en JSON y sale
+MEASURE_STARTUP_ARG = "--measure-startup"
+
+logger = get_logger("main")
+
+
+def prewarm():
+    """
+    Carga en segundo plano los módulos pesados (pandas, openpyxl y los normalizadores)
+    para que el primer procesamiento no tenga que esperarlos.
+    """
+    from libs.normalizers.registry import preload
+
+    start = time.perf_counter()
+    try:
+        preload()
+        import controllers.file_controller  # noqa: F401 (merge_and_save, al guardar)
+        logger.info(f"🔹 Módulos de procesamiento precargados en {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudieron precargar los módulos de procesamiento: {str(e)}")
+
+
+def on_window_ready(measure_startup):
+    """
+    Se ejecuta al volver al bucle de eventos después de mostrar la ventana.
+    """
+    seconds = time.perf_counter() - STARTUP_START
+    if measure_startup:
+        print(json.dumps({"startup_seconds": round(seconds, 4), "pandas_loaded": "pandas" in sys.modules}))
+        QApplication.quit()
+        return
+    logger.info(f"🕒 Ventana lista en {seconds:.2f}s")
+    threading.Thread(target=prewarm, daemon=True).start()
+
 
 def main():
-    app = QApplication(sys.argv)
+    # Necesario para el pool de procesos en el ejecutable empaquetado
+    multiprocessing.freeze_support()
+    configure_logging()
+    measure_startup = MEASURE_STARTUP_ARG in sys.argv
+    app = QApplication([arg for arg in sys.argv if arg != MEASURE_STARTUP_ARG])
     window = MainWindow()
     window.show()
+    QTimer.singleShot(0, lambda: on_window_ready(measure_startup))
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
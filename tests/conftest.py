@@ -0,0 +1,42 @@
+import os
+import sys
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.append(BASE_DIR)
+
+from libs.schema.schema import OUTPUT_SCHEMA, conform_column
+
+
+def standard_frame(rows, drogueria="monroe", cuenta=4793126):
+    """
+    Salida estándar con las filas indicadas como
+    (comprobante, fecha, código de barras, descripción, cantidad, iva, precio).
+    """
+    columns = ["Nro Comprobante", "Fecha", "Codigo de Barras", "Descripcion", "Cantidad", "IVA (%)",
+               "Precio Unitario"]
+    df = pd.DataFrame(rows, columns=columns)
+    df["Fecha"] = pd.to_datetime(df["Fecha"], format="%Y-%m-%d")
+    df["Drogueria"] = drogueria
+    df["Nro de Cuenta"] = cuenta
+    return pd.DataFrame({col: conform_column(col, df[col], len(df)) for col in OUTPUT_SCHEMA})
+
+
+@pytest.fixture
+def invoice():
+    # Una factura con una línea repetida (mismo código de barras dos veces)
+    return standard_frame([
+        ("FC A 0001-00000001", "2025-02-03", "7790001000011", "Ibuprofeno 400", 2, 21.0, 1500.5),
+        ("FC A 0001-00000001", "2025-02-03", "7790001000028", "Amoxicilina 500", 1, 21.0, 3200.0),
+        ("FC A 0001-00000001", "2025-02-03", "7790001000011", "Ibuprofeno 400", 2, 21.0, 1500.5),
+    ])
+
+
+@pytest.fixture
+def other_invoice():
+    return standard_frame([
+        ("FC A 0001-00000002", "2025-03-10", "7790001000011", "Ibuprofeno 400", 5, 21.0, 1490.0),
+        ("FC A 0001-00000002", "2025-03-10", None, "Gasas", 10, 0.0, 99.9),
+    ])
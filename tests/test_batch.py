@@ -0,0 +1,16 @@
+import os
+import pytest
+import batch
+
+
+def test_build_files_info_lowercases_the_provider(tmp_path):
+    path = tmp_path / "A001800000001.csv"
+    path.write_text("")
+    files_info = batch.build_files_info([{"pattern": str(path), "provider": "Keller", "account": None}])
+    assert files_info == [{"path": str(path), "provider": "keller", "account": None}]
+
+
+def test_missing_output_folder_is_rejected(tmp_path):
+    with pytest.raises(SystemExit) as error:
+        batch.parse_args(["-p", "monroe", "x.dat", "-o", os.path.join(str(tmp_path), "falta", "salida.xlsx")])
+    assert error.value.code == 2
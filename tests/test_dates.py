@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from libs.dates.dates import DATE_FORMAT, parse_dates
+
+
+def test_same_result_as_to_datetime():
+    values = pd.Series(["03/02/2025", "03/02/2025", None, "10/03/2025", "31/02/2025", "03/02/2025"],
+                       index=[5, 6, 7, 8, 9, 10], name="Fecha")
+    result = parse_dates(values, format=DATE_FORMAT)
+    expected = pd.to_datetime(values, format=DATE_FORMAT, errors="coerce")
+    pd.testing.assert_series_equal(result, expected, check_dtype=False)
+    assert result.dtype == "datetime64[ns]"
+
+
+def test_dayfirst_without_format():
+    result = parse_dates(["03/02/2025", "13/02/2025"])
+    assert result.tolist() == [pd.Timestamp("2025-02-03"), pd.Timestamp("2025-02-13")]
+
+
+def test_each_distinct_value_is_prepared_once():
+    seen = []
+
+    def prepare(uniques):
+        seen.append(len(uniques))
+        return uniques.str.zfill(8)
+
+    result = parse_dates(pd.Series(["3022025", "3022025", "10032025"]), format="%d%m%Y", prepare=prepare)
+    assert seen == [2]
+    assert result.tolist() == [pd.Timestamp("2025-02-03"), pd.Timestamp("2025-02-03"), pd.Timestamp("2025-03-10")]
+
+
+def test_datetime_column_is_returned_as_is():
+    values = pd.Series(pd.to_datetime(["2025-02-03", None]))
+    assert parse_dates(values) is values
+
+
+def test_invalid_value_raises():
+    with pytest.raises(ValueError):
+        parse_dates(pd.Series(["03/02/2025", "no es fecha"]), format=DATE_FORMAT, errors="raise")
+
+
+def test_all_empty():
+    result = parse_dates(pd.Series([None, np.nan], dtype=object), format=DATE_FORMAT)
+    assert result.isna().all() and len(result) == 2
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+import pytest
+from conftest import BASE_DIR
+from libs.fingerprint.fingerprint import detect_provider
+
+HEADER = ["Fecha", "CodBarra", "Producto", "Cantidad", "Precio Público", "Precio Unit.", "Importe", "Faltas"]
+
+
+@pytest.mark.parametrize("header", [
+    ",".join(HEADER),
+    "\t".join(HEADER),
+    ";".join(HEADER),
+    ";" + ";".join(HEADER),
+    " , ".join(HEADER),
+])
+def test_keller_header_is_detected(tmp_path, header):
+    path = tmp_path / "compras.csv"
+    path.write_bytes((header + "\n03/02/2025,7790001,Producto,1,10,8,8,0\n").encode("latin1"))
+    assert detect_provider(str(path)) == {"provider": "keller", "account": None}
+
+
+def test_keller_file_name_is_detected(tmp_path):
+    path = tmp_path / "A001808244238.csv"
+    path.write_text("otra,cabecera\n1,2\n")
+    assert detect_provider(str(path))["provider"] == "keller"
+
+
+def test_detection_does_not_load_pandas(tmp_path):
+    path = tmp_path / "compras.csv"
+    path.write_text(",".join(HEADER) + "\n")
+    code = ("import sys; from libs.fingerprint.fingerprint import detect_provider; "
+            f"assert detect_provider({str(path)!r})['provider'] == 'keller'; print('pandas' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
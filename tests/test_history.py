@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+from libs.history.history import HistoryStore, LineKeys, line_hashes
+from libs.schema.schema import concat_frames
+
+
+def test_line_keys_match_line_hashes_per_file(invoice, other_invoice):
+    # Dos archivos con la misma factura: las apariciones se cuentan en cada uno
+    frames = [invoice, other_invoice, invoice]
+    expected = np.concatenate([line_hashes(df)[0] for df in frames])
+
+    df = concat_frames(frames)
+    groups = np.repeat([0, 1, 2], [len(frame) for frame in frames])
+    keys = LineKeys()
+    # Bloques que cortan los archivos por la mitad
+    key_hash = np.concatenate([
+        keys(df.iloc[start:start + 2], groups[start:start + 2])[0] for start in range(0, len(df), 2)
+    ])
+    assert key_hash.tolist() == expected.tolist()
+
+
+def test_ingest_reports_duplicates_across_runs(tmp_path, invoice, other_invoice):
+    path = str(tmp_path / "historial.sqlite")
+    with HistoryStore(path) as history:
+        assert history.ingest(invoice, "a.dat") == {"nuevas": 3, "duplicadas": 0, "modificadas": 0}
+        history.commit()
+
+    with HistoryStore(path) as history:
+        counts = history.ingest_many([other_invoice, invoice], ["b.dat", "a.dat"])
+        assert counts == [{"nuevas": 2, "duplicadas": 0, "modificadas": 0},
+                          {"nuevas": 0, "duplicadas": 3, "modificadas": 0}]
+        history.commit()
+        assert len(history) == 5
+
+
+def test_ingest_subset_keeps_keys(tmp_path, invoice):
+    # Ingresar solo una parte de un archivo ya guardado no cambia las claves
+    with HistoryStore(str(tmp_path / "historial.sqlite")) as history:
+        history.ingest(invoice, "a.dat")
+        assert history.ingest(invoice.iloc[:2], "a.dat")["duplicadas"] == 2
+        assert len(history) == 3
+
+
+def test_changed_line_is_updated(tmp_path, invoice):
+    with HistoryStore(str(tmp_path / "historial.sqlite")) as history:
+        history.ingest(invoice, "a.dat")
+        changed = invoice.copy()
+        changed.loc[1, "Precio Unitario"] = 3300.0
+        assert history.ingest(changed, "a.dat") == {"nuevas": 0, "duplicadas": 2, "modificadas": 1}
+        assert history.read_lines()["Precio Unitario"].tolist() == [1500.5, 3300.0, 1500.5]
+
+
+def test_pending_lines_are_discarded_without_commit(tmp_path, invoice):
+    path = str(tmp_path / "historial.sqlite")
+    with HistoryStore(path) as history:
+        history.ingest(invoice, "a.dat")
+        assert len(history) == 3
+
+    with HistoryStore(path) as history:
+        assert len(history) == 0
+        history.ingest(invoice, "a.dat")
+        history.rollback()
+        assert len(history) == 0
+
+
+def test_read_lines_round_trip(tmp_path, invoice, other_invoice):
+    with HistoryStore(str(tmp_path / "historial.sqlite")) as history:
+        history.ingest_many([invoice, other_invoice], ["a.dat", "b.dat"])
+        lines = history.read_lines()
+        expected = concat_frames([invoice, other_invoice])
+        pd.testing.assert_frame_equal(lines, expected, check_categorical=False)
+        assert history.count_lines(desde="2025-03-01") == 2
+
+
+def test_line_hashes_key_and_content(invoice):
+    key_hash, content_hash, occurrence = line_hashes(invoice)
+    # La línea repetida se distingue por su número de aparición
+    assert occurrence.tolist() == [0, 0, 1]
+    assert len(set(key_hash.tolist())) == 3
+    assert content_hash[0] == content_hash[2]
+
+    # El precio cambia el contenido pero no la clave
+    changed = invoice.copy()
+    changed.loc[1, "Precio Unitario"] = 3300.0
+    changed_key, changed_content, _ = line_hashes(changed)
+    assert changed_key.tolist() == key_hash.tolist()
+    assert changed_content[1] != content_hash[1] and changed_content[0] == content_hash[0]
+
+
+def test_line_hashes_ignore_account_type(invoice):
+    # La cuenta 4793126 y '4793126' dan la misma clave
+    as_text = invoice.copy()
+    as_text["Nro de Cuenta"] = as_text["Nro de Cuenta"].astype(str)
+    assert line_hashes(as_text)[0].tolist() == line_hashes(invoice)[0].tolist()
+    other = invoice.copy()
+    other["Drogueria"] = "suizo"
+    assert not set(line_hashes(other)[0].tolist()) & set(line_hashes(invoice)[0].tolist())
@@ -0,0 +1,38 @@
+import json
+import os
+from conftest import BASE_DIR
+from libs.builder.builder import process_files
+from libs.instrumentation import instrumentation
+from libs.instrumentation.instrumentation import collect_stages, timed_stage, write_profile
+
+SAMPLE = os.path.join(BASE_DIR, "docs", "21-2", "21-2", "MONROE 4793126 - 1 AL 10.dat")
+
+
+def test_stages_are_collected():
+    with collect_stages() as stages:
+        with timed_stage("Filtrado", rows_in=10) as stage:
+            stage.rows_out = 7
+    assert [(s["stage"], s["rows_in"], s["rows_out"]) for s in stages] == [("Filtrado", 10, 7)]
+    assert stages[0]["seconds"] >= 0
+
+
+def test_disabled_stages_are_not_recorded(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_enabled", False)
+    with collect_stages() as stages:
+        with timed_stage("Filtrado", rows_in=10) as stage:
+            stage.rows_out = 7
+    assert stages == []
+
+
+def test_profile_of_a_run(tmp_path):
+    results = process_files([{"path": SAMPLE, "provider": "monroe", "account": 4793126}])
+    path = tmp_path / "perfil.json"
+    write_profile(results, str(path))
+
+    profile = json.loads(path.read_text(encoding="utf-8"))
+    assert [f["path"] for f in profile["files"]] == [SAMPLE]
+    assert profile["files"][0]["error"] is None
+    stages = profile["files"][0]["stages"]
+    assert stages and stages[-1]["rows_out"] == len(results[0]["df"])
+    totals = profile["stages"]["monroe"]
+    assert sum(total["calls"] for total in totals.values()) == len(stages)
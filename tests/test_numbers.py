@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+from controllers.file_controller import parse_ar_numbers
+
+
+def test_argentine_format():
+    result = parse_ar_numbers(pd.Series(["1.234,56", "12,5", "1.000", "-3,75", "0,00"]))
+    assert result.tolist() == [1234.56, 12.5, 1000.0, -3.75, 0.0]
+    assert result.dtype == "float64"
+
+
+def test_decimal_point_and_numbers():
+    assert parse_ar_numbers(pd.Series(["1234.56", "7"])).tolist() == [1234.56, 7.0]
+    assert parse_ar_numbers(pd.Series([1, 2, 3])).tolist() == [1.0, 2.0, 3.0]
+    assert parse_ar_numbers(pd.Series([1.5, np.nan])).tolist()[0] == 1.5
+
+
+def test_mixed_and_empty_values():
+    result = parse_ar_numbers(pd.Series(["1.234,5", 10, None, 2.5], index=[3, 4, 5, 6], name="Precio"))
+    assert result.index.tolist() == [3, 4, 5, 6]
+    assert result.name == "Precio"
+    assert result.iloc[[0, 1, 3]].tolist() == [1234.5, 10.0, 2.5]
+    assert np.isnan(result.iloc[2])
+
+
+def test_invalid_value_raises():
+    with pytest.raises(ValueError, match="abc"):
+        parse_ar_numbers(pd.Series(["1,5", "abc"]))
+
+
+def test_keller_prices_are_read_as_numbers(tmp_path):
+    from libs.normalizers.keller.controllers.file_controller import read_invoice
+
+    path = tmp_path / "A001808244238.csv"
+    path.write_bytes("﻿Fecha;CodBarra;Producto;Cantidad;Precio Público;Precio Unit.;Importe;Faltas\n"
+                     "4/2/2025;0795375000412;PLATSUL;00014;75.991,35;49.272,79;689.819,06;00000;\n"
+                     "4/2/2025;7795375000535;REM CHOBET;00002;26.171,40;1.247,2;2.494,4;00000;\n".encode("utf-8"))
+    df = read_invoice(str(path))
+    assert df["Precio Unit."].dtype == "float64"
+    assert df["Precio Unit."].tolist() == [49272.79, 1247.2]
+    assert parse_ar_numbers(df["Precio Unit."]).tolist() == [49272.79, 1247.2]
+    # El código de barras se lee como texto (conserva el cero inicial)
+    assert df["CodBarra"].tolist() == ["0795375000412", "7795375000535"]
@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+from controllers.file_controller import CSV_ENCODING, merge_and_save, output_format_for_path
+from libs.schema.schema import concat_frames
+from libs.spill.spill import SpillFile
+
+
+def test_output_format_for_path():
+    assert output_format_for_path("salida.xlsx") == "xlsx"
+    assert output_format_for_path("salida.CSV") == "csv"
+    assert output_format_for_path("dataset") == "dataset"
+    assert output_format_for_path("sqlite:///notas.sqlite") == "database"
+
+
+def test_csv_round_trip(tmp_path, invoice, other_invoice):
+    path = str(tmp_path / "salida.csv")
+    assert merge_and_save([invoice, other_invoice], path)
+
+    df = pd.read_csv(path, sep=";", decimal=",", encoding=CSV_ENCODING, dtype={"Codigo de Barras": str})
+    expected = concat_frames([invoice, other_invoice])
+    assert df["Fecha"].tolist() == expected["Fecha"].dt.strftime("%d/%m/%Y").tolist()
+    assert df["Precio Unitario"].tolist() == expected["Precio Unitario"].tolist()
+    assert df["IVA (%)"].tolist() == [21.0, 21.0, 21.0, 21.0, 0.0]
+    assert df["Codigo de Barras"].fillna("").tolist() == expected["Codigo de Barras"].fillna("").tolist()
+
+
+def test_dataset_round_trip(tmp_path, invoice, other_invoice):
+    ds = pytest.importorskip("pyarrow.dataset")
+    path = str(tmp_path / "dataset")
+    with SpillFile(directory=str(tmp_path)) as spill:
+        # Agregados en otro orden: la salida sigue el orden de las claves
+        spill.append(other_invoice, key=1)
+        spill.append(invoice, key=0)
+        assert merge_and_save(spill, path)
+
+    df = ds.dataset(path, partitioning="hive").to_table().to_pandas()
+    assert sorted(df["Mes"].astype(str).unique()) == ["2025-02", "2025-03"]
+    assert set(df["Drogueria"].astype(str)) == {"monroe"}
+    assert len(df) == 5
+    march = df[df["Mes"].astype(str) == "2025-03"]
+    assert march["Cantidad"].tolist() == [5, 10]
+
+
+def test_generator_rows_are_counted(tmp_path, invoice, other_invoice):
+    # Un generador se recorre una sola vez: se escribe igual que una lista
+    path = str(tmp_path / "salida.csv")
+    assert merge_and_save(iter([invoice, other_invoice]), path)
+    assert len(pd.read_csv(path, sep=";", encoding=CSV_ENCODING)) == 5
+
+
+def test_row_count_mismatch_fails(tmp_path, invoice, monkeypatch):
+    from controllers import file_controller
+
+    monkeypatch.setitem(file_controller.OUTPUT_SINKS, "csv", lambda frames, output_path: 0)
+    assert not merge_and_save([invoice], str(tmp_path / "salida.csv"))
+
+
+def test_xlsx_is_styled_in_one_pass(tmp_path, invoice, other_invoice):
+    from openpyxl import load_workbook
+
+    path = str(tmp_path / "salida.xlsx")
+    assert merge_and_save([invoice, other_invoice], path)
+
+    sheet = load_workbook(path).active
+    assert sheet.title == "Datos Normalizados"
+    assert sheet.max_row == 6
+    assert sheet["A1"].font.bold
+    assert sheet["A1"].fill.fgColor.rgb.endswith("D9EAF7")
+    fecha = [cell for cell in sheet[1] if cell.value == "Fecha"][0].column
+    assert sheet.cell(row=2, column=fecha).number_format == "DD/MM/YYYY"
+
+
+def test_spill_is_private_and_removed(tmp_path, invoice, other_invoice):
+    import os
+    import stat
+
+    spill = SpillFile(directory=str(tmp_path), buffer_rows=2)
+    assert os.path.dirname(spill.path) == spill.directory
+    if os.name == "posix":
+        assert stat.S_IMODE(os.stat(spill.directory).st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(spill.path).st_mode) == 0o600
+    spill.append(other_invoice, key=1)
+    spill.append(invoice, key=0)
+    df = concat_frames(list(spill))
+    pd.testing.assert_frame_equal(df, concat_frames([invoice, other_invoice]))
+    spill.close()
+    assert not os.path.exists(spill.directory)
+    assert list(tmp_path.iterdir()) == []
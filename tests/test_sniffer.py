@@ -0,0 +1,38 @@
+import pytest
+from libs.sniffer.sniffer import sniff_bytes, sniff_file
+
+
+def test_delimiter_and_columns():
+    detected = sniff_bytes(b"a;b;c\r\n1;2;3\n")
+    assert (detected.delimiter, detected.columns, detected.first_line) == (";", 3, "a;b;c")
+    assert sniff_bytes(b"a,b\n", delimiters=[",", ";"]).delimiter == ","
+    assert sniff_bytes(b"abc\n").delimiter is None
+
+
+def test_encoding():
+    assert sniff_bytes("﻿Precio Público;x\n".encode("utf-8")).encoding == "utf-8-sig"
+    assert sniff_bytes("Precio Público;x\n".encode("utf-8")).encoding == "utf-8"
+    assert sniff_bytes("Precio Público;x\n".encode("latin1")).encoding == "latin1"
+    assert sniff_bytes(b"a;b\n", default_encoding="utf-8").encoding == "utf-8"
+    assert sniff_bytes(b" \n") is None
+
+
+def test_latin1_after_the_sample(tmp_path):
+    # El comienzo es UTF-8, pero más adelante hay un carácter latin1
+    path = tmp_path / "factura.txt"
+    path.write_bytes("Precio Público;x\n".encode("utf-8") + b"1;2\n" * 100 + "Ñ;3\n".encode("latin1"))
+    assert sniff_file(str(path), sample_bytes=64).encoding == "latin1"
+    assert sniff_file(str(path)).encoding == "latin1"
+
+
+def test_first_line_longer_than_the_sample(tmp_path):
+    path = tmp_path / "factura.txt"
+    path.write_bytes(b";".join([b"columna"] * 50) + b"\n1\n")
+    assert sniff_file(str(path), sample_bytes=16).columns == 50
+
+
+def test_empty_file_raises(tmp_path):
+    path = tmp_path / "vacio.txt"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        sniff_file(str(path))
@@ -0,0 +1,58 @@
+import os
+import pandas as pd
+import pytest
+from conftest import BASE_DIR
+from libs.builder.builder import stream_files
+from libs.normalizers.cofarsur.cofarsur import process_cofarsur, stream_cofarsur
+from libs.normalizers.monroe.controllers.file_controller import fill_dates_from_header
+from libs.normalizers.monroe.monroe import process_monroe, stream_monroe
+from libs.schema.schema import concat_frames
+
+SAMPLES = os.path.join(BASE_DIR, "docs", "21-2", "21-2")
+
+
+@pytest.mark.parametrize("name, process, stream", [
+    ("MONROE 4793126 - 1 AL 10.dat", process_monroe, stream_monroe),
+    ("COFAR 2285 - 9 AL 16.txt", process_cofarsur, stream_cofarsur),
+])
+@pytest.mark.parametrize("chunksize", [7, 50])
+def test_stream_matches_whole_file(name, process, stream, chunksize):
+    # Con bloques chicos, las facturas quedan cortadas: la fecha pasa de un bloque al otro
+    path = os.path.join(SAMPLES, name)
+    whole = process(path, "p", 123)
+    parts = concat_frames(list(stream(path, "p", 123, chunksize)))
+    pd.testing.assert_frame_equal(whole.reset_index(drop=True), parts, check_categorical=False)
+
+
+def _monroe_lines(rows):
+    return pd.DataFrame(rows, columns=["TIPO LINEA", "NUMERO FORMATEADO", "FECHA"])
+
+
+def test_monroe_carries_only_the_last_invoice():
+    state = {}
+    first = fill_dates_from_header(_monroe_lines([
+        ("Cabecera", "0001-00000001", "03/02/2025"),
+        ("Detalle", "0001-00000001", None),
+        ("Cabecera", "0001-00000002", "04/02/2025"),
+        ("Detalle", "0001-00000002", None),
+    ]), state)
+    assert first["FECHA"].notna().all()
+    assert state == {"factura": ("0001-00000002", pd.Timestamp("2025-02-04"))}
+
+    second = fill_dates_from_header(_monroe_lines([
+        ("Detalle", "0001-00000002", None),
+        ("Cabecera", "0001-00000003", "05/02/2025"),
+        ("Detalle", "0001-00000003", None),
+    ]), state)
+    assert second["FECHA"].tolist() == [pd.Timestamp("2025-02-04"), pd.Timestamp("2025-02-05"),
+                                        pd.Timestamp("2025-02-05")]
+    assert state == {"factura": ("0001-00000003", pd.Timestamp("2025-02-05"))}
+
+
+def test_stream_files_lowercases_the_provider():
+    path = os.path.join(SAMPLES, "MONROE 4793126 - 1 AL 10.dat")
+    results = []
+    parts = concat_frames(list(stream_files([{"path": path, "provider": "Monroe", "account": 123}], 50, results)))
+    assert results[0]["error"] is None
+    assert results[0]["provider"] == "monroe"
+    assert len(parts) == len(process_monroe(path, "monroe", 123))
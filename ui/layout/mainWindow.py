@@ -3,7 +3,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_MainWindow(object):
     def setupUi(self, MainWindow):
         MainWindow.setObjectName("MainWindow")
-        MainWindow.resize(600, 479)  # Se amplía la ventana horizontalmente
+        MainWindow.resize(820, 520)  # Se amplía la ventana para las columnas de la cola
         
         # Crear widget central y el layout principal vertical
         self.centralwidget = QtWidgets.QWidget(MainWindow)
@@ -76,24 +76,44 @@ class Ui_MainWindow(object):
         folder_layout.addWidget(self.pushButton_3)
         self.main_layout.addLayout(folder_layout)
         
-        # Tabla (se adapta al ancho disponible)
-        self.tableWidget = QtWidgets.QTableWidget(self.centralwidget)
-        self.tableWidget.setObjectName("tableWidget")
-        self.tableWidget.setColumnCount(4)
-        self.tableWidget.setRowCount(0)
-        # Definir los headers de la tabla
-        for i in range(4):
-            item = QtWidgets.QTableWidgetItem()
-            self.tableWidget.setHorizontalHeaderItem(i, item)
-        header = self.tableWidget.horizontalHeader()
-        header.setSectionResizeMode(QtWidgets.QHeaderView.Stretch)
-        self.main_layout.addWidget(self.tableWidget)
+        # Tabla de la cola (el modelo y el botón para quitar filas se asignan en MainWindow)
+        self.tableView = QtWidgets.QTableView(self.centralwidget)
+        self.tableView.setObjectName("tableView")
+        self.tableView.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.tableView.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.tableView.setMouseTracking(True)
+        self.tableView.verticalHeader().setVisible(False)
+        self.main_layout.addWidget(self.tableView)
+        
+        # Botón para quitar los archivos seleccionados
+        self.pushButton_remove = QtWidgets.QPushButton(self.centralwidget)
+        self.pushButton_remove.setObjectName("pushButton_remove")
+        self.main_layout.addWidget(self.pushButton_remove)
         
         # Botón para procesar archivos
         self.pushButton = QtWidgets.QPushButton(self.centralwidget)
         self.pushButton.setObjectName("pushButton")
         self.main_layout.addWidget(self.pushButton)
         
+        # Avance del procesamiento: barra, detalle (archivo, etapa, filas/s, ETA) y botón para cancelar
+        progress_layout = QtWidgets.QHBoxLayout()
+        progress_layout.setSpacing(10)
+        self.progressBar = QtWidgets.QProgressBar(self.centralwidget)
+        self.progressBar.setSizePolicy(sizePolicyExpanding)
+        self.progressBar.setRange(0, 100)
+        self.progressBar.setValue(0)
+        self.progressBar.setObjectName("progressBar")
+        progress_layout.addWidget(self.progressBar)
+        self.pushButton_cancel = QtWidgets.QPushButton(self.centralwidget)
+        self.pushButton_cancel.setEnabled(False)
+        self.pushButton_cancel.setObjectName("pushButton_cancel")
+        progress_layout.addWidget(self.pushButton_cancel)
+        self.main_layout.addLayout(progress_layout)
+        
+        self.label_progress = QtWidgets.QLabel(self.centralwidget)
+        self.label_progress.setObjectName("label_progress")
+        self.main_layout.addWidget(self.label_progress)
+        
         MainWindow.setCentralWidget(self.centralwidget)
         
         self.statusbar = QtWidgets.QStatusBar(MainWindow)
@@ -113,12 +133,6 @@ class Ui_MainWindow(object):
         self.pushButton_2.setText(_translate("MainWindow", "Subir"))
         self.label_3.setText(_translate("MainWindow", "Selecciona la Carpeta Kellerhof:"))
         self.pushButton_3.setText(_translate("MainWindow", "Subir"))
-        item = self.tableWidget.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "Archivo"))
-        item = self.tableWidget.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "Droguería"))
-        item = self.tableWidget.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "Cuenta"))
-        item = self.tableWidget.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "Eliminar"))
+        self.pushButton_remove.setText(_translate("MainWindow", "Quitar seleccionados"))
         self.pushButton.setText(_translate("MainWindow", "Procesar Archivos"))
+        self.pushButton_cancel.setText(_translate("MainWindow", "Cancelar"))
@@ -1,15 +1,28 @@
 import json, os, sys
-from PyQt5.QtWidgets import QMainWindow, QFileDialog, QMessageBox, QTableWidgetItem, QPushButton
+from PyQt5.QtCore import QThread
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtWidgets import QMainWindow, QFileDialog, QMessageBox, QHeaderView, QShortcut
 from ui.layout.mainWindow import Ui_MainWindow  # Importamos la UI generada por PyQt5
+from ui.queue_model import QueueTableModel, DeleteButtonDelegate, DELETE_COLUMN
 from controllers.file_processor import FileProcessor  # Procesador de archivos
-from controllers.file_controller import merge_and_save, style_excel_file
+from workers.inspection_worker import InspectionWorker
+from libs.instrumentation.instrumentation import get_logger
+
+logger = get_logger(__name__)
+
+# Opción del combo de proveedores que reconoce el proveedor de cada archivo
+AUTO_PROVIDER = "Autodetectar"
 
 class MainWindow(QMainWindow, Ui_MainWindow):
     def __init__(self):
         super().__init__()
         self.setupUi(self)
 
-        self.processor = FileProcessor()  # Instancia del procesador de archivos
+        # Cola de archivos: el modelo de la tabla es la cola del procesador
+        self.queue_model = QueueTableModel(self)
+        self.processor = FileProcessor(queue=self.queue_model)  # Instancia del procesador de archivos
+        self.inspections = []  # (QThread, InspectionWorker) de las inspecciones en curso
+        self.setup_queue_view()
         self.accounts_data = self.load_accounts_json()  # Cargar cuentas desde JSON
 
         # Cargar proveedores en el primer combobox
@@ -21,6 +34,9 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.pushButton_2.clicked.connect(self.add_file)
         self.pushButton_3.clicked.connect(self.add_folder)
         self.pushButton.clicked.connect(self.start_processing)
+        self.pushButton_cancel.clicked.connect(self.cancel_processing)
+        self.pushButton_remove.clicked.connect(self.remove_selected)
+        self.queue_model.rowsInserted.connect(self.inspect_rows)
 
         self.on_provider_changed()
 
@@ -36,12 +52,13 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             with open(file_path, "r", encoding="utf-8") as file:
                 return json.load(file)
         except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"❌ Error al cargar cuentas.json: {e}")
+            logger.error(f"❌ Error al cargar cuentas.json: {e}")
             return {}
 
     def populate_providers(self):
         self.comboBox.clear()
         self.comboBox.addItem("Seleccione un proveedor")
+        self.comboBox.addItem(AUTO_PROVIDER)
         for provider in self.accounts_data.keys():
             self.comboBox.addItem(provider.capitalize())
 
@@ -53,13 +70,57 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             for account_name, account_number in self.accounts_data[provider].items():
                 self.comboBox_2.addItem(f"{account_name.capitalize()} ({account_number})", account_number)
     
+    def setup_queue_view(self):
+        self.tableView.setModel(self.queue_model)
+        self.delete_delegate = DeleteButtonDelegate(self.tableView)
+        self.delete_delegate.delete_requested.connect(self.remove_row)
+        self.tableView.setItemDelegateForColumn(DELETE_COLUMN, self.delete_delegate)
+
+        # Ancho fijo en las columnas (ajustarlas al contenido recorrería todas las filas)
+        header = self.tableView.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        header.setSectionResizeMode(DELETE_COLUMN, QHeaderView.Fixed)
+        header.resizeSection(DELETE_COLUMN, 40)
+
+        QShortcut(QKeySequence.Delete, self.tableView, activated=self.remove_selected)
+
     def remove_row(self, row):
-        del self.processor.files_to_process[row]
-        self.update_table()
+        self.queue_model.remove_rows([row])
+
+    def remove_selected(self):
+        rows = [index.row() for index in self.tableView.selectionModel().selectedRows()]
+        self.queue_model.remove_rows(rows)
+
+    def inspect_rows(self, _parent, first, last):
+        # Tamaño, proveedor reconocido y cantidad de filas se completan en segundo plano
+        thread = QThread(self)
+        worker = InspectionWorker(self.queue_model.entries[first:last + 1])
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.inspected.connect(self.queue_model.update_entries)
+        worker.finished.connect(thread.quit)
+        thread.finished.connect(self.cleanup_inspections)
+        self.inspections.append((thread, worker))
+        thread.start()
+
+    def cleanup_inspections(self):
+        self.inspections = [(thread, worker) for thread, worker in self.inspections if not thread.isFinished()]
+
+    def closeEvent(self, event):
+        for thread, worker in self.inspections:
+            worker.stop()
+            thread.quit()
+            thread.wait()
+        super().closeEvent(event)
 
     def on_provider_changed(self):
         provider = self.comboBox.currentText().lower()
-        if provider == "keller":
+        if provider == AUTO_PROVIDER.lower():
+            # Se pueden agregar archivos sueltos o carpetas con archivos de varios proveedores
+            self.pushButton_2.setEnabled(True)
+            self.pushButton_3.setEnabled(True)
+        elif provider == "keller":
             self.pushButton_2.setEnabled(False)
             self.pushButton_3.setEnabled(True)
         else:
@@ -68,6 +129,11 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     def add_file(self):
         provider = self.comboBox.currentText().lower()
+        if provider == AUTO_PROVIDER.lower():
+            file_paths, _ = QFileDialog.getOpenFileNames(self, "Seleccionar Archivos", "", "Archivos (*.csv *.txt *.dat);;Todos los archivos (*)")
+            if file_paths:
+                self.warn_unknown_files(self.processor.add_detected_files(file_paths))
+            return
         if provider == "keller":
             self.add_folder()
             return
@@ -78,9 +144,13 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 QMessageBox.warning(self, "Advertencia", "Debe seleccionar un proveedor y una cuenta válida.")
                 return
             self.processor.add_file(file_path, provider, account)
-            self.update_table()
 
     def add_folder(self):
+        if self.comboBox.currentText().lower() == AUTO_PROVIDER.lower():
+            folder_path = QFileDialog.getExistingDirectory(self, "Seleccionar Carpeta")
+            if folder_path:
+                self.warn_unknown_files(self.processor.add_detected_folder(folder_path))
+            return
         folder_path = QFileDialog.getExistingDirectory(self, "Seleccionar Carpeta Kellerhof")
         if folder_path:
             provider = "keller"
@@ -89,18 +159,11 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 QMessageBox.warning(self, "Advertencia", "Debe seleccionar una cuenta válida.")
                 return
             self.processor.add_folder(folder_path, provider, account)
-            self.update_table()
-
-    def update_table(self):
-        self.tableWidget.setRowCount(len(self.processor.files_to_process))
-        for row, file_info in enumerate(self.processor.files_to_process):
-            file_name = os.path.basename(file_info["path"])
-            self.tableWidget.setItem(row, 0, QTableWidgetItem(file_name))
-            self.tableWidget.setItem(row, 1, QTableWidgetItem(file_info["provider"]))
-            self.tableWidget.setItem(row, 2, QTableWidgetItem(str(file_info["account"])))
-            btn_delete = QPushButton("❌")
-            btn_delete.clicked.connect(lambda _, r=row: self.remove_row(r))
-            self.tableWidget.setCellWidget(row, 3, btn_delete)
+
+    def warn_unknown_files(self, unknown_paths):
+        if unknown_paths:
+            names = "\n".join(os.path.basename(path) for path in unknown_paths)
+            QMessageBox.warning(self, "Advertencia", f"No se reconoció el proveedor de {len(unknown_paths)} archivo(s):\n{names}")
 
     def start_processing(self):
         if not self.processor.files_to_process:
@@ -110,26 +173,103 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.thread, self.worker = self.processor.start_processing_worker()
         self.worker.finished.connect(self.handle_processing_finished)
         self.worker.error.connect(self.handle_processing_error)
+        self.worker.cancelled.connect(self.handle_processing_cancelled)
+        self.worker.progress.connect(self.update_progress)
+        self.queue_model.update_entries([(entry, {"status": None, "error": None}) for entry in self.queue_model])
+        self.set_processing_state(True)
         self.thread.start()
 
-    def handle_processing_finished(self, processed_dataframes):
-        # Este método se ejecuta en el hilo principal
-        file_path, _ = QFileDialog.getSaveFileName(self, "Guardar Archivo", "", "Archivos Excel (*.xlsx);;Todos los archivos (*)")
+    def cancel_processing(self):
+        # El worker corre en otro hilo: cancel() solo activa un evento
+        self.worker.cancel()
+        self.pushButton_cancel.setEnabled(False)
+        self.label_progress.setText("⛔ Cancelando...")
+
+    def set_processing_state(self, processing):
+        self.pushButton.setEnabled(not processing)
+        self.pushButton_cancel.setEnabled(processing)
+        if processing:
+            self.progressBar.setValue(0)
+            self.label_progress.setText("🔹 Iniciando el procesamiento...")
+        else:
+            self.label_progress.clear()
+
+    def update_progress(self, event):
+        self.update_file_status(event)
+
+        if event["bytes_total"]:
+            percent = 100 * event["bytes_done"] / event["bytes_total"]
+        else:
+            percent = 100 * event["files_done"] / max(event["files_total"], 1)
+        self.progressBar.setValue(int(percent))
+
+        parts = [f"{event['files_done']}/{event['files_total']} archivos"]
+        if event["type"] in ("file_started", "stage"):
+            parts.append(os.path.basename(event["path"] or ""))
+        if event["type"] == "stage":
+            parts.append(f"{event['stage']} ({event['rows']} filas)")
+        if event["rows_per_sec"]:
+            parts.append(f"{event['rows_per_sec']:,.0f} filas/s")
+        if event["eta"] is not None:
+            minutes, seconds = divmod(int(event["eta"]), 60)
+            parts.append(f"ETA {minutes:02d}:{seconds:02d}")
+        self.label_progress.setText(" · ".join(parts))
+
+    def update_file_status(self, event):
+        # Los índices de los eventos son de la copia de la cola que tiene el worker
+        entry = self.worker.files_to_process[event["index"]]
+        if event["type"] == "file_started":
+            values = {"status": "⏳ Procesando"}
+        elif event["type"] == "stage":
+            values = {"status": f"⏳ {event['stage']}"}
+        elif event["error"]:
+            values = {"status": "❌ Error", "error": event["error"]}
+        else:
+            cached = " (caché)" if event["cached"] else ""
+            duplicates = f" ({event['duplicates']:,} repetidas)" if event["duplicates"] else ""
+            values = {"status": f"✅ {event['rows']:,} filas{cached}{duplicates}"}
+        self.queue_model.update_entries([(entry, values)])
+
+    def handle_processing_finished(self, spill, history=None):
+        # Este método se ejecuta en el hilo principal. Los DataFrames están en disco (SpillFile)
+        # y sus líneas, pendientes en el historial: se confirman solo si se guarda la salida
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Guardar Archivo", "", "Archivos Excel (*.xlsx);;Archivos CSV (*.csv)"
+        )
         if not file_path:
-            print("⚠️ Guardado cancelado por el usuario.")
+            logger.warning("⚠️ Guardado cancelado por el usuario.")
         else:
-            if not file_path.endswith(".xlsx"):
-                file_path += ".xlsx"
+            # El formato de la salida se elige por la extensión (ver output_format_for_path)
+            extension = ".csv" if "csv" in selected_filter.lower() else ".xlsx"
+            if not file_path.lower().endswith(extension):
+                file_path += extension
             try:
-                merge_and_save(processed_dataframes, file_path)
-                style_excel_file(file_path)
-                print(f"✅ Procesamiento completado. Archivo guardado en: {file_path}")
+                # Se importa al usarlo: carga pandas y openpyxl (normalmente ya precargados)
+                from controllers.file_controller import merge_and_save, open_folder
+
+                # merge_and_save escribe el archivo (con estilos, si es xlsx) leyendo el spill por bloques
+                if merge_and_save(spill, file_path):
+                    if history is not None:
+                        history.commit()
+                    open_folder(os.path.dirname(file_path))
+                    logger.info(f"✅ Procesamiento completado. Archivo guardado en: {file_path}")
             except Exception as e:
-                print(f"❌ Error al guardar los resultados: {str(e)}")
+                logger.error(f"❌ Error al guardar los resultados: {str(e)}")
+        if history is not None:
+            history.close()
+        spill.close()
+        self.set_processing_state(False)
         self.thread.quit()
         self.thread.wait()
 
     def handle_processing_error(self, error_message):
+        self.set_processing_state(False)
         QMessageBox.critical(self, "Error en el procesamiento", error_message)
         self.thread.quit()
         self.thread.wait()
+
+    def handle_processing_cancelled(self):
+        self.set_processing_state(False)
+        self.statusbar.showMessage("⛔ Procesamiento cancelado.", 5000)
+        self.thread.quit()
+        self.thread.wait()
@@ -0,0 +1,192 @@
+import os
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QEvent, pyqtSignal
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+
+# Columnas de la cola: (título, clave de la entrada). La última es el botón para quitar la fila.
+COLUMNS = [
+    ("Archivo", "path"),
+    ("Droguería", "provider"),
+    ("Cuenta", "account"),
+    ("Tamaño", "size"),
+    ("Detectado", "detected"),
+    ("Filas", "records"),
+    ("Estado", "status"),
+    ("", None),
+]
+DELETE_COLUMN = len(COLUMNS) - 1
+
+# Texto de las columnas que todavía se están calculando
+PENDING_TEXT = "…"
+
+# Estado de los archivos que todavía no se procesaron
+QUEUED_STATUS = "En cola"
+
+
+def format_size(size):
+    """
+    Convierte una cantidad de bytes en un texto legible (ej.: '1.5 MB').
+    """
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size} B" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class QueueTableModel(QAbstractTableModel):
+    """
+    Modelo de la cola de archivos a procesar.
+
+    Cada fila es la entrada de la cola ({"path", "provider", "account"}), a la que se
+    le agregan "size", "detected" y "records" cuando termina su inspección, y "status"
+    y "error" durante el procesamiento. Las filas se agregan y se quitan avisando a la
+    vista solo del rango afectado, sin reconstruir la tabla.
+
+    También se comporta como una lista (append, extend, len, iteración e índices)
+    para que FileProcessor la use como su cola.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = []
+        self._rows_by_id = None  # id(entrada) -> fila; se recalcula al agregar o quitar filas
+
+    # Interfaz de lista
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __getitem__(self, row):
+        return self.entries[row]
+
+    def append(self, entry):
+        self.extend([entry])
+
+    def extend(self, entries):
+        entries = list(entries)
+        if not entries:
+            return
+        first = len(self.entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        self.entries.extend(entries)
+        self._rows_by_id = None
+        self.endInsertRows()
+
+    def remove_rows(self, rows):
+        """
+        Quita las filas indicadas, agrupando las contiguas en un solo aviso a la vista.
+        """
+        ranges = []  # [primera, última], de la última fila hacia la primera
+        for row in sorted(set(rows), reverse=True):
+            if ranges and ranges[-1][0] == row + 1:
+                ranges[-1][0] = row
+            else:
+                ranges.append([row, row])
+        for first, last in ranges:
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.entries[first:last + 1]
+            self.endRemoveRows()
+        self._rows_by_id = None
+
+    def row_of(self, entry):
+        """
+        Retorna la fila de la entrada, o None si ya no está en la cola.
+        """
+        if self._rows_by_id is None:
+            self._rows_by_id = {id(item): row for row, item in enumerate(self.entries)}
+        return self._rows_by_id.get(id(entry))
+
+    def update_entries(self, updates):
+        """
+        Actualiza los datos de varias entradas y redibuja solo las filas afectadas.
+        Las entradas que se quitaron de la cola mientras tanto se ignoran.
+
+        Parámetros:
+            updates (list[tuple[dict, dict]]): Pares (entrada, campos nuevos).
+        """
+        rows = []
+        for entry, values in updates:
+            row = self.row_of(entry)
+            if row is None:
+                continue
+            entry.update(values)
+            rows.append(row)
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), 0), self.index(max(rows), DELETE_COLUMN - 1))
+
+    # Interfaz de QAbstractTableModel
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section][0]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        key = COLUMNS[index.column()][1]
+        if role == Qt.DisplayRole:
+            return self.display_text(entry, key)
+        if role == Qt.ToolTipRole and key in ("path", "status"):
+            return entry.get("error") or entry["path"]
+        if role == Qt.TextAlignmentRole and key in ("size", "records"):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.ForegroundRole and key == "detected":
+            # Resaltar los archivos que no parecen ser del proveedor elegido
+            if "detected" in entry and entry["detected"] != entry.get("provider"):
+                return QColor("#c0392b")
+        return None
+
+    @staticmethod
+    def display_text(entry, key):
+        if key is None:
+            return None
+        if key == "path":
+            return os.path.basename(entry["path"])
+        if key == "status":
+            return entry.get("status") or QUEUED_STATUS
+        if key in ("size", "detected", "records") and key not in entry:
+            return PENDING_TEXT  # Inspección en curso
+        value = entry.get(key)
+        if value is None:
+            return "-"
+        if key == "size":
+            return format_size(value)
+        if key == "records":
+            return f"{value:,}"
+        return str(value)
+
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    """
+    Dibuja el botón para quitar una fila de la cola, sin crear un widget por fila.
+    """
+
+    delete_requested = pyqtSignal(int)
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(4, 2, -4, -2)
+        button.text = "❌"
+        button.state = QStyle.State_Enabled | (option.state & QStyle.State_MouseOver)
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease) and event.button() == Qt.LeftButton:
+            # El clic en el botón no cambia la selección
+            if event.type() == QEvent.MouseButtonRelease and option.rect.contains(event.pos()):
+                self.delete_requested.emit(index.row())
+            return True
+        return super().editorEvent(event, model, option, index)
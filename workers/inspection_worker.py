@@ -0,0 +1,39 @@
+# inspection_worker.py
+import time
+from PyQt5.QtCore import QObject, pyqtSignal
+from libs.fingerprint.fingerprint import inspect_file
+
+# Cada cuántos segundos se envían los resultados a la tabla (agruparlos evita redibujarla por archivo)
+BATCH_SECONDS = 0.2
+
+
+class InspectionWorker(QObject):
+    # Lista de (entrada de la cola, {"size", "detected", "records"})
+    inspected = pyqtSignal(list)
+    finished = pyqtSignal()
+
+    def __init__(self, entries):
+        super().__init__()
+        self.entries = list(entries)
+        self.stopped = False
+
+    def stop(self):
+        """
+        Pide detener la inspección (por ejemplo, al cerrar la ventana).
+        """
+        self.stopped = True
+
+    def run(self):
+        batch = []
+        last_emit = time.perf_counter()
+        for entry in self.entries:
+            if self.stopped:
+                break
+            batch.append((entry, inspect_file(entry["path"], entry.get("provider"))))
+            if time.perf_counter() - last_emit >= BATCH_SECONDS:
+                self.inspected.emit(batch)
+                batch = []
+                last_emit = time.perf_counter()
+        if batch:
+            self.inspected.emit(batch)
+        self.finished.emit()
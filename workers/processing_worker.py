@@ -1,22 +1,109 @@
 # processing_worker.py
+import gc
+import os
+import threading
+import time
 from PyQt5.QtCore import QObject, pyqtSignal
 from libs.builder.builder import trigger_processing
+from libs.builder.progress import ProcessingCancelled
+from libs.history.history import HistoryStore
+from libs.instrumentation.instrumentation import get_logger
+from libs.spill.spill import SpillFile
+
+logger = get_logger(__name__)
+
 
 class ProcessingWorker(QObject):
-    finished = pyqtSignal(list)
+    # Los DataFrames procesados viajan en un SpillFile (en disco), no en una lista, junto
+    # con el historial con sus líneas pendientes (o None): quien lo recibe confirma y cierra
+    finished = pyqtSignal(object, object)
     error = pyqtSignal(str)
-    
-    def __init__(self, files_to_process):
+    cancelled = pyqtSignal()
+    # Avance del lote: evento de process_files más el total acumulado
+    # (path, files_done, files_total, bytes_done, bytes_total, rows_per_sec, elapsed, eta)
+    progress = pyqtSignal(dict)
+
+    def __init__(self, files_to_process, max_workers=1, cache=None, history_path=None):
         super().__init__()
-        self.files_to_process = files_to_process
+        self.files_to_process = list(files_to_process)  # Copia: la cola de la UI puede cambiar mientras tanto
+        self.max_workers = max_workers  # Procesos en paralelo (1 = secuencial)
+        self.cache = cache  # Caché de resultados (opcional)
+        # Historial de líneas (opcional): se abre en run(). Con None no se usa; con True,
+        # el historial por defecto (DEFAULT_HISTORY_PATH)
+        self.history_path = history_path
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """
+        Pide cancelar el procesamiento. Se puede llamar desde el hilo principal:
+        los archivos en curso se detienen al terminar su etapa actual.
+        """
+        self.cancel_event.set()
 
     def run(self):
-        try:
-            processed_dataframes = trigger_processing(self.files_to_process)
-            if processed_dataframes:
-                print("DEBUG: DataFrames procesados:", processed_dataframes)
-                self.finished.emit(processed_dataframes)
+        sizes = []
+        for file_info in self.files_to_process:
+            try:
+                sizes.append(os.path.getsize(file_info["path"]))
+            except (KeyError, OSError):
+                sizes.append(0)
+        state = {
+            "files_done": 0,
+            "files_total": len(sizes),
+            "bytes_done": 0,
+            "bytes_total": sum(sizes),
+            "rows_done": 0,
+            "start": time.perf_counter(),
+        }
+
+        def on_progress(event):
+            if event["type"] == "file_finished":
+                state["files_done"] += 1
+                state["bytes_done"] += sizes[event["index"]]
+                state["rows_done"] += event["rows"]
+            elapsed = time.perf_counter() - state["start"]
+            # ETA proporcional a los bytes que faltan (por archivos si no hay tamaños)
+            done, total = state["bytes_done"], state["bytes_total"]
+            if not total:
+                done, total = state["files_done"], state["files_total"]
+            eta = elapsed * (total - done) / done if done else None
+            if event["type"] == "stage" and event["seconds"]:
+                rows_per_sec = event["rows"] / event["seconds"]
             else:
-                self.error.emit("No se generaron DataFrames procesados.")
+                rows_per_sec = state["rows_done"] / elapsed if elapsed else None
+            self.progress.emit(dict(
+                event,
+                path=self.files_to_process[event["index"]].get("path"),
+                files_done=state["files_done"],
+                files_total=state["files_total"],
+                bytes_done=state["bytes_done"],
+                bytes_total=state["bytes_total"],
+                rows_per_sec=rows_per_sec,
+                elapsed=elapsed,
+                eta=eta,
+            ))
+
+        # Cada archivo se guarda en disco apenas termina; quien recibe finished lo cierra
+        spill = SpillFile()
+        history = None
+        try:
+            if self.history_path:
+                history = HistoryStore() if self.history_path is True else HistoryStore(self.history_path)
+            trigger_processing(
+                self.files_to_process, self.max_workers, self.cache, on_progress, self.cancel_event, spill, history
+            )
+            if len(spill):
+                logger.debug(f"{len(spill)} archivo(s) procesado(s), {spill.rows} filas en total.")
+                self.finished.emit(spill, history)
+                return
+            self.error.emit("No se generaron DataFrames procesados.")
+        except ProcessingCancelled:
+            # Liberar los resultados parciales antes de avisar
+            gc.collect()
+            self.cancelled.emit()
         except Exception as e:
             self.error.emit(f"Error durante el procesamiento: {str(e)}")
+        # Sin salida que guardar: las líneas pendientes se descartan al cerrar el historial
+        if history is not None:
+            history.close()
+        spill.close()